@@ -0,0 +1,72 @@
+from app.core.config import REAPER_BATCH_PAUSE_SECONDS, REAPER_BATCH_SIZE, REAPER_MAX_BATCHES
+from app.db.database import async_engine
+from app.services.ctest_results_service import backfill_percentages
+from app.services.item_statistics_service import backfill_item_statistics
+from app.services.maintenance_service import reap_expired_tests
+
+import argparse
+import asyncio
+import json
+
+
+"""
+Command line entry point for maintenance tasks.
+
+Usage:
+    python -m app.cli reap [--batch-size N] [--pause SECONDS] [--max-batches N] [--json]
+    python -m app.cli backfill-items [--batch-size N] [--pause SECONDS]
+    python -m app.cli backfill-percentages [--batch-size N] [--pause SECONDS]
+"""
+
+
+async def reap(args) -> None:
+    try:
+        report = await reap_expired_tests(batch_size=args.batch_size, pause=args.pause, max_batches=args.max_batches)
+    finally:
+        await async_engine.dispose()
+    print(json.dumps(report.as_dict()) if args.json else report.summary())
+
+
+async def backfill_items(args) -> None:
+    try:
+        processed = await backfill_item_statistics(batch_size=args.batch_size, pause=args.pause)
+    finally:
+        await async_engine.dispose()
+    print(f"Item statistics rebuilt for {processed} tests")
+
+
+async def backfill_submission_percentages(args) -> None:
+    try:
+        updated = await backfill_percentages(batch_size=args.batch_size, pause=args.pause)
+    finally:
+        await async_engine.dispose()
+    print(f"Percentage filled in for {updated} submissions")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="C-Tester maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reap_parser = commands.add_parser("reap", help="delete expired tests and their submissions")
+    reap_parser.add_argument("--batch-size", type=int, default=REAPER_BATCH_SIZE)
+    reap_parser.add_argument("--pause", type=float, default=REAPER_BATCH_PAUSE_SECONDS, help="seconds between batches")
+    reap_parser.add_argument("--max-batches", type=int, default=REAPER_MAX_BATCHES, help="0: until none are left")
+    reap_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    reap_parser.set_defaults(handler=reap)
+
+    backfill_parser = commands.add_parser("backfill-items", help="rebuild per-blank item statistics from stored submissions")
+    backfill_parser.add_argument("--batch-size", type=int, default=100, help="tests rebuilt per transaction")
+    backfill_parser.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    backfill_parser.set_defaults(handler=backfill_items)
+
+    percentages_parser = commands.add_parser("backfill-percentages", help="fill the percentage column of older submissions")
+    percentages_parser.add_argument("--batch-size", type=int, default=1000, help="submissions updated per transaction")
+    percentages_parser.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    percentages_parser.set_defaults(handler=backfill_submission_percentages)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+"""
+In-process caches shared by the services.
+
+Provides:
+- LRU cache bounded by the total byte size of its entries, with optional per-entry expiry
+"""
+
+
+class ByteBudgetLRUCache:
+    """
+    Thread-safe LRU cache that evicts entries once their total size exceeds a byte budget.
+
+    Args:
+        max_bytes (int): Upper bound for the summed size of all entries
+        size_of (callable): Returns the size in bytes of a cached value
+
+    Notes:
+        - Values larger than the whole budget are not cached at all
+        - Entries put with expires_at (Unix time) are dropped on the first get after it
+        - Counters (hits, misses, evictions, expirations) are cumulative for the process lifetime
+    """
+
+    def __init__(self, max_bytes: int, size_of):
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.time():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key, value, expires_at: float | None = None) -> None:
+        size = self._size_of(value)
+        if size > self.max_bytes or (expires_at is not None and expires_at <= time.time()):
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def pop(self, key) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Report cache occupancy and effectiveness.
+
+        Returns:
+            dict: {
+                "entries": int,
+                "bytes": int,
+                "max_bytes": int,
+                "hits": int,
+                "misses": int,
+                "evictions": int,
+                "expirations": int
+            }
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
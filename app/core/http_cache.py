@@ -0,0 +1,20 @@
+from typing import Optional
+
+
+"""
+Helpers for conditional HTTP requests (RFC 9110, section 13).
+
+Provides:
+- Weak ETag comparison against If-None-Match
+"""
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
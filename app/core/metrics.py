@@ -0,0 +1,370 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import math
+import threading
+import time
+
+
+"""
+Lightweight in-process metric primitives.
+
+Provides:
+- Histogram with fixed upper bounds for latency style measurements
+- Labeled counters and histograms collected in a registry
+- Prometheus text exposition of the registry
+- stage_timer for timing the stages of a hot path, also inside worker processes
+- track_request_stages for the stage breakdown of a single request
+"""
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed bucket upper bounds.
+
+    Attributes:
+        buckets (tuple[float]): Sorted bucket upper bounds (seconds for latencies)
+
+    Notes:
+        - Observations above the last bound are only counted in the +Inf bucket
+        - observe() is O(log number of buckets) and takes a single lock
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> dict:
+        """
+        Return a consistent copy of the histogram state.
+
+        Returns:
+            dict: {
+                "count": int,
+                "sum": float,
+                "max": float,
+                "buckets": {upper_bound: cumulative_count}  # includes "+Inf"
+            }
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count, maximum = self._sum, self._count, self._max
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == math.inf else bound] = cumulative
+        return {"count": count, "sum": total, "max": maximum, "buckets": buckets}
+
+
+@dataclass(frozen=True, slots=True)
+class MetricFamily:
+    """
+    One metric as exposed to Prometheus.
+
+    Attributes:
+        name (str): Metric name, counters end in "_total"
+        kind (str): "counter", "gauge" or "histogram"
+        help (str): One line description
+        samples (list[tuple[str, dict, float]]): (name suffix, labels, value) triples,
+            e.g. ("_bucket", {"le": "0.5"}, 12) for histograms
+    """
+    name: str
+    kind: str
+    help: str
+    samples: list
+
+
+def histogram_samples(snapshot: dict, labels: dict | None = None) -> list[tuple[str, dict, float]]:
+    """
+    Convert a Histogram snapshot into Prometheus samples.
+
+    Args:
+        snapshot (dict): Result of Histogram.snapshot() (buckets are already cumulative)
+        labels (dict | None): Labels added to every sample
+
+    Returns:
+        list: _bucket samples (one per bound, including +Inf), _sum and _count
+    """
+    labels = labels or {}
+    samples = [
+        ("_bucket", {**labels, "le": bound if bound == "+Inf" else _format_value(bound)}, count)
+        for bound, count in snapshot["buckets"].items()
+    ]
+    samples.append(("_sum", labels, snapshot["sum"]))
+    samples.append(("_count", labels, snapshot["count"]))
+    return samples
+
+
+class Counter:
+    """
+    Thread-safe monotonically increasing counter with optional labels.
+
+    Args:
+        name (str): Metric name, should end in "_total"
+        help (str): One line description
+        labelnames (tuple[str]): Names of the labels; inc() takes their values positionally
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        key = tuple(str(value) for value in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(tuple(str(value) for value in labelvalues), 0)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = list(self._values.items())
+        samples = [("", dict(zip(self.labelnames, key)), value) for key, value in values]
+        return MetricFamily(self.name, "counter", self.help, samples)
+
+
+class LabeledHistogram:
+    """
+    Family of Histograms with equal buckets, one per combination of label values.
+
+    Args:
+        name (str): Metric name
+        help (str): One line description
+        labelnames (tuple[str]): Names of the labels; labels() takes their values positionally
+        buckets (tuple[float]): Bucket upper bounds shared by all children
+
+    Notes:
+        - Children are created on first use; label values must come from a small,
+          fixed set (route templates, stage names), never from user input
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues) -> Histogram:
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: float, *labelvalues) -> None:
+        self.labels(*labelvalues).observe(value)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            children = list(self._children.items())
+        samples = []
+        for key, child in children:
+            samples.extend(histogram_samples(child.snapshot(), dict(zip(self.labelnames, key))))
+        return MetricFamily(self.name, "histogram", self.help, samples)
+
+
+class MetricsRegistry:
+    """
+    Collection of the metrics exposed on /metrics.
+
+    Notes:
+        - Counters and histograms are owned by the registry and updated in place
+        - Collectors are callables returning MetricFamily objects; they are called
+          on every scrape and let existing stats() methods be exported as they are
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list = []
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        counter = Counter(name, help, labelnames)
+        self._metrics.append(counter)
+        return counter
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_LATENCY_BUCKETS) -> LabeledHistogram:
+        histogram = LabeledHistogram(name, help, labelnames, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def register_collector(self, collector) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> list[MetricFamily]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            str: "# HELP" / "# TYPE" header and samples of every metric family
+        """
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {_escape(family.help, quote=False)}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, labels, value in family.samples:
+                lines.append(f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _escape(value, quote: bool = True) -> str:
+    escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+    return escaped.replace('"', '\\"') if quote else escaped
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+# Finer buckets than DEFAULT_LATENCY_BUCKETS, stages and queries are often sub-millisecond
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Process-wide registry rendered on /metrics
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    "ctest_http_request_seconds", "Time from receiving a request until its response was sent, by route template",
+    ("method", "route"),
+)
+http_requests = registry.counter(
+    "ctest_http_requests_total", "Finished requests by route template and status code", ("method", "route", "status")
+)
+stage_seconds = registry.histogram(
+    "ctest_stage_seconds", "Duration of the stages of generation, PDF rendering and database access",
+    ("operation", "stage"), STAGE_BUCKETS,
+)
+ctests_generated = registry.counter("ctest_tests_generated_total", "C-Tests stored, by endpoint", ("source",))
+submissions_received = registry.counter("ctest_submissions_total", "Submissions stored")
+pdf_bytes_served = registry.counter(
+    "ctest_pdf_bytes_served_total", "Bytes of generated PDF and ZIP documents sent to clients", ("format",)
+)
+errors = registry.counter(
+    "ctest_errors_total", "Error responses by the exception that caused them", ("type", "status")
+)
+
+# Set in worker threads/processes while a pool job runs, see collect_stages
+_stage_sink = threading.local()
+# Stages of the current request, only while track_request_stages is active
+_request_stages: ContextVar[list | None] = ContextVar("request_stages", default=None)
+
+
+def record_stage(operation: str, stage: str, seconds: float) -> None:
+    """Observe one stage duration, or buffer it while a worker pool job is collecting stages."""
+    stages = getattr(_stage_sink, "stages", None)
+    if stages is not None:
+        stages.append((operation, stage, seconds))
+        return
+    stage_seconds.labels(operation, stage).observe(seconds)
+    request_stages = _request_stages.get()
+    if request_stages is not None:
+        request_stages.append((operation, stage, seconds))
+
+
+@contextmanager
+def stage_timer(operation: str, stage: str):
+    """
+    Time the enclosed block as one stage of an operation.
+
+    Args:
+        operation (str): Hot path the stage belongs to, e.g. "create_ctest_unit"
+        stage (str): Stage name, e.g. "parse"
+
+    Example:
+        >>> with stage_timer("create_pdf_test", "output"):
+        ...     document = bytes(pdf.output())
+
+    Notes:
+        - Costs two perf_counter calls and one histogram observation
+        - The duration is recorded even if the block raises
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(operation, stage, time.perf_counter() - started)
+
+
+def collect_stages(fn, args: tuple) -> tuple:
+    """
+    Run fn(*args) and return its result together with the stages it timed.
+
+    Used by the worker pool: histograms updated inside a worker process would
+    never reach /metrics, so jobs hand their stage timings back to the caller,
+    which replays them with record_stages.
+
+    Returns:
+        tuple: (result, [(operation, stage, seconds), ...])
+    """
+    stages = []
+    _stage_sink.stages = stages
+    try:
+        return fn(*args), stages
+    finally:
+        _stage_sink.stages = None
+
+
+def record_stages(stages: list[tuple[str, str, float]]) -> None:
+    for operation, stage, seconds in stages:
+        record_stage(operation, stage, seconds)
+
+
+@contextmanager
+def track_request_stages():
+    """
+    Collect the stages timed while handling the current request.
+
+    Yields:
+        list: (operation, stage, seconds) tuples, filled as the request proceeds
+
+    Notes:
+        - Based on a context variable, so concurrent requests on the same event
+          loop keep separate lists; worker pool stages arrive via record_stages
+    """
+    stages = []
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
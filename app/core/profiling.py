@@ -0,0 +1,200 @@
+from app.core.config import PROFILING_SLOW_REQUEST_COUNT
+from app.core.metrics import track_request_stages
+from app.core.request_metrics import route_label
+
+import asyncio
+import cProfile
+from datetime import datetime, timezone
+import heapq
+import hmac
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+
+"""
+Opt-in profiling of single requests.
+
+Provides:
+- ProfilingMiddleware running cProfile for requests that carry a secret header
+  or are picked by a sampling rate, and writing one .prof file per request
+- SlowRequestLog keeping the slowest requests with their stage breakdown
+
+Only installed when PROFILING_ENABLED is set, so a disabled deployment does
+not pay for it at all.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+
+class SlowRequestLog:
+    """
+    The slowest requests seen by this process.
+
+    Args:
+        capacity (int): Number of requests kept
+
+    Notes:
+        - A request that enters the list is logged with its stage breakdown
+        - Kept as a min-heap, so deciding whether a request is slow enough is O(1)
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(0, capacity)
+        self._heap: list[tuple[float, int, dict]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, entry: dict) -> bool:
+        """
+        Offer a finished request.
+
+        Args:
+            seconds (float): Request duration
+            entry (dict): Description of the request, see entries()
+
+        Returns:
+            bool: Whether the request is among the slowest ones
+        """
+        with self._lock:
+            if self.capacity == 0 or (len(self._heap) >= self.capacity and seconds <= self._heap[0][0]):
+                return False
+            self._sequence += 1
+            item = (seconds, self._sequence, entry)
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, item)
+            else:
+                heapq.heapreplace(self._heap, item)
+        logger.warning(
+            "Slow request %s %s took %.3fs; stages: %s",
+            entry["method"], entry["route"], seconds,
+            ", ".join(f"{stage['operation']}/{stage['stage']}={stage['seconds']:.3f}s" for stage in entry["stages"]) or "none",
+        )
+        return True
+
+    def entries(self) -> list[dict]:
+        """
+        Returns:
+            list[dict]: Slowest first, each {
+                "method": str,
+                "route": str,            # route template
+                "status": int,
+                "seconds": float,
+                "finished_at": str,      # ISO 8601, UTC
+                "profile": str | None,   # .prof file if the request was profiled
+                "stages": [{"operation": str, "stage": str, "seconds": float}, ...]
+            }
+        """
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, key=lambda item: item[0], reverse=True)]
+
+
+# Slowest requests of this process, filled by ProfilingMiddleware
+slow_request_log = SlowRequestLog(PROFILING_SLOW_REQUEST_COUNT)
+
+
+def _profile_filename(method: str, route: str, seconds: float, finished_at: datetime) -> str:
+    route_part = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    return f"{finished_at:%Y%m%dT%H%M%S%f}_{method}_{route_part}_{round(seconds * 1000)}ms.prof"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests with cProfile.
+
+    Args:
+        app: Wrapped ASGI application
+        output_dir (str): Directory for the .prof files (created on first use)
+        secret (str): Value of header_name that forces profiling (empty: never forced)
+        header_name (str): Request header carrying the secret
+        sample_rate (float): Fraction of the remaining requests that is profiled
+        slow_log (SlowRequestLog): Receives every request with its stage breakdown
+
+    Notes:
+        - cProfile records the event loop thread, so code of concurrent requests
+          running between two awaits shows up in the profile as well; at most one
+          request is profiled at a time and other candidates are skipped
+        - Work in the worker pool is not part of the profile; its stages are in
+          the stage breakdown of the slow request log
+        - Profiles are written in pstats format, e.g. for snakeviz or
+          python -m pstats <file>
+    """
+
+    def __init__(self, app, output_dir: str, secret: str, header_name: str, sample_rate: float, slow_log: SlowRequestLog):
+        self.app = app
+        self.output_dir = output_dir
+        self.secret = secret.encode("utf-8")
+        self.header_name = header_name.lower().encode("latin-1")
+        self.sample_rate = sample_rate
+        self.slow_log = slow_log
+        self._profiling = threading.Lock()
+
+    def _wants_profile(self, scope) -> bool:
+        if self.secret:
+            for name, value in scope["headers"]:
+                if name == self.header_name and hmac.compare_digest(value, self.secret):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = None
+        if self._wants_profile(scope) and self._profiling.acquire(blocking=False):
+            profiler = cProfile.Profile()
+
+        started = time.perf_counter()
+        try:
+            with track_request_stages() as stages:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    await self.app(scope, receive, send_with_status)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                        self._profiling.release()
+        finally:
+            seconds = time.perf_counter() - started
+            await self._report(scope, status, seconds, stages, profiler)
+
+    async def _report(self, scope, status: int, seconds: float, stages: list, profiler: cProfile.Profile | None) -> None:
+        method, route = scope["method"], route_label(scope)
+        finished_at = datetime.now(timezone.utc)
+        profile_path = None
+        if profiler is not None:
+            profile_path = os.path.join(self.output_dir, _profile_filename(method, route, seconds, finished_at))
+            try:
+                await asyncio.to_thread(self._write_profile, profiler, profile_path)
+                logger.info("Profiled %s %s (%.3fs): %s", method, route, seconds, profile_path)
+            except OSError as e:
+                logger.warning("Could not write profile %s: %s", profile_path, e)
+                profile_path = None
+
+        self.slow_log.add(seconds, {
+            "method": method,
+            "route": route,
+            "status": status,
+            "seconds": seconds,
+            "finished_at": finished_at.isoformat(),
+            "profile": profile_path,
+            "stages": [{"operation": operation, "stage": stage, "seconds": stage_seconds} for operation, stage, stage_seconds in stages],
+        })
+
+    def _write_profile(self, profiler: cProfile.Profile, path: str) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        profiler.dump_stats(path)
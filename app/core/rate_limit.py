@@ -0,0 +1,242 @@
+from app.core.config import (
+    RATE_LIMIT_AUTH_BURST, RATE_LIMIT_AUTH_PER_MINUTE, RATE_LIMIT_ENABLED, RATE_LIMIT_GENERATE_BURST,
+    RATE_LIMIT_GENERATE_PER_MINUTE, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_STUDENT_AUTH_BURST,
+    RATE_LIMIT_STUDENT_AUTH_PER_MINUTE, RATE_LIMIT_TRUST_FORWARDED
+)
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+import secrets
+import threading
+import time
+import uuid
+from fastapi import HTTPException, Request
+from starlette.datastructures import MutableHeaders
+
+
+"""
+In-process token bucket rate limiting for expensive endpoints.
+
+Provides:
+- TokenBucketLimiter holding one bucket per client key
+- rate_limit(limiter): FastAPI dependency that charges the client's IP bucket
+  (and session bucket, if the client has a session) and raises 429 when one is empty;
+  with per_test, the IP bucket is kept per test, so a class behind one NAT
+  entering the code of one test does not lock out other tests
+- RateLimitHeadersMiddleware: adds RateLimit-* headers to limited responses
+
+State lives in the process; with several app workers each enforces its own limits.
+"""
+
+
+# Session key of the random id that identifies a browser session for rate limiting
+SESSION_KEY = "rate_limit_id"
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitDecision:
+    """
+    Outcome of charging a request against its buckets.
+
+    Attributes:
+        allowed (bool): Whether the request may proceed
+        limit (int): Bucket capacity (burst size)
+        remaining (int): Whole tokens left in the fullest-drained bucket
+        reset (int): Seconds until that bucket is full again
+        retry_after (int): Seconds until a rejected request could succeed (0 if allowed)
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class TokenBucketLimiter:
+    """
+    Thread-safe token buckets keyed by client.
+
+    Args:
+        name (str): Label used in stats
+        per_minute (float): Tokens refilled per minute
+        burst (int): Bucket capacity
+        max_keys (int): Buckets kept; the least recently used are dropped beyond this
+
+    Notes:
+        - A dropped bucket starts full the next time its key is seen
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._allowed = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _tokens(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def acquire(self, keys: list[str], cost: float = 1.0) -> RateLimitDecision:
+        """
+        Take cost tokens from every bucket in keys, or from none if any is short.
+
+        Returns:
+            RateLimitDecision: Reported for the bucket with the fewest tokens left
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = {key: self._tokens(key, now) for key in keys}
+            allowed = all(tokens >= cost for tokens in levels.values())
+            if allowed:
+                levels = {key: tokens - cost for key, tokens in levels.items()}
+                self._allowed += 1
+            else:
+                self._rejected += 1
+            for key, tokens in levels.items():
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        lowest = min(levels.values())
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=max(0, math.floor(lowest)),
+            reset=math.ceil((self.burst - lowest) / self.rate) if self.rate else 0,
+            retry_after=0 if allowed else (math.ceil((cost - lowest) / self.rate) if self.rate else 60),
+        )
+
+    def stats(self) -> dict:
+        """
+        Report configuration and counters of this limiter.
+
+        Returns:
+            dict: {
+                "per_minute": float,
+                "burst": int,
+                "keys": int,      # buckets currently tracked
+                "allowed": int,
+                "rejected": int
+            }
+        """
+        with self._lock:
+            return {
+                "per_minute": self.rate * 60,
+                "burst": self.burst,
+                "keys": len(self._buckets),
+                "allowed": self._allowed,
+                "rejected": self._rejected,
+            }
+
+
+# Limiters shared by the routers: NLP/PDF generation, teacher and student code checks
+generate_limiter = TokenBucketLimiter("generate", RATE_LIMIT_GENERATE_PER_MINUTE, RATE_LIMIT_GENERATE_BURST)
+auth_limiter = TokenBucketLimiter("auth", RATE_LIMIT_AUTH_PER_MINUTE, RATE_LIMIT_AUTH_BURST)
+student_auth_limiter = TokenBucketLimiter("student_auth", RATE_LIMIT_STUDENT_AUTH_PER_MINUTE, RATE_LIMIT_STUDENT_AUTH_BURST)
+
+
+def client_ip(request: Request) -> str:
+    """Client address used for the per-IP bucket."""
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _session_id(request: Request) -> str | None:
+    # Only existing sessions get a bucket; creating one here would store a session per cookieless request
+    if not request.session:
+        return None
+    session_id = request.session.get(SESSION_KEY)
+    if session_id is None:
+        session_id = request.session[SESSION_KEY] = secrets.token_urlsafe(12)
+    return session_id
+
+
+def _test_key(request: Request) -> str:
+    # Canonical UUID, so other spellings of the same id share the bucket
+    ctest_id = request.path_params.get("ctest_id", "")
+    try:
+        return str(uuid.UUID(ctest_id))
+    except ValueError:
+        return "invalid"
+
+
+def rate_limit(limiter: TokenBucketLimiter, per_test: bool = False):
+    """
+    Build a dependency that charges one token per request from the client's buckets.
+
+    Args:
+        limiter (TokenBucketLimiter): Buckets to charge
+        per_test (bool): Key the IP bucket on (IP, ctest_id path parameter)
+
+    Usage:
+        @router.post("/create", dependencies=[Depends(rate_limit(generate_limiter))])
+        @router.post("/student_authorize/{ctest_id}", dependencies=[Depends(rate_limit(student_auth_limiter, per_test=True))])
+
+    Raises:
+        HTTPException: 429 with RateLimit-* and Retry-After headers when a bucket is empty
+
+    Notes:
+        - Both the IP and the session bucket must have a token; a client that
+          drops its session cookie is still limited by IP
+        - Clients without a session are limited by IP only, no session is created for them
+        - The decision is kept in request.state.rate_limit for RateLimitHeadersMiddleware
+    """
+    async def dependency(request: Request) -> None:
+        if not RATE_LIMIT_ENABLED:
+            return
+        keys = [f"ip:{client_ip(request)}:{_test_key(request)}" if per_test else f"ip:{client_ip(request)}"]
+        session_id = _session_id(request)
+        if session_id is not None:
+            keys.append(f"session:{session_id}")
+        decision = limiter.acquire(keys)
+        request.state.rate_limit = decision
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Zu viele Anfragen. Bitte versuchen Sie es später erneut.",
+                headers=decision.headers()
+            )
+    return dependency
+
+
+class RateLimitHeadersMiddleware:
+    """ASGI middleware adding the RateLimit-* headers of a rate limited request to its response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                decision = scope.get("state", {}).get("rate_limit")
+                if decision is not None:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in decision.headers().items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,90 @@
+from app.core.metrics import errors, http_request_seconds, http_requests
+
+import time
+from fastapi import Request
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+
+"""
+Per-route request metrics and error counting.
+
+Provides:
+- RequestMetricsMiddleware recording latency and status per route template
+- Exception handlers counting error responses by the exception behind them
+"""
+
+
+def route_label(scope) -> str:
+    """
+    Low-cardinality name of the route that handled a request.
+
+    Returns:
+        str: Route template ("/api/results/{ctest_id}"), the mount path of static
+            files ("/frontend") or "unmatched" for requests no route accepted
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        return scope.get("root_path") or "/"
+    return "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request until its response is complete.
+
+    Notes:
+        - The route is read from the scope after the router matched it, so the
+          label is the path template, never the concrete URL
+        - Unhandled exceptions are counted as errors of their own type with status 500
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            errors.inc(type(e).__name__, 500)
+            raise
+        finally:
+            route = route_label(scope)
+            http_request_seconds.labels(scope["method"], route).observe(time.perf_counter() - started)
+            http_requests.inc(scope["method"], route, status)
+
+
+async def counting_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """
+    Count an HTTPException by the exception it was raised for, then answer as FastAPI would.
+
+    The routers translate exceptions into HTTPExceptions inside their except blocks,
+    so the original exception (ValueError, WorkerPoolBusyError, ...) is exc.__context__.
+    HTTPExceptions raised directly (404, 403, 429) are counted as "HTTPException".
+    """
+    if exc.status_code >= 400:
+        cause = exc.__context__
+        errors.inc(type(cause).__name__ if cause is not None else type(exc).__name__, exc.status_code)
+    return await http_exception_handler(request, exc)
+
+
+async def counting_validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Count a request validation failure, then answer with FastAPI's 422 response."""
+    errors.inc(type(exc).__name__, 422)
+    return await request_validation_exception_handler(request, exc)
@@ -0,0 +1,176 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import secrets
+import threading
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+
+"""
+Server-side sessions.
+
+The session cookie holds only "<session id>.<revision>"; the session dictionary
+(request.session) is kept by a SessionBackend. The revision is incremented on
+every change, so a backend that caches sessions per process can tell from the
+cookie alone whether its copy is current.
+
+Provides:
+- SessionBackend interface and MemorySessionBackend (single process, TTL + LRU bound)
+- ServerSessionMiddleware, a drop-in replacement for Starlette's SessionMiddleware
+"""
+
+
+class SessionBackend(ABC):
+    """
+    Storage interface used by ServerSessionMiddleware.
+
+    Notes:
+        - load() returns a copy; changes only persist through save()
+        - Each access extends the session's lifetime (sliding expiry)
+    """
+
+    @abstractmethod
+    async def load(self, session_id: str, revision: int) -> dict | None:
+        """Session data, None if unknown or expired. revision is the one from the cookie."""
+
+    @abstractmethod
+    async def save(self, session_id: str, data: dict) -> int:
+        """Store data (replacing the previous state) and return the new revision."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Remove the session if it exists."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Backend name and size figures for the diagnostics."""
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    Sessions in a dictionary of this process.
+
+    Args:
+        max_age (int): Seconds a session lives after its last use
+        max_entries (int): Sessions kept; the least recently used are dropped beyond this
+
+    Notes:
+        - Sessions are not shared between worker processes and are lost on restart
+        - Least recently used order equals expiry order, so expired sessions are
+          dropped from the front whenever a session is saved
+    """
+
+    def __init__(self, max_age: int, max_entries: int):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._sessions: OrderedDict[str, tuple[dict, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def load(self, session_id: str, revision: int) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            data, stored_revision, expires_at = entry
+            if expires_at <= now:
+                del self._sessions[session_id]
+                return None
+            self._sessions[session_id] = (data, stored_revision, now + self.max_age)
+            self._sessions.move_to_end(session_id)
+            return dict(data)
+
+    async def save(self, session_id: str, data: dict) -> int:
+        now = time.monotonic()
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            revision = previous[1] + 1 if previous else 1
+            self._sessions[session_id] = (dict(data), revision, now + self.max_age)
+            while self._sessions:
+                _, (_, _, expires_at) = next(iter(self._sessions.items()))
+                if expires_at > now and len(self._sessions) <= self.max_entries:
+                    break
+                self._sessions.popitem(last=False)
+            return revision
+
+    async def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: {"backend": "memory", "sessions": int, "max_entries": int}
+        """
+        with self._lock:
+            return {"backend": "memory", "sessions": len(self._sessions), "max_entries": self.max_entries}
+
+
+def _parse_cookie(value: str | None) -> tuple[str | None, int]:
+    session_id, _, revision = (value or "").partition(".")
+    if not session_id or not revision.isdigit():
+        return None, 0
+    return session_id, int(revision)
+
+
+class ServerSessionMiddleware:
+    """
+    ASGI middleware providing request.session from a SessionBackend.
+
+    Args:
+        app: Wrapped ASGI application
+        backend (SessionBackend): Session storage
+        session_cookie (str): Cookie name
+        max_age (int): Cookie lifetime in seconds, renewed with every response
+        same_site (str): SameSite attribute of the cookie
+        https_only (bool): Add the Secure attribute
+
+    Notes:
+        - Session ids are 192 bit random tokens, so the cookie needs no signature
+        - The backend is only written when the session dictionary changed and
+          the response is not an error (status below 400), so rejected requests,
+          e.g. 429 responses, neither create nor modify a session
+    """
+
+    def __init__(self, app, backend: SessionBackend, session_cookie: str, max_age: int, same_site: str = "lax", https_only: bool = False):
+        self.app = app
+        self.backend = backend
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.security_flags = "httponly; samesite=" + same_site + ("; secure" if https_only else "")
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return f"{self.session_cookie}={value}; path=/; Max-Age={max_age}; {self.security_flags}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id, revision = _parse_cookie(HTTPConnection(scope).cookies.get(self.session_cookie))
+        data = await self.backend.load(session_id, revision) if session_id else None
+        had_cookie = session_id is not None
+        if data is None:
+            session_id, data = None, {}
+        scope["session"] = data
+        initial = dict(data)
+
+        async def send_wrapper(message):
+            nonlocal session_id, revision
+            if message["type"] == "http.response.start":
+                session = scope["session"] if message["status"] < 400 else initial
+                headers = MutableHeaders(scope=message)
+                if session != initial and session:
+                    session_id = session_id or secrets.token_urlsafe(24)
+                    revision = await self.backend.save(session_id, session)
+                    headers.append("Set-Cookie", self._cookie(f"{session_id}.{revision}", self.max_age))
+                elif session:
+                    headers.append("Set-Cookie", self._cookie(f"{session_id}.{revision}", self.max_age))
+                elif had_cookie:
+                    if session_id is not None:
+                        await self.backend.delete(session_id)
+                    headers.append("Set-Cookie", self._cookie("null", 0))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
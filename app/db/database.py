@@ -1,19 +1,68 @@
-from app.core.config import DB_URL
+from app.core.config import (
+    ASYNC_DB_URL, DB_URL, DB_MAX_OVERFLOW, DB_PARTITION_BY_EXPIRY, DB_PARTITION_MONTHS_AHEAD,
+    DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT
+)
+from app.db.partitioning import create_partitioned_ctests, ctests_exists, ensure_partitions, is_partitioned
+from app.db.pool_stats import InstrumentedQueuePool
+from app.db.timed_session import TimedAsyncSession
 
-from sqlalchemy import create_engine
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 
 
-engine = create_engine(DB_URL)
+# Synchronous engine for startup DDL and command line maintenance
+engine = create_engine(DB_URL, pool_pre_ping=DB_POOL_PRE_PING, pool_recycle=DB_POOL_RECYCLE)
 
 # Session factory for creating individual database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Asyncio engine used by all request handlers, pool sized through app.core.config
+async_engine = create_async_engine(
+    ASYNC_DB_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+# Session factory for request scoped AsyncSessions (objects stay usable after commit),
+# queries and commits are timed per route (see app.db.timed_session)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=TimedAsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base class for all ORM models to inherit from
 Base = declarative_base()
 
+# Idempotent DDL for columns/indexes added after a table was first created
+# (create_all never alters existing tables)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE c_tests ADD COLUMN IF NOT EXISTS annotations JSON",
+    "ALTER TABLE c_tests ADD COLUMN IF NOT EXISTS segments JSON",
+    "CREATE INDEX IF NOT EXISTS ix_c_tests_expires_at ON c_tests (expires_at)",
+    # Many submissions per test: drop the former one-submission-per-test constraint
+    "ALTER TABLE submissions DROP CONSTRAINT IF EXISTS submissions_ctest_id_key",
+    "CREATE INDEX IF NOT EXISTS ix_submissions_ctest_id_submitted_at ON submissions (ctest_id, submitted_at, submission_id)",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS percentage DOUBLE PRECISION",
+    "CREATE INDEX IF NOT EXISTS ix_submissions_submitted_at ON submissions (submitted_at, submission_id)",
+    # Key blank_wrong_answers on a hash of the answer instead of the unbounded answer itself
+    "ALTER TABLE blank_wrong_answers ADD COLUMN IF NOT EXISTS answer_hash VARCHAR(32) GENERATED ALWAYS AS (md5(answer)) STORED",
+    "ALTER TABLE blank_wrong_answers DROP CONSTRAINT IF EXISTS blank_wrong_answers_pkey",
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'blank_wrong_answers_answer_hash_pkey') THEN
+            ALTER TABLE blank_wrong_answers ADD CONSTRAINT blank_wrong_answers_answer_hash_pkey
+                PRIMARY KEY (ctest_id, position, answer_hash);
+        END IF;
+    END $$
+    """,
+]
+
 def add_tables():
     """
     Creates all defined database tables in the connected database.
@@ -28,5 +77,19 @@ def add_tables():
     - Safe to call multiple times (won't recreate existing tables)
     - Only creates tables that don't already exist
     - Requires proper database connection configuration
+    - Applies SCHEMA_UPGRADES afterwards so existing tables gain new columns
+    - With DB_PARTITION_BY_EXPIRY, a new c_tests table is created partitioned
+      by month of expires_at (see app.db.partitioning)
     """
-    return Base.metadata.create_all(bind=engine)
+    if DB_PARTITION_BY_EXPIRY:
+        with engine.begin() as connection:
+            if not ctests_exists(connection):
+                create_partitioned_ctests(connection, Base.metadata.tables["c_tests"])
+            if is_partitioned(connection):
+                ensure_partitions(connection, datetime.now(timezone.utc), DB_PARTITION_MONTHS_AHEAD)
+            else:
+                print("c_tests already exists unpartitioned, DB_PARTITION_BY_EXPIRY is ignored")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for statement in SCHEMA_UPGRADES:
+            connection.execute(text(statement))
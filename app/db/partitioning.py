@@ -0,0 +1,105 @@
+from datetime import datetime
+import re
+from sqlalchemy import Connection, text
+
+
+"""
+Optional time-based partitioning of c_tests by expires_at.
+
+When DB_PARTITION_BY_EXPIRY is enabled on a database without a c_tests table,
+c_tests is created as a RANGE partitioned table with one partition per month
+of expires_at (c_tests_pYYYYMM) and a default partition. The reaper then drops
+whole partitions whose month has passed instead of deleting their rows.
+
+Notes:
+    - Existing, unpartitioned c_tests tables are never converted
+    - The primary key of a partitioned table must contain the partition key, so it
+      becomes (ctest_id, expires_at); ctest_id stays unique through uuid4
+"""
+
+
+CTESTS_TABLE = "c_tests"
+PARTITION_PREFIX = f"{CTESTS_TABLE}_p"
+DEFAULT_PARTITION = f"{CTESTS_TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+def _month_start(year: int, month: int) -> datetime:
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+
+def ctests_exists(connection: Connection) -> bool:
+    return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": CTESTS_TABLE}).scalar()
+
+
+def is_partitioned(connection: Connection) -> bool:
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"),
+        {"name": CTESTS_TABLE}
+    ).scalar()
+
+
+def create_partitioned_ctests(connection: Connection, table) -> None:
+    """
+    Create c_tests as a table partitioned by RANGE (expires_at).
+
+    Args:
+        connection (Connection): Connection inside a transaction
+        table (Table): CTest.__table__, source of the column definitions
+    """
+    key_columns = ("ctest_id", "expires_at")
+    columns = ", ".join(
+        f"{column.name} {column.type.compile(dialect=connection.dialect)}"
+        + (" NOT NULL" if column.name in key_columns or not column.nullable else "")
+        for column in table.columns
+    )
+    connection.execute(text(
+        f"CREATE TABLE {CTESTS_TABLE} ({columns}, PRIMARY KEY ({', '.join(key_columns)})) "
+        f"PARTITION BY RANGE (expires_at)"
+    ))
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {CTESTS_TABLE} DEFAULT"))
+
+
+def ensure_partitions(connection: Connection, now: datetime, months_ahead: int) -> list[str]:
+    """
+    Create the monthly partitions from the current month up to months_ahead months later.
+
+    Returns:
+        list[str]: Names of the partitions that were created
+    """
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _month_start(now.year, now.month + offset)
+        end = _month_start(start.year, start.month + 1)
+        name = f"{PARTITION_PREFIX}{start:%Y%m}"
+        if connection.execute(text("SELECT to_regclass(:name) IS NULL"), {"name": name}).scalar():
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {CTESTS_TABLE} "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+            ))
+            created.append(name)
+    return created
+
+
+def expired_partitions(connection: Connection, now: datetime) -> list[str]:
+    """
+    Names of the monthly partitions that only hold expired tests, oldest first.
+
+    A partition qualifies once the month after it has started (in UTC).
+
+    Args:
+        now (datetime): Current time (UTC)
+    """
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:name)"
+    ), {"name": CTESTS_TABLE}).scalars().all()
+
+    expired = []
+    for name in sorted(names):
+        match = _PARTITION_NAME.match(name)
+        if match and _month_start(int(match.group(1)), int(match.group(2)) + 1) <= now.replace(tzinfo=None):
+            expired.append(name)
+    return expired
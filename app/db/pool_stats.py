@@ -0,0 +1,80 @@
+from app.core.metrics import Histogram
+
+import logging
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+"""
+Connection pool instrumentation for the async engine.
+
+Provides:
+- Acquire latency histogram (every checkout, including pre-ping)
+- Wait time histogram (checkouts that found the pool exhausted)
+- Timeout counter and a log line with the pool state on every timeout
+"""
+
+
+logger = logging.getLogger(__name__)
+
+POOL_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStatistics:
+    """Cumulative checkout timings shared by all InstrumentedQueuePool instances."""
+
+    def __init__(self):
+        self.acquire_latency = Histogram(POOL_LATENCY_BUCKETS)
+        self.wait_time = Histogram(POOL_LATENCY_BUCKETS)
+        self.timeouts = 0
+
+
+pool_statistics = PoolStatistics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each connection checkout takes."""
+
+    def connect(self):
+        saturated = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_statistics.timeouts += 1
+            logger.warning("Database pool checkout timed out: %s", self.status())
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            pool_statistics.acquire_latency.observe(elapsed)
+            if saturated:
+                pool_statistics.wait_time.observe(elapsed)
+
+
+def pool_status(pool: InstrumentedQueuePool) -> dict:
+    """
+    Report the live state of a pool together with the cumulative timings.
+
+    Returns:
+        dict: {
+            "size": int,          # configured pool size
+            "max_overflow": int,
+            "checked_in": int,    # idle connections
+            "checked_out": int,   # connections in use
+            "overflow": int,      # connections opened beyond size (negative while the pool fills up)
+            "timeouts": int,
+            "acquire_seconds": dict,  # histogram snapshot
+            "wait_seconds": dict      # histogram snapshot, only checkouts on an exhausted pool
+        }
+    """
+    return {
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "timeouts": pool_statistics.timeouts,
+        "acquire_seconds": pool_statistics.acquire_latency.snapshot(),
+        "wait_seconds": pool_statistics.wait_time.snapshot(),
+    }
@@ -0,0 +1,162 @@
+from app.models.ctest import CTest
+from app.models.submission import Submission
+
+from datetime import datetime, timezone
+import uuid
+from sqlalchemy import and_, insert, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer
+
+
+"""
+Purpose-built queries on c_tests and submissions used by the routers and services.
+Nothing here commits; the caller owns the transaction.
+
+Each function fetches only the columns its callers read. The large text/JSON
+columns of CTest (original_text, ctest_text, correct_answers, segments,
+annotations) are deferred on the model and raise when accessed without being
+requested here, so a handler cannot load them by accident.
+"""
+
+
+# Lock modes accepted by get_ctest
+LOCK_MODES = {None, "update", "key_share"}
+
+
+def parse_id(value: str | uuid.UUID | None) -> uuid.UUID | None:
+    """Parse a test or submission id from a URL, None if it is not a UUID."""
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _active(now: datetime | None = None):
+    return CTest.expires_at > (now or datetime.now(timezone.utc))
+
+
+async def get_access_codes(db: AsyncSession, ctest_id: str | uuid.UUID) -> Row | None:
+    """
+    Access codes of a test for code checks.
+
+    Returns:
+        Row | None: (student_code, teacher_code, expires_at), None for an unknown or invalid id
+    """
+    test_id = parse_id(ctest_id)
+    if test_id is None:
+        return None
+    return (await db.execute(
+        select(CTest.student_code, CTest.teacher_code, CTest.expires_at).filter(CTest.ctest_id == test_id)
+    )).first()
+
+
+async def get_ctest(
+    db: AsyncSession,
+    ctest_id: str | uuid.UUID,
+    *columns,
+    active: bool = False,
+    lock: str | None = None
+) -> CTest | None:
+    """
+    Load a test with its small columns plus the requested large ones.
+
+    Args:
+        db (AsyncSession): Active database session
+        ctest_id (str | UUID): Test identifier
+        *columns: Deferred CTest columns to load as well, e.g. CTest.correct_answers
+        active (bool): Only return the test if it has not expired
+        lock (str | None): "update" (FOR UPDATE) or "key_share" (FOR KEY SHARE)
+
+    Returns:
+        CTest | None: None for an unknown, invalid or (with active) expired id
+    """
+    if lock not in LOCK_MODES:
+        raise ValueError(f"Invalid lock mode '{lock}'. Must be one of {sorted(mode for mode in LOCK_MODES if mode)}.")
+    test_id = parse_id(ctest_id)
+    if test_id is None:
+        return None
+    statement = select(CTest).filter(CTest.ctest_id == test_id).options(*(undefer(column) for column in columns))
+    if active:
+        statement = statement.filter(_active())
+    if lock == "update":
+        statement = statement.with_for_update()
+    elif lock == "key_share":
+        statement = statement.with_for_update(read=True, key_share=True)
+    return (await db.execute(statement)).scalars().first()
+
+
+async def get_answer_key(db: AsyncSession, ctest_id: str | uuid.UUID) -> dict | None:
+    """Answer key (correct_answers) of a test, None for an unknown or invalid id."""
+    test_id = parse_id(ctest_id)
+    if test_id is None:
+        return None
+    return (await db.execute(select(CTest.correct_answers).filter(CTest.ctest_id == test_id))).scalar()
+
+
+async def get_submission_context(
+    db: AsyncSession,
+    ctest_id: str | uuid.UUID,
+    previous_submission_id: str | None
+) -> tuple[CTest | None, Submission | None]:
+    """
+    Everything a new submission is checked against, in one query.
+
+    Args:
+        db (AsyncSession): Session of the submission
+        ctest_id (str | UUID): Test being submitted
+        previous_submission_id (str | None): Submission this session already made, if any
+
+    Returns:
+        tuple: (test, previous_submission)
+            - test: With correct_answers loaded and locked FOR KEY SHARE, None if unknown
+            - previous_submission: With score_data loaded, None if there is none for this test
+
+    Notes:
+        - FOR KEY SHARE lets concurrent submissions proceed but makes an
+          answer key amendment or item statistics rebuild of the test wait
+    """
+    test_id = parse_id(ctest_id)
+    if test_id is None:
+        return None, None
+    previous_id = parse_id(previous_submission_id) if previous_submission_id else None
+    row = (await db.execute(
+        select(CTest, Submission)
+        .options(undefer(CTest.correct_answers), load_only(Submission.submission_id, Submission.score_data))
+        .outerjoin(Submission, and_(Submission.ctest_id == CTest.ctest_id, Submission.submission_id == previous_id))
+        .filter(CTest.ctest_id == test_id)
+        .with_for_update(read=True, key_share=True, of=CTest)
+    )).first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+async def get_submission(db: AsyncSession, ctest_id: str | uuid.UUID, submission_id: str | uuid.UUID) -> Submission | None:
+    """A submission of the given test with all its columns, None if there is no such pair."""
+    test_id, entry_id = parse_id(ctest_id), parse_id(submission_id)
+    if test_id is None or entry_id is None:
+        return None
+    return (await db.execute(
+        select(Submission).filter(Submission.submission_id == entry_id, Submission.ctest_id == test_id)
+    )).scalars().first()
+
+
+def add_ctest(db: AsyncSession, values: dict) -> CTest:
+    """Stage a new test in the session (committed by the caller); its ctest_id is set on flush."""
+    entry = CTest(**values)
+    db.add(entry)
+    return entry
+
+
+async def add_ctests(db: AsyncSession, rows: list[dict]) -> None:
+    """Insert many tests (each with its ctest_id) in one statement, without committing."""
+    if rows:
+        await db.execute(insert(CTest), rows)
+
+
+def add_submission(db: AsyncSession, values: dict) -> Submission:
+    """Stage a new submission in the session (committed by the caller)."""
+    entry = Submission(**values)
+    db.add(entry)
+    return entry
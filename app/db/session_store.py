@@ -0,0 +1,121 @@
+from app.core.cache import ByteBudgetLRUCache
+from app.core.config import SESSION_BACKEND, SESSION_MAX_AGE_SECONDS, SESSION_MAX_ENTRIES
+from app.core.sessions import MemorySessionBackend, SessionBackend
+from app.db.database import AsyncSessionLocal
+from app.models.http_session import HttpSession
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+
+"""
+Session backend on the http_sessions table, shared by all app workers,
+and selection of the configured backend.
+"""
+
+
+SESSION_BACKENDS = {"memory", "sql"}
+
+
+class SqlSessionBackend(SessionBackend):
+    """
+    Sessions in the http_sessions table with a per-process read cache.
+
+    Args:
+        max_age (int): Seconds a session lives after its last use
+        max_cached (int): Sessions cached in this process
+
+    Notes:
+        - A cached session is used while its revision is at least the one in the
+          cookie; a newer cookie revision means another worker changed it, and
+          the row is read again. Authorization checks are thus served from memory.
+        - expires_at is only written when less than half of max_age is left
+    """
+
+    def __init__(self, max_age: int, max_cached: int):
+        self.max_age = max_age
+        self._cache = ByteBudgetLRUCache(max_cached, lambda entry: 1)
+        self._reads = 0
+        self._writes = 0
+
+    def _remember(self, session_id: str, data: dict, revision: int, expires_at: datetime) -> None:
+        self._cache.put(session_id, (data, revision, expires_at), expires_at=expires_at.timestamp())
+
+    async def load(self, session_id: str, revision: int) -> dict | None:
+        now = datetime.now(timezone.utc)
+        entry = self._cache.get(session_id)
+        if entry is None or entry[1] < revision:
+            self._reads += 1
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(
+                    select(HttpSession.data, HttpSession.revision, HttpSession.expires_at)
+                    .filter(HttpSession.session_id == session_id, HttpSession.expires_at > now)
+                )).first()
+            if row is None:
+                return None
+            entry = tuple(row)
+            self._remember(session_id, *entry)
+
+        data, stored_revision, expires_at = entry
+        if expires_at - now < timedelta(seconds=self.max_age / 2):
+            expires_at = now + timedelta(seconds=self.max_age)
+            self._writes += 1
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(HttpSession).filter(HttpSession.session_id == session_id).values(expires_at=expires_at)
+                )
+                await db.commit()
+            self._remember(session_id, data, stored_revision, expires_at)
+        return dict(data)
+
+    async def save(self, session_id: str, data: dict) -> int:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.max_age)
+        statement = insert(HttpSession).values(session_id=session_id, data=data, revision=1, expires_at=expires_at)
+        self._writes += 1
+        async with AsyncSessionLocal() as db:
+            revision = (await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[HttpSession.session_id],
+                    set_={
+                        "data": statement.excluded.data,
+                        "revision": HttpSession.revision + 1,
+                        "expires_at": statement.excluded.expires_at,
+                    }
+                ).returning(HttpSession.revision)
+            )).scalar()
+            await db.commit()
+        self._remember(session_id, dict(data), revision, expires_at)
+        return revision
+
+    async def delete(self, session_id: str) -> None:
+        self._cache.pop(session_id)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(HttpSession).filter(HttpSession.session_id == session_id))
+            await db.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: {"backend": "sql", "reads": int, "writes": int, "cache": dict}
+                  (database reads/writes of this process, cache stats)
+        """
+        return {"backend": "sql", "reads": self._reads, "writes": self._writes, "cache": self._cache.stats()}
+
+
+def create_session_backend(name: str = SESSION_BACKEND) -> SessionBackend:
+    """
+    Instantiate the session backend selected by SESSION_BACKEND.
+
+    Raises:
+        ValueError: For an unknown backend name
+    """
+    if name == "memory":
+        return MemorySessionBackend(SESSION_MAX_AGE_SECONDS, SESSION_MAX_ENTRIES)
+    if name == "sql":
+        return SqlSessionBackend(SESSION_MAX_AGE_SECONDS, SESSION_MAX_ENTRIES)
+    raise ValueError(f"Invalid session backend '{name}'. Must be one of {sorted(SESSION_BACKENDS)}.")
+
+
+# Backend used by ServerSessionMiddleware in app.main
+session_backend = create_session_backend()
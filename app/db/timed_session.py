@@ -0,0 +1,33 @@
+from app.core.metrics import stage_timer
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+"""AsyncSession that reports query and commit durations to the stage histogram."""
+
+
+class TimedAsyncSession(AsyncSession):
+    """
+    AsyncSession whose execute/scalar/commit calls are timed with stage_timer.
+
+    Notes:
+        - The operation label is taken from session.info["operation"], which get_db
+          sets to the route template; sessions opened elsewhere report "background"
+        - Timings include waiting for a pooled connection on the first statement
+        - scalars() goes through execute() and is timed once; stream() is not timed
+    """
+
+    def _operation(self) -> str:
+        return self.info.get("operation", "background")
+
+    async def execute(self, *args, **kwargs):
+        with stage_timer(self._operation(), "db_query"):
+            return await super().execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        with stage_timer(self._operation(), "db_query"):
+            return await super().scalar(*args, **kwargs)
+
+    async def commit(self) -> None:
+        with stage_timer(self._operation(), "db_commit"):
+            await super().commit()
@@ -1,14 +1,28 @@
-from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from app.core.config import INTERNAL_API_TOKEN
+from app.db.database import AsyncSessionLocal
+from fastapi import Header, HTTPException, Request
 from fastapi.templating import Jinja2Templates
+import hmac
 import os
+from typing import Optional
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        # Label for the db_query/db_commit stage timings, the route template keeps the label set small
+        route = request.scope.get("route")
+        db.info["operation"] = getattr(route, "path", "unmatched")
         yield db
-    finally:
-        db.close()
+
+async def require_internal_token(authorization: Optional[str] = Header(default=None)) -> None:
+    """
+    Admit only requests carrying "Authorization: Bearer <INTERNAL_API_TOKEN>".
+
+    Raises:
+        HTTPException: 403 if the token is missing or wrong, or no token is configured
+    """
+    token = authorization.removeprefix("Bearer ").strip() if authorization else ""
+    if not INTERNAL_API_TOKEN or not hmac.compare_digest(token.encode(), INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Not authorized")
 
 # Template engine instance configured to look in 'frontend/templates' directory
 templates = Jinja2Templates(directory=os.path.join(os.getcwd(), "frontend", "templates"))
\ No newline at end of file
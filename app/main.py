@@ -1,17 +1,35 @@
+from app.core.config import (
+    PROFILING_DIR, PROFILING_ENABLED, PROFILING_HEADER, PROFILING_SAMPLE_RATE, PROFILING_SECRET,
+    REAPER_INTERVAL_SECONDS, SESSION_COOKIE_NAME, SESSION_MAX_AGE_SECONDS
+)
+from app.core.profiling import ProfilingMiddleware, slow_request_log
+from app.core.rate_limit import RateLimitHeadersMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware, counting_http_exception_handler, counting_validation_exception_handler
+from app.core.sessions import ServerSessionMiddleware
 from app.db.database import add_tables
+from app.db.session_store import session_backend
 from app.routers.ctest_pdf_generator import pdf_generator_router
 from app.routers.ctest_unit_generator import ctest_generator_router
 from app.routers.ctest_unit_submission import submission_router
 from app.routers.ctest_unit_form import form_router
 from app.routers.ctest_unit_result import results_router
 from app.routers.ctest_mainpage import mainpage_router
+from app.routers.ctest_internal import internal_router
+from app.routers.ctest_export import export_router
+from app.routers.ctest_metrics import metrics_router
+from app.services.ctest_pdf_generator_service import load_fonts
+from app.services.maintenance_service import run_reaper_periodically
+from app.services.nlp_pipeline_service import load_pipelines
+from app.services.worker_pool_service import worker_pool
 from app.dependencies import templates
 
 from fastapi.responses import HTMLResponse
 from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -48,14 +66,35 @@ app.add_middleware(
 )
 
 
+app.add_middleware(RateLimitHeadersMiddleware)
+
+
 app.add_middleware(
-    SessionMiddleware,
-    secret_key=os.getenv("SESSION_SECRET"), 
-    session_cookie="ctest_session",  # Cookie name for session tracking
-    max_age=3600  # Session expires after 1 hour (in seconds)
+    ServerSessionMiddleware,
+    backend=session_backend,  # SESSION_BACKEND: "memory" or "sql"
+    session_cookie=SESSION_COOKIE_NAME,  # Cookie holds only the session id
+    max_age=SESSION_MAX_AGE_SECONDS  # Session expires 1 hour after last use by default
 )
 
 
+# Added last so it wraps everything else, including session loading
+app.add_middleware(RequestMetricsMiddleware)
+
+
+if PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=PROFILING_DIR,  # One .prof file per profiled request
+        secret=PROFILING_SECRET,  # Requests with "<PROFILING_HEADER>: <secret>" are always profiled
+        header_name=PROFILING_HEADER,
+        sample_rate=PROFILING_SAMPLE_RATE,  # Fraction of all other requests
+        slow_log=slow_request_log
+    )
+
+app.add_exception_handler(StarletteHTTPException, counting_http_exception_handler)
+app.add_exception_handler(RequestValidationError, counting_validation_exception_handler)
+
+
 app.mount(
     "/frontend",
     StaticFiles(directory=os.path.join(os.getcwd(), "frontend")),
@@ -88,6 +127,20 @@ app.include_router(
     tags=["Teacher Interface"],
     prefix="/api" 
 )
+app.include_router(
+    export_router,
+    tags=["Export"],
+    prefix="/api"
+)
+app.include_router(
+    internal_router,
+    tags=["Diagnostics"],
+    prefix="/api"
+)
+app.include_router(
+    metrics_router,
+    tags=["Diagnostics"]
+)
 app.include_router(
     mainpage_router,
     tags=["Homepage"]
@@ -97,4 +150,19 @@ app.include_router(
 @app.on_event("startup")
 async def on_startup():
     print("Creating tables if they do not exist")
-    add_tables()
\ No newline at end of file
+    add_tables()
+    print("Loading NLP pipeline")
+    load_pipelines()
+    print("Loading PDF fonts")
+    load_fonts()
+    if REAPER_INTERVAL_SECONDS > 0:
+        print(f"Deleting expired tests every {REAPER_INTERVAL_SECONDS} seconds")
+        app.state.reaper_task = asyncio.create_task(run_reaper_periodically(REAPER_INTERVAL_SECONDS))
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    reaper_task = getattr(app.state, "reaper_task", None)
+    if reaper_task is not None:
+        reaper_task.cancel()
+    worker_pool.shutdown()
\ No newline at end of file
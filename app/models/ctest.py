@@ -3,6 +3,7 @@ from app.db import database
 from datetime import datetime, timezone, timedelta
 import uuid
 import sqlalchemy
+from sqlalchemy.orm import deferred
 
 
 
@@ -16,7 +17,8 @@ class CTest(database.Base):
         ctest_text (str): The test text with blanks
         original_text (str): Unmodified source text
         created_at (DateTime): Creation timestamp (UTC)
-        expires_at (DateTime): Automatic expiration (7 days after creation)
+        expires_at (DateTime): Automatic expiration (7 days after creation), indexed;
+            expired tests are deleted by maintenance_service.reap_expired_tests
         correct_answers (JSON): {
             position: {
                 "answer": str,  # Correct word
@@ -26,17 +28,31 @@ class CTest(database.Base):
         submissions (ARRAY[UUID]): List of related submission IDs
         student_code (str): 6-digit access code for students
         teacher_code (str): 6-digit access code for teachers
+        segments (JSON): The test as alternating text runs and blanks,
+            e.g. ["Der Hu", [0, 2], " läuft ", ...] (see select_blanks);
+            NULL for tests created before segments were stored
+        annotations (JSON): Compact token/sentence analysis of original_text
+            (see text_analysis_service.analysis_to_json), used to re-blank
+            the test without parsing again
 
     Relationships:
         - Has many Submissions (one-to-many)
+
+    Notes:
+        - ctest_text, original_text, correct_answers, submissions, segments and
+          annotations are deferred: loading CTest fetches only ids, codes and
+          timestamps, the rest must be requested (see app.db.repository.get_ctest)
+          and raises if accessed without
     """
     __tablename__ = "c_tests"
     ctest_id = sqlalchemy.Column("ctest_id", sqlalchemy.Uuid(as_uuid=True), primary_key=True, unique=True, default=uuid.uuid4)
-    ctest_text = sqlalchemy.Column("ctest_text",sqlalchemy.String, nullable=False)
-    original_text = sqlalchemy.Column("original_text",sqlalchemy.String, nullable=False)
+    ctest_text = deferred(sqlalchemy.Column("ctest_text",sqlalchemy.String, nullable=False), raiseload=True)
+    original_text = deferred(sqlalchemy.Column("original_text",sqlalchemy.String, nullable=False), raiseload=True)
     created_at = sqlalchemy.Column("created_at",sqlalchemy.DateTime(timezone=True), default=datetime.now(timezone.utc))
-    expires_at  = sqlalchemy.Column("expires_at",sqlalchemy.DateTime(timezone=True), default=datetime.now(timezone.utc)+timedelta(days=7))
-    correct_answers = sqlalchemy.Column("correct_answers", sqlalchemy.JSON,nullable=False)
-    submissions = sqlalchemy.Column("submissions", sqlalchemy.ARRAY(sqlalchemy.Uuid(as_uuid=True), zero_indexes=True), default=[])
+    expires_at  = sqlalchemy.Column("expires_at",sqlalchemy.DateTime(timezone=True), default=datetime.now(timezone.utc)+timedelta(days=7), index=True)
+    correct_answers = deferred(sqlalchemy.Column("correct_answers", sqlalchemy.JSON,nullable=False), raiseload=True)
+    submissions = deferred(sqlalchemy.Column("submissions", sqlalchemy.ARRAY(sqlalchemy.Uuid(as_uuid=True), zero_indexes=True), default=[]), raiseload=True)
     student_code = sqlalchemy.Column(sqlalchemy.String(6), nullable=False)
-    teacher_code = sqlalchemy.Column(sqlalchemy.String(6), nullable=False)
\ No newline at end of file
+    teacher_code = sqlalchemy.Column(sqlalchemy.String(6), nullable=False)
+    segments = deferred(sqlalchemy.Column("segments", sqlalchemy.JSON, nullable=True), raiseload=True)
+    annotations = deferred(sqlalchemy.Column("annotations", sqlalchemy.JSON, nullable=True), raiseload=True)
\ No newline at end of file
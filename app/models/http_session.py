@@ -0,0 +1,23 @@
+from app.db import database
+
+import sqlalchemy
+
+
+
+
+class HttpSession(database.Base):
+    """
+    Server-side session data for the "sql" session backend.
+
+    Attributes:
+        session_id (str): Opaque id sent in the session cookie (primary key)
+        data (JSON): Session dictionary, e.g. {"/api/res_auth_<uuid>": true}
+        revision (int): Incremented on every change, also carried in the cookie
+        expires_at (DateTime): End of the session unless it is used again, indexed;
+            expired rows are deleted by maintenance_service.reap_expired_tests
+    """
+    __tablename__ = "http_sessions"
+    session_id = sqlalchemy.Column("session_id", sqlalchemy.String(64), primary_key=True)
+    data = sqlalchemy.Column("data", sqlalchemy.JSON, nullable=False)
+    revision = sqlalchemy.Column("revision", sqlalchemy.Integer, nullable=False, default=1)
+    expires_at = sqlalchemy.Column("expires_at", sqlalchemy.DateTime(timezone=True), nullable=False, index=True)
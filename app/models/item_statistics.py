@@ -0,0 +1,55 @@
+from app.db import database
+
+import sqlalchemy
+
+
+
+
+
+class BlankStatistic(database.Base):
+    """
+    Running per-blank totals over all submissions of a C-Test.
+
+    Attributes:
+        ctest_id (UUID): Test the blank belongs to (primary key part)
+        position (int): Blank position as used in correct_answers (primary key part)
+        attempts (int): Submissions that answered this blank
+        correct (int): Of those, answers that were correct
+        hinted (int): Submissions that revealed at least one letter of this blank
+
+    Notes:
+        - Updated by upsert in the same transaction as each submission
+          (see item_statistics_service.record_submission)
+    """
+    __tablename__ = "blank_statistics"
+    ctest_id = sqlalchemy.Column("ctest_id", sqlalchemy.Uuid(as_uuid=True), primary_key=True)
+    position = sqlalchemy.Column("position", sqlalchemy.Integer, primary_key=True)
+    attempts = sqlalchemy.Column("attempts", sqlalchemy.Integer, nullable=False, default=0)
+    correct = sqlalchemy.Column("correct", sqlalchemy.Integer, nullable=False, default=0)
+    hinted = sqlalchemy.Column("hinted", sqlalchemy.Integer, nullable=False, default=0)
+
+
+class BlankWrongAnswer(database.Base):
+    """
+    How often a specific wrong answer was given for a blank.
+
+    Attributes:
+        ctest_id (UUID): Test the blank belongs to (primary key part)
+        position (int): Blank position (primary key part)
+        answer (str): Normalized wrong answer, empty for an unanswered blank
+        answer_hash (str): md5 of answer, generated by the database (primary key part)
+        count (int): Submissions that gave this answer
+
+    Notes:
+        - Keyed on the fixed-size hash rather than the answer itself, so answers
+          of any length fit into the primary key index
+    """
+    __tablename__ = "blank_wrong_answers"
+    __table_args__ = (
+        sqlalchemy.PrimaryKeyConstraint("ctest_id", "position", "answer_hash", name="blank_wrong_answers_answer_hash_pkey"),
+    )
+    ctest_id = sqlalchemy.Column("ctest_id", sqlalchemy.Uuid(as_uuid=True))
+    position = sqlalchemy.Column("position", sqlalchemy.Integer)
+    answer = sqlalchemy.Column("answer", sqlalchemy.String, nullable=False)
+    answer_hash = sqlalchemy.Column("answer_hash", sqlalchemy.String(32), sqlalchemy.Computed("md5(answer)", persisted=True))
+    count = sqlalchemy.Column("count", sqlalchemy.Integer, nullable=False, default=0)
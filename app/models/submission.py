@@ -34,15 +34,28 @@ class Submission(database.Base):
             }
         }
         submitted_at (DateTime): Submission timestamp (UTC)
+        percentage (Float): Copy of score_data["percentage"], so statistics
+            and listings never read the JSON columns; NULL for submissions
+            stored before the column existed until backfill-percentages ran
 
     Relationships:
-        - Belongs to one CTest (one-to-one)
+        - Belongs to one CTest (many submissions per test)
+
+    Indexes:
+        - (ctest_id, submitted_at, submission_id): submissions of a test in
+          listing order, used for keyset pagination
+        - (submitted_at, submission_id): date range exports across tests
     """
     __tablename__ = "submissions"
+    __table_args__ = (
+        sqlalchemy.Index("ix_submissions_ctest_id_submitted_at", "ctest_id", "submitted_at", "submission_id"),
+        sqlalchemy.Index("ix_submissions_submitted_at", "submitted_at", "submission_id"),
+    )
     submission_id = sqlalchemy.Column("submission_id", sqlalchemy.Uuid(as_uuid=True), unique=True, primary_key=True, default=uuid.uuid4)
-    ctest_id = sqlalchemy.Column("ctest_id", sqlalchemy.Uuid(as_uuid=True), unique=True, nullable=False)
+    ctest_id = sqlalchemy.Column("ctest_id", sqlalchemy.Uuid(as_uuid=True), nullable=False)
     student_answers = sqlalchemy.Column("student_answers", sqlalchemy.JSON, nullable=False)
     given_hints  = sqlalchemy.Column("given_hints", sqlalchemy.JSON, nullable=False) 
     score_data = sqlalchemy.Column("score_data", sqlalchemy.JSON, nullable=False)
     submitted_at = sqlalchemy.Column("submitted_at",sqlalchemy.DateTime(timezone=True), default=datetime.now(timezone.utc))
+    percentage = sqlalchemy.Column("percentage", sqlalchemy.Float, nullable=True)
     
\ No newline at end of file
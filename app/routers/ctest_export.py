@@ -0,0 +1,118 @@
+from app.core.config import EXPORT_API_TOKEN
+from app.core.rate_limit import auth_limiter, rate_limit
+from app.db.repository import get_ctest
+from app.models.ctest import CTest
+from app.dependencies import get_db
+from app.services.results_export_service import (
+    EXPORT_FORMATS, export_results_between, export_test_results, max_blank_count
+)
+
+from datetime import datetime, timezone
+import hmac
+from typing import Literal
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+"""FastAPI router for streaming exports of submissions (CSV / JSON Lines)."""
+
+
+export_router = APIRouter()
+
+
+def _attachment(filename: str) -> dict[str, str]:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+@export_router.get("/results/{ctest_id}/export", dependencies=[Depends(rate_limit(auth_limiter))])
+async def export_test(
+    request: Request,
+    ctest_id: str,
+    format: Literal["csv", "jsonl"] = "csv",
+    x_teacher_code: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """
+    Export all submissions of one test.
+
+    Args:
+        request (Request): FastAPI request object
+        ctest_id (str): Unique identifier of the C-Test
+        format (str): "csv" (one answer and correctness column per blank) or "jsonl"
+        x_teacher_code (str | None): Teacher code, for clients without a results session
+        db (AsyncSession): SQLAlchemy database session
+
+    Returns:
+        StreamingResponse: Export as attachment, oldest submission first
+
+    Raises:
+        HTTPException: 429 when the client's access code checks are exhausted (auth_limiter,
+                         like /results_authorize, since X-Teacher-Code is checked here as well)
+                     403 without results authorization or a valid X-Teacher-Code header,
+                         also if the test does not exist (existence is not revealed)
+                     404 if an authorized test no longer exists
+                     500 for server errors
+    """
+    try:
+        db_test = await get_ctest(db, ctest_id, CTest.correct_answers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Export service error: " + str(e))
+
+    authorized = request.session.get(f"/api/res_auth_{ctest_id}") or (
+        db_test is not None and x_teacher_code is not None
+        and hmac.compare_digest(x_teacher_code.encode(), db_test.teacher_code.encode())
+    )
+    if not authorized:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if db_test is None:
+        raise HTTPException(status_code=404, detail="Test not found")
+
+    return StreamingResponse(
+        export_test_results(db_test.ctest_id, len(db_test.correct_answers), format),
+        media_type=EXPORT_FORMATS[format],
+        headers=_attachment(f"ctest_{ctest_id}.{format}")
+    )
+
+
+@export_router.get("/export")
+async def export_range(
+    start: datetime,
+    end: datetime,
+    format: Literal["csv", "jsonl"] = "csv",
+    authorization: str | None = Header(default=None)
+) -> StreamingResponse:
+    """
+    Export the submissions of all tests within a time range.
+
+    Args:
+        start (datetime): Inclusive lower bound of the submission time (UTC if no offset is given)
+        end (datetime): Exclusive upper bound of the submission time
+        format (str): "csv" or "jsonl"; CSV has as many blank columns as the largest test in the range
+        authorization (str | None): "Bearer <EXPORT_API_TOKEN>"
+
+    Returns:
+        StreamingResponse: Export as attachment, ordered by submission time
+
+    Raises:
+        HTTPException: 403 if the token is missing or wrong, or no token is configured
+                     400 if start is not before end
+                     500 for server errors
+    """
+    token = authorization.removeprefix("Bearer ").strip() if authorization else ""
+    if not EXPORT_API_TOKEN or not hmac.compare_digest(token.encode(), EXPORT_API_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    start, end = (bound if bound.tzinfo else bound.replace(tzinfo=timezone.utc) for bound in (start, end))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    try:
+        blank_count = await max_blank_count(start, end) if format == "csv" else 0
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Export service error: " + str(e))
+
+    return StreamingResponse(
+        export_results_between(start, end, blank_count, format),
+        media_type=EXPORT_FORMATS[format],
+        headers=_attachment(f"ctest_results_{start:%Y%m%d}_{end:%Y%m%d}.{format}")
+    )
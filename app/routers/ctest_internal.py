@@ -0,0 +1,116 @@
+from app.core.config import PROFILING_ENABLED
+from app.core.profiling import slow_request_log
+from app.core.rate_limit import auth_limiter, generate_limiter, student_auth_limiter
+from app.db.database import async_engine
+from app.db.pool_stats import pool_status
+from app.db.session_store import session_backend
+from app.dependencies import require_internal_token
+from app.services.ctest_cache_service import ctest_cache, form_cache
+from app.services.ctest_pdf_generator_service import pdf_cache
+from app.services import maintenance_service
+from app.services.nlp_pipeline_service import pipeline_info
+from app.services.worker_pool_service import worker_pool
+from app.services.text_analysis_service import analysis_cache
+
+from fastapi import APIRouter, Depends
+
+
+"""Internal diagnostics router exposing runtime state of the service."""
+
+
+internal_router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+
+@internal_router.get("/internal/nlp")
+async def get_nlp_info() -> dict:
+    """
+    Report the state of the shared spaCy pipeline.
+
+    Returns:
+        dict: Model name, enabled/disabled/excluded components and load time
+    """
+    return pipeline_info()
+
+
+@internal_router.get("/internal/workers")
+async def get_worker_stats() -> dict:
+    """
+    Report load of the generation/rendering worker pool.
+
+    Returns:
+        dict: Queue depth, in-flight jobs, rejections and wait/run time histograms
+    """
+    return worker_pool.stats()
+
+
+@internal_router.get("/internal/caches")
+async def get_cache_stats() -> dict:
+    """
+    Report occupancy and hit/miss/eviction counters of the in-process caches.
+
+    Returns:
+        dict: {cache_name: stats}
+    """
+    return {
+        "analysis": analysis_cache.stats(),
+        "pdf": pdf_cache.stats(),
+        "ctest": ctest_cache.stats(),
+        "form": form_cache.stats(),
+    }
+
+
+@internal_router.get("/internal/db_pool")
+async def get_db_pool_stats() -> dict:
+    """
+    Report the async engine's connection pool.
+
+    Returns:
+        dict: Checked-out/idle/overflow connections, timeouts and
+            acquire/wait time histograms
+    """
+    return pool_status(async_engine.pool)
+
+
+@internal_router.get("/internal/maintenance")
+async def get_maintenance_report() -> dict:
+    """
+    Report the most recent expired test cleanup of this process.
+
+    Returns:
+        dict: {"last_run": ReapReport as dict, or None before the first run}
+    """
+    report = maintenance_service.last_report
+    return {"last_run": report.as_dict() if report else None}
+
+
+@internal_router.get("/internal/rate_limits")
+async def get_rate_limit_stats() -> dict:
+    """
+    Report the token bucket limiters in front of generation and code checks.
+
+    Returns:
+        dict: {limiter_name: {"per_minute", "burst", "keys", "allowed", "rejected"}}
+    """
+    return {limiter.name: limiter.stats() for limiter in (generate_limiter, auth_limiter, student_auth_limiter)}
+
+
+@internal_router.get("/internal/sessions")
+async def get_session_stats() -> dict:
+    """
+    Report the server-side session backend.
+
+    Returns:
+        dict: Backend name plus its session counts or database reads/writes and cache stats
+    """
+    return session_backend.stats()
+
+
+@internal_router.get("/internal/slow_requests")
+async def get_slow_requests() -> dict:
+    """
+    Report the slowest requests of this process with their stage breakdown.
+
+    Returns:
+        dict: {"enabled": bool, "requests": list} (empty unless PROFILING_ENABLED)
+    """
+    return {"enabled": PROFILING_ENABLED, "requests": slow_request_log.entries()}
@@ -0,0 +1,96 @@
+from app.core.metrics import MetricFamily, histogram_samples, registry
+from app.core.rate_limit import auth_limiter, generate_limiter, student_auth_limiter
+from app.db.database import async_engine
+from app.db.pool_stats import pool_status
+from app.dependencies import require_internal_token
+from app.services.ctest_cache_service import ctest_cache, form_cache
+from app.services.ctest_pdf_generator_service import pdf_cache
+from app.services.text_analysis_service import analysis_cache
+from app.services.worker_pool_service import worker_pool
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+
+"""
+Prometheus scrape endpoint for request, stage and resource metrics.
+
+Protected like the internal diagnostics: scrapers send
+"Authorization: Bearer <INTERNAL_API_TOKEN>" (authorization.credentials in
+the Prometheus scrape config), and without a configured token it is disabled.
+"""
+
+
+metrics_router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _worker_pool_metrics() -> list[MetricFamily]:
+    stats = worker_pool.stats()
+    return [
+        MetricFamily("ctest_worker_jobs_in_flight", "gauge", "Running and queued worker pool jobs", [("", {}, stats["in_flight"])]),
+        MetricFamily("ctest_worker_queue_depth", "gauge", "Worker pool jobs waiting for a free worker", [("", {}, stats["queue_depth"])]),
+        MetricFamily("ctest_worker_jobs_completed_total", "counter", "Finished worker pool jobs", [("", {}, stats["completed"])]),
+        MetricFamily("ctest_worker_jobs_rejected_total", "counter", "Requests rejected with 503 because the queue was full", [("", {}, stats["rejected"])]),
+        MetricFamily("ctest_worker_wait_seconds", "histogram", "Time jobs waited for a worker", histogram_samples(stats["wait_seconds"])),
+        MetricFamily("ctest_worker_run_seconds", "histogram", "Time jobs ran in a worker", histogram_samples(stats["run_seconds"])),
+    ]
+
+
+def _db_pool_metrics() -> list[MetricFamily]:
+    stats = pool_status(async_engine.pool)
+    return [
+        MetricFamily("ctest_db_pool_checked_out", "gauge", "Database connections in use", [("", {}, stats["checked_out"])]),
+        MetricFamily("ctest_db_pool_checked_in", "gauge", "Idle database connections", [("", {}, stats["checked_in"])]),
+        MetricFamily("ctest_db_pool_timeouts_total", "counter", "Connection checkouts that timed out", [("", {}, stats["timeouts"])]),
+        MetricFamily("ctest_db_pool_acquire_seconds", "histogram", "Connection checkout latency", histogram_samples(stats["acquire_seconds"])),
+        MetricFamily("ctest_db_pool_wait_seconds", "histogram", "Checkout latency on an exhausted pool", histogram_samples(stats["wait_seconds"])),
+    ]
+
+
+def _cache_metrics() -> list[MetricFamily]:
+    caches = {"analysis": analysis_cache, "pdf": pdf_cache, "ctest": ctest_cache, "form": form_cache}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+
+    def samples(field: str) -> list:
+        return [("", {"cache": name}, cache_stats[field]) for name, cache_stats in stats.items()]
+
+    return [
+        MetricFamily("ctest_cache_bytes", "gauge", "Bytes held by the in-process caches", samples("bytes")),
+        MetricFamily("ctest_cache_entries", "gauge", "Entries in the in-process caches", samples("entries")),
+        MetricFamily("ctest_cache_hits_total", "counter", "Cache lookups that found an entry", samples("hits")),
+        MetricFamily("ctest_cache_misses_total", "counter", "Cache lookups that found no entry", samples("misses")),
+        MetricFamily("ctest_cache_evictions_total", "counter", "Entries evicted to stay within the byte budget", samples("evictions")),
+    ]
+
+
+def _rate_limit_metrics() -> list[MetricFamily]:
+    stats = {limiter.name: limiter.stats() for limiter in (generate_limiter, auth_limiter, student_auth_limiter)}
+    return [
+        MetricFamily("ctest_rate_limit_allowed_total", "counter", "Requests admitted by the rate limiters",
+                     [("", {"limiter": name}, limiter_stats["allowed"]) for name, limiter_stats in stats.items()]),
+        MetricFamily("ctest_rate_limit_rejected_total", "counter", "Requests rejected with 429",
+                     [("", {"limiter": name}, limiter_stats["rejected"]) for name, limiter_stats in stats.items()]),
+    ]
+
+
+for _collector in (_worker_pool_metrics, _db_pool_metrics, _cache_metrics, _rate_limit_metrics):
+    registry.register_collector(_collector)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Expose all metrics in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Request latency per route, stage timings of generation,
+            rendering and database access, business counters, errors by type and
+            the worker pool, connection pool, cache and rate limiter state
+
+    Notes:
+        - Counters and histograms are cumulative since process start; with several
+          worker processes every process is scraped separately
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
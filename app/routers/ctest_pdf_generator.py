@@ -1,11 +1,16 @@
+from app.core.config import PDF_CACHE_MAX_AGE_SECONDS
+from app.core.http_cache import etag_matches
+from app.core.metrics import pdf_bytes_served
+from app.core.rate_limit import generate_limiter, rate_limit
 from app.schemas.text_input import TextInput
-from app.services.ctest_unit_generator_service import create_ctest_unit
-from app.services.ctest_pdf_generator_service import create_pdf_test
+from app.schemas.variant_input import VariantInput
+from app.services.ctest_pdf_generator_service import get_pdf_test, get_variant_documents, pdf_cache_key, variant_cache_key
+from app.services.worker_pool_service import WorkerPoolBusyError
 
-import os
-import tempfile
-from fastapi import APIRouter, BackgroundTasks, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import HTMLResponse
+import secrets
+from typing import Optional
 
 
 
@@ -23,54 +28,134 @@ from fastapi.responses import FileResponse, HTMLResponse
 pdf_generator_router = APIRouter()
 
 
-@pdf_generator_router.post("/create_pdf", response_class=HTMLResponse)
-async def get_pdf_reply(input: TextInput, background_tasks: BackgroundTasks):
+@pdf_generator_router.post("/create_pdf", response_class=HTMLResponse, dependencies=[Depends(rate_limit(generate_limiter))])
+async def get_pdf_reply(input: TextInput, if_none_match: Optional[str] = Header(default=None)):
     """
     Endpoint for generating and serving C-Test PDFs.
 
     Workflow:
     1. Validates input text
-    2. Generates C-Test content
-    3. Creates temporary PDF file
-    4. Schedules file cleanup
-    5. Returns PDF download
+    2. Answers 304 if the client already holds this PDF (If-None-Match)
+    3. Serves the PDF from the in-process cache, or
+    4. Generates the C-Test and renders the PDF in memory (then caches it)
 
     Args:
         input (TextInput): {
             original_text: str,
             difficulty: Optional[int]
         }
-        background_tasks (BackgroundTasks): FastAPI background task handler
+        if_none_match (Optional[str]): ETag of a previously downloaded PDF
 
     Returns:
-        FileResponse: PDF download with:
+        Response: PDF download with:
             - filename: printable.pdf
             - application/pdf media type
+            - ETag derived from (text hash, difficulty, layout version)
+            - Cache-Control: private, max-age=PDF_CACHE_MAX_AGE_SECONDS
+        or an empty 304 response if the ETag matches
 
     Raises:
         HTTPException: 
             - 400 for empty input or validation errors
+            - 503 with Retry-After when the rendering queue is full
             - 500 for PDF generation failures
 
-    Security:
-        - Uses tempfile for secure temporary file handling
-        - Guaranteed file cleanup via background tasks
+    Notes:
+        - Nothing is written to disk
+        - The ETag is weak: generation is deterministic, but the embedded
+          creation date differs between renderings
     """
 
     try:
         if not input.original_text.strip():
             raise HTTPException(status_code=400, detail="Input text is required.")
 
-        ctest_text, _ = await create_ctest_unit(input.original_text , input.difficulty)
+        headers = {
+            "ETag": f'W/"{pdf_cache_key(input.original_text, input.difficulty.value)}"',
+            "Cache-Control": f"private, max-age={PDF_CACHE_MAX_AGE_SECONDS}",
+        }
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        document = await get_pdf_test(input.original_text, input.difficulty.value)
+        headers["Content-Disposition"] = 'attachment; filename="printable.pdf"'
+        pdf_bytes_served.inc("pdf", amount=len(document))
+        return Response(content=document, media_type="application/pdf", headers=headers)
+
+    except HTTPException:
+        raise
+
+    except WorkerPoolBusyError as be:
+        raise HTTPException(status_code=503, detail=str(be), headers={"Retry-After": str(be.retry_after)})
+
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Failed to create PDF. " + str(e))
+
+
+@pdf_generator_router.post("/create_pdf_variants", response_class=HTMLResponse, dependencies=[Depends(rate_limit(generate_limiter))])
+async def get_pdf_variants_reply(input: VariantInput, if_none_match: Optional[str] = Header(default=None)):
+    """
+    Endpoint for printing differently blanked versions of one text, one per student.
+
+    Workflow:
+    1. Validates input text
+    2. Parses the text once and derives variant_count seeded blank layouts
+    3. Renders every variant with its own answer key page
+    4. Returns one merged PDF or a ZIP with one PDF per variant
 
-    
-        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        tmp_file.close()
+    Args:
+        input (VariantInput): {
+            original_text: str,
+            difficulty: str,
+            variant_count: int,
+            seed: Optional[int],
+            format: "pdf" | "zip"
+        }
+        if_none_match (Optional[str]): ETag of a previously downloaded set
 
-        await create_pdf_test(ctest_text, input.original_text, tmp_file.name)
-        background_tasks.add_task(os.remove, tmp_file.name)
+    Returns:
+        Response: printable_variants.pdf (application/pdf) or
+            printable_variants.zip (application/zip) with:
+            - X-Variant-Seed: seed used for the set
+            - ETag and Cache-Control as for /create_pdf
+        or an empty 304 response if the ETag matches
 
-        return FileResponse(tmp_file.name, filename="printable.pdf", media_type="application/pdf")
+    Raises:
+        HTTPException:
+            - 400 for empty input or validation errors
+            - 503 with Retry-After when the rendering queue cannot take all variants
+            - 500 for PDF generation failures
+    """
+
+    try:
+        if not input.original_text.strip():
+            raise HTTPException(status_code=400, detail="Input text is required.")
+
+        seed = input.seed if input.seed is not None else secrets.randbelow(2 ** 32)
+        headers = {
+            "ETag": f'W/"{variant_cache_key(input.original_text, input.difficulty.value, input.variant_count, seed, input.format)}"',
+            "Cache-Control": f"private, max-age={PDF_CACHE_MAX_AGE_SECONDS}",
+            "X-Variant-Seed": str(seed),
+        }
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        document = await get_variant_documents(
+            input.original_text, input.difficulty.value, input.variant_count, seed, input.format
+        )
+        headers["Content-Disposition"] = f'attachment; filename="printable_variants.{input.format}"'
+        media_type = "application/pdf" if input.format == "pdf" else "application/zip"
+        pdf_bytes_served.inc(input.format, amount=len(document))
+        return Response(content=document, media_type=media_type, headers=headers)
+
+    except HTTPException:
+        raise
+
+    except WorkerPoolBusyError as be:
+        raise HTTPException(status_code=503, detail=str(be), headers={"Retry-After": str(be.retry_after)})
 
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
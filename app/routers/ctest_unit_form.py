@@ -1,10 +1,12 @@
-from app.models.ctest import CTest
-from app.dependencies import get_db, templates
+from app.core.http_cache import etag_matches
+from app.core.rate_limit import rate_limit, student_auth_limiter
+from app.dependencies import templates
+from app.services.ctest_cache_service import cache_form, get_cached_ctest, get_cached_form
 
 from datetime import datetime, timezone
-from fastapi import APIRouter, Form, HTTPException, Request, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Form, Header, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from typing import Optional
 
 
 """FastAPI router for student authentication and C-Test form handling."""
@@ -29,8 +31,8 @@ async def get_form_auth(request: Request, ctest_id: str):
     """
     return templates.TemplateResponse("ctest-auth.html", {"request": request, "ctest_id": ctest_id, "error": None})
 
-@form_router.post("/student_authorize/{ctest_id}")
-async def redirect_form_auth(request: Request, ctest_id: str, code: str = Form(...), db: Session = Depends(get_db)):
+@form_router.post("/student_authorize/{ctest_id}", dependencies=[Depends(rate_limit(student_auth_limiter, per_test=True))])
+async def redirect_form_auth(request: Request, ctest_id: str, code: str = Form(...)):
     """
     Process student authentication and grant test access.
     
@@ -38,18 +40,17 @@ async def redirect_form_auth(request: Request, ctest_id: str, code: str = Form(.
         request (Request): FastAPI request object
         ctest_id (str): Unique test identifier from URL
         code (str): Student access code from form submission
-        db (Session): Active database session
         
     Returns:
         RedirectResponse: To test form on successful authentication (302)
         TemplateResponse: Re-renders auth page with error message on failure (400)
         
     Behavior:
-        - Validates student code against database record
+        - Validates student code against the (cached) database record
         - Sets session authentication flag if successful
         - Maintains test context during redirects
     """
-    otp_entry = db.query(CTest).filter_by(ctest_id=ctest_id).first()
+    otp_entry = await get_cached_ctest(ctest_id)
     if otp_entry and otp_entry.student_code == code:
         request.session[f"/api/ctest_auth_{ctest_id}"] = True
         return RedirectResponse(f"/api/ctest/{ctest_id}", status_code=302)
@@ -62,48 +63,70 @@ async def redirect_form_auth(request: Request, ctest_id: str, code: str = Form(.
 
 
 @form_router.get("/ctest/{ctest_id}", response_class=HTMLResponse)
-async def get_ctest_form(request: Request, ctest_id: str, db: Session = Depends(get_db)):
+async def get_ctest_form(
+    request: Request,
+    ctest_id: str,
+    if_none_match: Optional[str] = Header(default=None)
+):
     """
     Serve the C-Test form after validation checks.
     
     Args:
         request (Request): FastAPI request object
         ctest_id (str): Unique test identifier from URL
-        db (Session): Active database session
+        if_none_match (Optional[str]): ETag of the client's cached copy
         
     Returns:
-        TemplateResponse: One of:
-            - ctest-form.html with test data (200)
-            - not-found.html for invalid/expired tests (410)
+        HTMLResponse: ctest-form.html with test data (200), with ETag
+            and Cache-Control: private, no-cache
+        Response: Empty 304 if the client's copy is current
+        TemplateResponse: not-found.html for invalid/expired tests (410)
         RedirectResponse: To auth page if unauthorized (302)
         
     Template Context (ctest-form.html):
-        ctest_text: Original text with gaps for student completion
+        segments: Text runs and blanks of the test, rendered directly as text nodes and inputs
         correct_answers: Dictionary of correct solutions
         ctest_id: Test identifier for form submission
         
     Raises:
         HTTPException: 500 for server/database errors
+
+    Caching:
+        - The test row is read once per process and cache TTL (see ctest_cache_service)
+        - The rendered body is cached per test and base URL
+        - The session check runs before any 304, so revalidation stays authorized
+        - No Last-Modified: /amend changes the embedded answers after creation,
+          only the ETag (a hash of the body) reflects that
     """
     try:
         if not request.session.get(f"/api/ctest_auth_{ctest_id}"):
             return RedirectResponse(f"/api/student_authorize/{ctest_id}", status_code=302)
-        test = db.query(CTest).filter(CTest.ctest_id == ctest_id).first()
+        test = await get_cached_ctest(ctest_id)
         if not test or test.expires_at < datetime.now(timezone.utc):
             return templates.TemplateResponse(
                 "not-found.html",
                 {"request": request},
                 status_code=410
             )
-        return templates.TemplateResponse(
-            "ctest-form.html",
-            {
-                "request": request,
-                "ctest_text": test.ctest_text,
-                "correct_answers": test.correct_answers,
-                "ctest_id": str(test.ctest_id)
-            }
-        )
+
+        base_url = str(request.base_url)
+        form = get_cached_form(test, base_url)
+        if form is None:
+            body = templates.get_template("ctest-form.html").render(
+                request=request,
+                segments=test.segments,
+                correct_answers=test.correct_answers,
+                ctest_id=str(test.ctest_id)
+            )
+            form = cache_form(test, base_url, body.encode("utf-8"))
+
+        headers = {
+            "ETag": form.etag,
+            "Cache-Control": "private, no-cache",
+        }
+        if etag_matches(if_none_match, form.etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(content=form.body, headers=headers)
 
     except Exception as e:
        
@@ -1,13 +1,21 @@
+from app.core.metrics import ctests_generated
+from app.core.rate_limit import generate_limiter, rate_limit
+from app.db.repository import add_ctest, add_ctests, get_ctest
 from app.models.ctest import CTest
 from app.dependencies import get_db
 from app.schemas.text_input import TextInput
-from app.services.ctest_unit_generator_service import TEST_EXPIRATION_DAYS, create_ctest_unit, generate_code
+from app.schemas.batch_input import BatchTextInput
+from app.schemas.reblank_input import ReblankInput
+from app.services.ctest_unit_generator_service import TARGET_POS, TEST_EXPIRATION_DAYS, generate_code, get_text_analyses, get_text_analysis, select_blanks
+from app.services.text_analysis_service import analysis_from_json, analysis_to_json, text_key
+from app.services.worker_pool_service import WorkerPoolBusyError
 
 
 
 from datetime import datetime, timedelta, timezone
+import uuid
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 
@@ -21,17 +29,18 @@ from sqlalchemy.orm import Session
 ctest_generator_router = APIRouter()
 
 
-@ctest_generator_router.post("/create")
-async def create_test_reply(input: TextInput, db: Session = Depends(get_db)) -> dict[str, str]:
+@ctest_generator_router.post("/create", dependencies=[Depends(rate_limit(generate_limiter))])
+async def create_test_reply(input: TextInput, db: AsyncSession = Depends(get_db)) -> dict[str, str]:
     """
     Endpoint for creating and storing new C-Tests.
 
     Args:
         input (TextInput): {
             original_text: str,
-            difficulty: str
+            difficulty: str,
+            previous_analysis_key: Optional[str]
         }
-        db (Session): Active database session
+        db (AsyncSession): Active database session
 
     Returns:
         dict: Test creation response containing:
@@ -40,22 +49,25 @@ async def create_test_reply(input: TextInput, db: Session = Depends(get_db)) ->
             - results_url: Teacher results URL
             - student_code: 6-digit access code
             - teacher_code: 6-digit access code
+            - analysis_key: Key to send as previous_analysis_key after editing the text
 
     Raises:
         HTTPException:
             - 400 for invalid input
+            - 503 with Retry-After when the generation queue is full
             - 500 for generation/storage errors
 
     Workflow:
         1. Validates input text
         2. Generates C-Test content
         3. Creates access codes
-        4. Stores test in database
+        4. Stores test, its segments and token annotations in database
         5. Returns test data with URLs
         6. Sets automatic 7-day expiration
     """
     try:
-        ctest_text, correct_answers  = await create_ctest_unit(input.original_text, input.difficulty)
+        analysis = await get_text_analysis(input.original_text, input.previous_analysis_key)
+        ctest_text, correct_answers, segments = select_blanks(input.original_text, analysis, input.difficulty)
         created_at: datetime = datetime.now(timezone.utc)
         expires_at: datetime = created_at + timedelta(days=TEST_EXPIRATION_DAYS)
         student_code = await generate_code()
@@ -65,15 +77,185 @@ async def create_test_reply(input: TextInput, db: Session = Depends(get_db)) ->
             "created_at": created_at,
             "expires_at": expires_at,
             "correct_answers": correct_answers,
+            "segments": segments,
             "original_text": input.original_text,
             "student_code": student_code,
-            "teacher_code": teacher_code
+            "teacher_code": teacher_code,
+            "annotations": analysis_to_json(analysis)
+        }
+
+        new_ctest_entry = add_ctest(db, ctest_data)
+        await db.commit()
+        ctests_generated.inc("create")
+        return {
+            "ctest_text": ctest_text,
+            "share_url": f"/api/ctest/{new_ctest_entry.ctest_id}",
+            "results_url": f"/api/results/{new_ctest_entry.ctest_id}",
+            "student_code": student_code,
+            "teacher_code": teacher_code,
+            "analysis_key": text_key(input.original_text)
+        }
+    except WorkerPoolBusyError as be:
+        raise HTTPException(
+            status_code=503,
+            detail=str(be),
+            headers={"Retry-After": str(be.retry_after)}
+        )
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=400,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail="Test generation service error: " + str(e)
+        )
+
+
+@ctest_generator_router.post("/create_batch", dependencies=[Depends(rate_limit(generate_limiter))])
+async def create_batch_reply(batch: BatchTextInput, db: AsyncSession = Depends(get_db)) -> dict[str, list[dict]]:
+    """
+    Endpoint for creating and storing many C-Tests in one call.
+
+    Args:
+        batch (BatchTextInput): {
+            items: [{original_text: str, difficulty: str}, ...]
+        }
+        db (AsyncSession): Active database session
+
+    Returns:
+        dict: {"results": [...]} with one entry per input item, in input order:
+            - index, ctest_text, share_url, results_url, student_code, teacher_code
+            - or index and error for items that could not be generated
+
+    Raises:
+        HTTPException:
+            - 503 with Retry-After when the generation queue is full
+            - 500 for generation/storage errors
+
+    Workflow:
+        1. Validates every item on its own; invalid items are reported and skipped
+        2. Parses the remaining texts with one batched nlp.pipe call
+        3. Creates access codes for every successful item
+        4. Stores all tests with a single bulk insert and commit
+    """
+    try:
+        validated = batch.validated_items()
+        results = [{"index": index, "error": error} for index, _, error in validated if error is not None]
+        valid_items = [(index, item) for index, item, error in validated if error is None]
+
+        analyses = await get_text_analyses([item.original_text for _, item in valid_items])
+        created_at: datetime = datetime.now(timezone.utc)
+        expires_at: datetime = created_at + timedelta(days=TEST_EXPIRATION_DAYS)
+
+        rows = []
+        for (index, item), analysis in zip(valid_items, analyses):
+            try:
+                ctest_text, correct_answers, segments = select_blanks(item.original_text, analysis, item.difficulty)
+            except ValueError as ve:
+                results.append({"index": index, "error": str(ve)})
+                continue
+            ctest_id = uuid.uuid4()
+            student_code = await generate_code()
+            teacher_code = await generate_code()
+            rows.append({
+                "ctest_id": ctest_id,
+                "ctest_text": ctest_text,
+                "created_at": created_at,
+                "expires_at": expires_at,
+                "correct_answers": correct_answers,
+                "segments": segments,
+                "original_text": item.original_text,
+                "student_code": student_code,
+                "teacher_code": teacher_code,
+                "annotations": analysis_to_json(analysis)
+            })
+            results.append({
+                "index": index,
+                "ctest_text": ctest_text,
+                "share_url": f"/api/ctest/{ctest_id}",
+                "results_url": f"/api/results/{ctest_id}",
+                "student_code": student_code,
+                "teacher_code": teacher_code
+            })
+
+        if rows:
+            await add_ctests(db, rows)
+            await db.commit()
+            ctests_generated.inc("create_batch", amount=len(rows))
+        return {"results": sorted(results, key=lambda result: result["index"])}
+    except WorkerPoolBusyError as be:
+        raise HTTPException(
+            status_code=503,
+            detail=str(be),
+            headers={"Retry-After": str(be.retry_after)}
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail="Test generation service error: " + str(e)
+        )
+
+
+@ctest_generator_router.post("/reblank/{ctest_id}", dependencies=[Depends(rate_limit(generate_limiter))])
+async def reblank_test_reply(ctest_id: str, input: ReblankInput, db: AsyncSession = Depends(get_db)) -> dict[str, str]:
+    """
+    Endpoint for deriving a new blank layout from an existing C-Test.
+
+    Args:
+        ctest_id (str): Unique identifier of the existing C-Test
+        input (ReblankInput): {
+            teacher_code: str,
+            difficulty: str,
+            target_pos: Optional[list[str]]
         }
+        db (AsyncSession): Active database session
 
-        new_ctest_entry = CTest(**ctest_data)
-        db.add(new_ctest_entry)
-        db.commit()
-        db.refresh(new_ctest_entry)
+    Returns:
+        dict: Same structure as /create, describing the newly stored test
+
+    Raises:
+        HTTPException:
+            - 404 if the test does not exist, has expired or the teacher code is wrong
+            - 400 for invalid difficulty or POS tags
+            - 500 for storage errors
+
+    Notes:
+        - Blanks are selected from the stored annotations; the text is not parsed again
+        - Tests created before annotations were stored are parsed once (cache aware)
+    """
+    try:
+        db_ctest = await get_ctest(db, ctest_id, CTest.original_text, CTest.annotations, active=True)
+        if not db_ctest or db_ctest.teacher_code != input.teacher_code:
+            raise HTTPException(status_code=404, detail="Test not found")
+
+        if db_ctest.annotations:
+            analysis = analysis_from_json(db_ctest.annotations)
+            annotations = db_ctest.annotations
+        else:
+            analysis = await get_text_analysis(db_ctest.original_text)
+            annotations = analysis_to_json(analysis)
+        target_pos = set(input.target_pos) if input.target_pos is not None else TARGET_POS
+        ctest_text, correct_answers, segments = select_blanks(db_ctest.original_text, analysis, input.difficulty, target_pos)
+
+        created_at: datetime = datetime.now(timezone.utc)
+        student_code = await generate_code()
+        teacher_code = await generate_code()
+        new_ctest_entry = add_ctest(db, {
+            "ctest_text": ctest_text,
+            "created_at": created_at,
+            "expires_at": created_at + timedelta(days=TEST_EXPIRATION_DAYS),
+            "correct_answers": correct_answers,
+            "segments": segments,
+            "original_text": db_ctest.original_text,
+            "student_code": student_code,
+            "teacher_code": teacher_code,
+            "annotations": annotations
+        })
+        await db.commit()
+        ctests_generated.inc("reblank")
         return {
             "ctest_text": ctest_text,
             "share_url": f"/api/ctest/{new_ctest_entry.ctest_id}",
@@ -81,6 +263,14 @@ async def create_test_reply(input: TextInput, db: Session = Depends(get_db)) ->
             "student_code": student_code,
             "teacher_code": teacher_code
         }
+    except HTTPException:
+        raise
+    except WorkerPoolBusyError as be:
+        raise HTTPException(
+            status_code=503,
+            detail=str(be),
+            headers={"Retry-After": str(be.retry_after)}
+        )
     except ValueError as ve:
         raise HTTPException(
             status_code=400,
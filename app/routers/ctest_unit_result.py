@@ -1,11 +1,19 @@
+from app.core.config import RESULTS_PAGE_SIZE
+from app.core.rate_limit import auth_limiter, rate_limit
+from app.db.repository import get_access_codes, get_answer_key, get_ctest, get_submission, parse_id
 from app.models.ctest import CTest
-from app.models.submission import Submission
 from app.dependencies import get_db, templates
+from app.schemas.amend_input import AmendInput
+from app.services.ctest_cache_service import invalidate_ctest
+from app.services.ctest_results_service import get_score_summary, get_submission_page
+from app.services.ctest_unit_generator_service import segments_from_ctest_text
+from app.services.ctest_unit_submission_service import add_alternatives, rescore_submissions
+from app.services.item_statistics_service import get_item_statistics
 
 
 from fastapi import APIRouter, Form, HTTPException, Request, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 
@@ -32,8 +40,8 @@ async def get_res_auth(request: Request, ctest_id: str):
     """
     return templates.TemplateResponse("ctest-auth.html", {"request": request, "ctest_id": ctest_id, "error": None})
 
-@results_router.post("/results_authorize/{ctest_id}")
-async def redirect_res_auth(request: Request, ctest_id: str, code: str = Form(...), db: Session = Depends(get_db)):
+@results_router.post("/results_authorize/{ctest_id}", dependencies=[Depends(rate_limit(auth_limiter))])
+async def redirect_res_auth(request: Request, ctest_id: str, code: str = Form(...), db: AsyncSession = Depends(get_db)):
     """
     Validate teacher code and authorize results access.
 
@@ -41,7 +49,7 @@ async def redirect_res_auth(request: Request, ctest_id: str, code: str = Form(..
         request (Request): FastAPI request object
         ctest_id (str): Unique identifier of the C-Test
         code (str): Teacher authorization code from form
-        db (Session): SQLAlchemy database session
+        db (AsyncSession): SQLAlchemy database session
 
     Returns:
         RedirectResponse: To results page if code valid (sets session auth)
@@ -51,7 +59,7 @@ async def redirect_res_auth(request: Request, ctest_id: str, code: str = Form(..
         - Sets session flag on successful authorization
         - Returns 400 status for invalid codes
     """
-    otp_entry = db.query(CTest).filter_by(ctest_id=ctest_id).first()
+    otp_entry = await get_access_codes(db, ctest_id)
     if otp_entry and otp_entry.teacher_code == code:
         request.session[f"/api/res_auth_{ctest_id}"] = True
         return RedirectResponse(f"/api/results/{ctest_id}", status_code=302)
@@ -64,20 +72,178 @@ async def redirect_res_auth(request: Request, ctest_id: str, code: str = Form(..
 
 
 @results_router.get("/results/{ctest_id}", response_class=HTMLResponse)
-async def get_results(request: Request, ctest_id: str, db: Session = Depends(get_db)):
+async def get_results(request: Request, ctest_id: str, after: str | None = None, db: AsyncSession = Depends(get_db)):
     """
-    Display test results after authorization.
+    Display the submissions of a test with summary statistics after authorization.
 
     Args:
         request (Request): FastAPI request object
         ctest_id (str): Unique identifier of the C-Test
-        db (Session): SQLAlchemy database session
+        after (str | None): Page cursor from the previous page's "Weitere" link
+        db (AsyncSession): SQLAlchemy database session
+
+    Returns:
+        TemplateResponse: Rendered ctest-results-list.html with:
+            - Summary statistics (count, mean, median, range, distribution)
+            - One page of submissions, newest first
+            - Cursor of the next page (None on the last page)
+            - Item statistics of every blank
+        RedirectResponse: To auth page if unauthorized
+        TemplateResponse: not-found.html if the test does not exist (410)
+
+    Raises:
+        HTTPException: 400 for an invalid page cursor
+        HTTPException: 500 for server errors during rendering
+    """
+    try:
+        if not request.session.get(f"/api/res_auth_{ctest_id}"):
+            return RedirectResponse(f"/api/results_authorize/{ctest_id}", status_code=302)
+        test_id = parse_id(ctest_id)
+        correct_answers = await get_answer_key(db, test_id)
+        if correct_answers is None:
+            return templates.TemplateResponse("not-found.html", {"request": request}, status_code=410)
+        submissions, next_cursor = await get_submission_page(db, test_id, RESULTS_PAGE_SIZE, after)
+        return templates.TemplateResponse(
+            "ctest-results-list.html",
+            {
+                "request": request,
+                "ctest_id": ctest_id,
+                "summary": await get_score_summary(db, test_id),
+                "submissions": submissions,
+                "next_cursor": next_cursor,
+                "items": _with_expected_answers(await get_item_statistics(db, test_id), correct_answers),
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail="Test rendering service error: " + str(e)
+        )
+
+
+@results_router.get("/results/{ctest_id}/items")
+async def get_items(request: Request, ctest_id: str, db: AsyncSession = Depends(get_db)) -> JSONResponse:
+    """
+    Per-blank item statistics of a test as JSON, after authorization.
+
+    Args:
+        request (Request): FastAPI request object
+        ctest_id (str): Unique identifier of the C-Test
+        db (AsyncSession): SQLAlchemy database session
+
+    Returns:
+        JSONResponse: {
+            "items": [{
+                "position": int,
+                "expected_answer": str,
+                "attempts": int,
+                "correct": int,
+                "hinted": int,
+                "percent_correct": float,
+                "wrong_answers": [{"answer": str, "count": int}, ...]
+            }, ...]
+        }
+
+    Raises:
+        HTTPException: 403 if the teacher code was not entered in this session
+                     410 if the test does not exist
+                     500 for server errors
+    """
+    try:
+        if not request.session.get(f"/api/res_auth_{ctest_id}"):
+            raise HTTPException(status_code=403, detail="Not authorized")
+        test_id = parse_id(ctest_id)
+        correct_answers = await get_answer_key(db, test_id)
+        if correct_answers is None:
+            raise HTTPException(status_code=410, detail="Test not found")
+        items = _with_expected_answers(await get_item_statistics(db, test_id), correct_answers)
+        return JSONResponse({"items": items})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail="Item statistics service error: " + str(e)
+        )
+
+
+@results_router.post("/amend/{ctest_id}", dependencies=[Depends(rate_limit(auth_limiter))])
+async def amend_answers(ctest_id: str, input: AmendInput, db: AsyncSession = Depends(get_db)) -> JSONResponse:
+    """
+    Accept alternative answers for blanks of a test and re-score its submissions.
+
+    Args:
+        ctest_id (str): Unique identifier of the C-Test
+        input (AmendInput): {
+            teacher_code: str,
+            alternatives: {position: [answer, ...]}
+        }
+        db (AsyncSession): SQLAlchemy database session
+
+    Returns:
+        JSONResponse: {
+            "amended_positions": list[str],  # positions that accept new answers
+            "rescored": int,                 # submissions whose score changed
+            "correct_answers": dict          # amended answer key
+        }
+
+    Raises:
+        HTTPException: 404 if the test does not exist, has expired or the teacher code is wrong
+                     400 for unknown blank positions
+                     500 for server errors
+
+    Notes:
+        - Answer key update, re-scoring and item statistics rebuild happen in one
+          transaction that holds the test's row lock, so no submission is scored
+          against the old key in between
+    """
+    try:
+        db_ctest = await get_ctest(db, ctest_id, CTest.correct_answers, active=True, lock="update")
+        if not db_ctest or db_ctest.teacher_code != input.teacher_code:
+            raise HTTPException(status_code=404, detail="Test not found")
+
+        correct_answers, changed_positions = add_alternatives(db_ctest.correct_answers, input.alternatives)
+        rescored = 0
+        if changed_positions:
+            db_ctest.correct_answers = correct_answers
+            rescored = await rescore_submissions(db, db_ctest.ctest_id, correct_answers, changed_positions)
+        await db.commit()
+        invalidate_ctest(db_ctest.ctest_id)
+        return JSONResponse({
+            "amended_positions": changed_positions,
+            "rescored": rescored,
+            "correct_answers": correct_answers,
+        })
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail="Answer amendment service error: " + str(e)
+        )
+
+
+@results_router.get("/results/{ctest_id}/submissions/{submission_id}", response_class=HTMLResponse)
+async def get_submission_result(request: Request, ctest_id: str, submission_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Display one submission of a test after authorization.
+
+    Args:
+        request (Request): FastAPI request object
+        ctest_id (str): Unique identifier of the C-Test
+        submission_id (str): Unique identifier of the submission
+        db (AsyncSession): SQLAlchemy database session
 
     Returns:
         TemplateResponse: Rendered ctest-results.html with:
             - Score data
             - Student answers
-            - Original test text
+            - Test segments (text runs and blanks)
             - Correct answers
             - Given hints
         RedirectResponse: To auth page if unauthorized
@@ -89,21 +255,21 @@ async def get_results(request: Request, ctest_id: str, db: Session = Depends(get
     try:
         if not request.session.get(f"/api/res_auth_{ctest_id}"):
             return RedirectResponse(f"/api/results_authorize/{ctest_id}", status_code=302)
-        db_submission = db.query(Submission).filter(Submission.ctest_id == ctest_id).first()
-        db_test = db.query(CTest).filter(CTest.id == ctest_id).first()
+        db_submission = await get_submission(db, ctest_id, submission_id)
+        db_test = await get_ctest(db, ctest_id, CTest.ctest_text, CTest.correct_answers, CTest.segments) if db_submission else None
         if not db_submission or not db_test:
             return templates.TemplateResponse(
                 "not-found.html",
                 {"request": request},
                 status_code=410
-            )        
+            )
         return templates.TemplateResponse(
             "ctest-results.html",
             {
                 "request": request,
                 "score_data": db_submission.score_data,
                 "student_answers": db_submission.student_answers,
-                "ctest_text": db_test.ctest_text,
+                "segments": db_test.segments or segments_from_ctest_text(db_test.ctest_text, db_test.correct_answers),
                 "correct_answers": db_test.correct_answers,
                 "given_hints": db_submission.given_hints,
             }
@@ -112,4 +278,10 @@ async def get_results(request: Request, ctest_id: str, db: Session = Depends(get
         raise HTTPException(
             status_code=500,
             detail="Test rendering service error: " + str(e)
-        )
\ No newline at end of file
+        )
+
+
+def _with_expected_answers(items: list[dict], correct_answers: dict) -> list[dict]:
+    for item in items:
+        item["expected_answer"] = correct_answers.get(str(item["position"]), {}).get("answer", "")
+    return items
@@ -1,13 +1,14 @@
-from app.models.ctest import CTest
+from app.core.metrics import submissions_received
+from app.db.repository import add_submission, get_submission_context
 from app.dependencies import get_db
 from app.schemas.submission import Submission
-from app.models.submission import Submission as dbSubmission
 from app.services.ctest_unit_submission_service import calculate_score
+from app.services.item_statistics_service import record_submission
 
 
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
 
@@ -23,20 +24,26 @@ submission_router = APIRouter()
 
 
 @submission_router.post("/submit-ctest")
-async def submit_ctest(submission: Submission, db: Session = Depends(get_db)) -> JSONResponse:
+async def submit_ctest(request: Request, submission: Submission, db: AsyncSession = Depends(get_db)) -> JSONResponse:
     """
     Submit a C-Test and calculate scores.
 
     Args:
+        request (Request): FastAPI request object (session of the student)
         submission (Submission): The student's test submission data.
-        db (Session): SQLAlchemy database session (dependency injection).
+        db (AsyncSession): SQLAlchemy database session (dependency injection).
 
     Returns:
         JSONResponse: Contains either:
-            - Existing submission data (if test was already submitted)
-            - New submission results (if first submission)
+            - Existing submission data (if this student already submitted the test)
+            - New submission results (if first submission of this student)
             - Error details (if test invalid/expired)
 
+    Notes:
+        - A test accepts any number of submissions (one per student);
+          a repeated submission is recognized by a flag in the student's session
+        - The test's item statistics are updated in the same transaction
+
     Raises:
         HTTPException: 404 if test/answers not found
                      410 if test expired
@@ -44,14 +51,15 @@ async def submit_ctest(submission: Submission, db: Session = Depends(get_db)) ->
                      500 for server errors
     """
     try:
-        db_ctest = db.query(CTest).filter(CTest.ctest_id == submission.ctest_id).first()
+        submitted_key = f"/api/ctest_submitted_{submission.ctest_id}"
+        # One query for the test (locked FOR KEY SHARE) and this session's earlier submission
+        db_ctest, db_submission = await get_submission_context(db, submission.ctest_id, request.session.get(submitted_key))
         if not db_ctest:
             raise HTTPException(status_code=404, detail="Test not found")
         current_time = datetime.now(timezone.utc)
         
         if db_ctest.expires_at < current_time:
             raise HTTPException(status_code=410, detail="Test has expired")
-        db_submission = db.query(dbSubmission).filter(dbSubmission.ctest_id == submission.ctest_id).first()
         if db_submission is not None:
             return JSONResponse({
             "was_in_db": True,
@@ -71,12 +79,14 @@ async def submit_ctest(submission: Submission, db: Session = Depends(get_db)) ->
                     for key, value in submission.given_hints.items()
             },
             "score_data": score_data,
+            "percentage": score_data["percentage"],
             "submitted_at": current_time
         }
-        new_submission_entry = dbSubmission(**submission_data)
-        db.add(new_submission_entry)
-        db.commit()
-        db.refresh(new_submission_entry)
+        new_submission_entry = add_submission(db, submission_data)
+        await record_submission(db, submission.ctest_id, score_data, submission_data["given_hints"])
+        await db.commit()
+        submissions_received.inc()
+        request.session[submitted_key] = str(new_submission_entry.submission_id)
         return JSONResponse({
             "was_in_db": False,
             "score_data": score_data,
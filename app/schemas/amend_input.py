@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+
+
+class AmendInput(BaseModel):
+    """
+    Request model for adding accepted alternative answers to a C-Test.
+
+    Attributes:
+        teacher_code (str):
+            6-digit teacher code of the test
+        alternatives (dict[int, list[str]]):
+            Additional accepted answers per blank position
+            Example: {3: ["ss"], 7: ["Strasse", "Straße"]}
+
+    Notes:
+        - Alternatives are compared like answers: case-insensitive, surrounding whitespace ignored
+        - Alternatives are added to those already accepted, nothing is removed
+    """
+    teacher_code: str
+    alternatives: dict[int, list[str]] = Field(..., min_length=1)
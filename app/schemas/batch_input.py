@@ -0,0 +1,41 @@
+from app.core.config import BATCH_MAX_ITEMS
+from app.schemas.text_input import TextInput
+
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any
+
+
+class BatchTextInput(BaseModel):
+    """
+    Request model for the batch C-Test generation endpoint.
+
+    Attributes:
+        items (list[dict]):
+            Texts to turn into C-Tests, each shaped like TextInput
+            ({original_text, difficulty}). Between 1 and BATCH_MAX_ITEMS entries.
+
+    Notes:
+        - Items are generated independently; a bad item does not fail the batch
+        - Items are validated one by one (see validated_items), so an invalid
+          difficulty or an overlong text only fails its own item
+    """
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+
+    def validated_items(self) -> list[tuple[int, TextInput | None, str | None]]:
+        """
+        Validate every item as a TextInput.
+
+        Returns:
+            list: (index, item, None) for valid items and (index, None, error message)
+                  for invalid ones, in input order
+        """
+        validated = []
+        for index, raw_item in enumerate(self.items):
+            try:
+                validated.append((index, TextInput.model_validate(raw_item), None))
+            except ValidationError as ve:
+                message = "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in ve.errors()
+                )
+                validated.append((index, None, message))
+        return validated
@@ -0,0 +1,26 @@
+from app.schemas.difficulty import DifficultyLevel
+
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ReblankInput(BaseModel):
+    """
+    Request model for deriving a new blank layout from an existing C-Test.
+
+    Attributes:
+        teacher_code (str):
+            6-digit teacher code of the existing test
+        difficulty (DifficultyLevel):
+            Difficulty of the new layout
+        target_pos (Optional[list[str]]):
+            Coarse POS tags of words that may be blanked
+            Example: ["NOUN", "ADJ"]
+            Default: nouns, verbs, adjectives and adverbs
+
+    Notes:
+        - The new layout is stored as a new test with its own codes
+    """
+    teacher_code: str
+    difficulty: DifficultyLevel
+    target_pos: Optional[list[str]] = None
@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Dict
+from app.core.config import MAX_ANSWER_CHARS
+
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict
 
 
 
@@ -22,9 +24,10 @@ class Submission(BaseModel):
     Notes:
         - Blank positions are zero-indexed
         - Answer keys must match test's correct_answers structure
+        - Answers are at most MAX_ANSWER_CHARS characters long
     """
     ctest_id: str
-    student_answers: Dict[int, str]
+    student_answers: Dict[int, Annotated[str, Field(max_length=MAX_ANSWER_CHARS)]]
     given_hints: Dict[int, list]
     
 
@@ -1,6 +1,9 @@
+from app.core.config import MAX_INPUT_CHARS
 from app.schemas.difficulty import DifficultyLevel
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+from typing import Optional
+import unicodedata
 
 
 class TextInput(BaseModel):
@@ -15,11 +18,27 @@ class TextInput(BaseModel):
         difficulty (DifficultyLevel):
             Controls blank frequency and test complexity.
             Default: medium
+
+        previous_analysis_key (Optional[str]):
+            analysis_key returned for an earlier version of the same text.
+            When given, only the sentences that changed since then are re-parsed.
     
     Validation:
         - Text must be non-empty
         - Minimum length enforced during generation
+        - At most MAX_INPUT_CHARS characters (after normalization)
+        - Text is normalized (Unicode NFC, "\\n" line endings) so that equal
+          texts share one cached analysis
     """
     original_text: str
     difficulty: DifficultyLevel
-    
\ No newline at end of file
+    previous_analysis_key: Optional[str] = None
+
+    @field_validator("original_text")
+    @classmethod
+    def normalize_text(cls, value: str) -> str:
+        value = unicodedata.normalize("NFC", value).replace("\r\n", "\n")
+        if len(value) > MAX_INPUT_CHARS:
+            raise ValueError(f"Der eingegebene Text ist zu lang (höchstens {MAX_INPUT_CHARS} Zeichen).")
+        return value
+    
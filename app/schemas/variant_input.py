@@ -0,0 +1,27 @@
+from app.core.config import VARIANT_MAX_COUNT
+from app.schemas.text_input import TextInput
+
+from pydantic import Field
+from typing import Literal, Optional
+
+
+class VariantInput(TextInput):
+    """
+    Request model for generating several blank layouts of one text.
+
+    Attributes:
+        original_text (str), difficulty (DifficultyLevel):
+            As in TextInput
+        variant_count (int):
+            Number of layouts, between 1 and VARIANT_MAX_COUNT
+        seed (Optional[int]):
+            Seed of the set; the same text, difficulty, count and seed
+            always give the same layouts.
+            Default: a random seed, reported in the X-Variant-Seed header
+        format (str):
+            "pdf" for one merged document, "zip" for one PDF per variant.
+            Default: pdf
+    """
+    variant_count: int = Field(ge=1, le=VARIANT_MAX_COUNT)
+    seed: Optional[int] = Field(default=None, ge=0)
+    format: Literal["pdf", "zip"] = "pdf"
@@ -0,0 +1,171 @@
+from app.core.cache import ByteBudgetLRUCache
+from app.core.config import CTEST_CACHE_MAX_BYTES, CTEST_CACHE_TTL_SECONDS, FORM_CACHE_MAX_BYTES
+from app.db.database import AsyncSessionLocal
+from app.db.repository import get_ctest
+from app.models.ctest import CTest
+from app.services.ctest_unit_generator_service import Segments, segments_from_ctest_text
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import time
+import uuid
+
+
+"""
+Read-through caches for serving a test to a whole class.
+
+Provides:
+- Snapshots of test rows, loaded once per process and TTL (concurrent misses share one query)
+- Rendered student form bodies with their ETag, tied to the snapshot they were rendered from
+
+Notes:
+    - Entries live at most CTEST_CACHE_TTL_SECONDS and never beyond the test's expires_at
+    - Caches are per process; invalidate_ctest only affects the current process,
+      other workers see a change once their entry's TTL has passed
+"""
+
+
+# Rough per-entry overhead of the Python objects around the cached strings
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+@dataclass(frozen=True, slots=True)
+class CachedCTest:
+    """
+    Immutable copy of the CTest columns needed to authorize and serve a test.
+
+    Attributes:
+        ctest_id (UUID): Test identifier
+        ctest_text (str): The test text with blanks
+        correct_answers (dict): Answer key, see CTest.correct_answers
+        segments (Segments): Text runs and blanks, derived from ctest_text for older tests
+        student_code (str): 6-digit access code for students
+        created_at (datetime): Creation timestamp (UTC), used as Last-Modified
+        expires_at (datetime): Expiration timestamp (UTC)
+    """
+    ctest_id: uuid.UUID
+    ctest_text: str
+    correct_answers: dict
+    segments: Segments
+    student_code: str
+    created_at: datetime
+    expires_at: datetime
+
+    @property
+    def nbytes(self) -> int:
+        answer_bytes = sum(len(str(key)) + len(str(value)) for key, value in self.correct_answers.items())
+        # segments repeat the text runs of ctest_text
+        return 2 * len(self.ctest_text.encode("utf-8")) + answer_bytes + _ENTRY_OVERHEAD_BYTES
+
+
+@dataclass(frozen=True, slots=True)
+class CachedForm:
+    """
+    Rendered ctest-form.html body for one test and base URL.
+
+    Attributes:
+        test (CachedCTest): Snapshot the body was rendered from
+        body (bytes): UTF-8 encoded HTML
+        etag (str): Strong ETag derived from body
+    """
+    test: CachedCTest
+    body: bytes
+    etag: str
+
+
+# Test snapshots keyed by canonical ctest_id string
+ctest_cache = ByteBudgetLRUCache(CTEST_CACHE_MAX_BYTES, lambda test: test.nbytes)
+# Rendered forms keyed by (ctest_id, base_url); url_for in the template depends on the base URL
+form_cache = ByteBudgetLRUCache(FORM_CACHE_MAX_BYTES, lambda form: len(form.body) + _ENTRY_OVERHEAD_BYTES)
+# Row loads in progress, shared by concurrent requests for the same test
+_loading: dict[str, asyncio.Task] = {}
+
+
+def _cache_expiry(test: CachedCTest) -> float:
+    return min(time.time() + CTEST_CACHE_TTL_SECONDS, test.expires_at.timestamp())
+
+
+async def _load_ctest(key: str) -> CachedCTest | None:
+    async with AsyncSessionLocal() as db:
+        row = await get_ctest(db, key, CTest.ctest_text, CTest.correct_answers, CTest.segments)
+    if row is None:
+        return None
+    segments = row.segments
+    if segments is None:
+        segments = segments_from_ctest_text(row.ctest_text, row.correct_answers)
+    test = CachedCTest(
+        row.ctest_id, row.ctest_text, row.correct_answers, segments, row.student_code, row.created_at, row.expires_at
+    )
+    ctest_cache.put(key, test, expires_at=_cache_expiry(test))
+    return test
+
+
+async def get_cached_ctest(ctest_id: str) -> CachedCTest | None:
+    """
+    Read-through access to the test row cache.
+
+    Args:
+        ctest_id (str): Test identifier from the URL
+
+    Returns:
+        CachedCTest | None: Snapshot of the test, None if ctest_id is not a
+            valid UUID or no such test exists. Expired tests are returned
+            (but not cached), callers check expires_at.
+
+    Notes:
+        - Concurrent misses for the same test wait for a single query
+        - The query uses its own session, so it completes even if the
+          request that started it is cancelled
+    """
+    try:
+        key = str(uuid.UUID(ctest_id))
+    except ValueError:
+        return None
+
+    test = ctest_cache.get(key)
+    if test is not None:
+        return test
+
+    task = _loading.get(key)
+    if task is None:
+        task = asyncio.create_task(_load_ctest(key))
+        _loading[key] = task
+        task.add_done_callback(lambda _: _loading.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def get_cached_form(test: CachedCTest, base_url: str) -> CachedForm | None:
+    """Return the cached form body of test, if it was rendered from this very snapshot."""
+    form = form_cache.get((str(test.ctest_id), base_url))
+    if form is None or form.test is not test:
+        return None
+    return form
+
+
+def cache_form(test: CachedCTest, base_url: str, body: bytes) -> CachedForm:
+    """
+    Store a rendered form body for test.
+
+    Returns:
+        CachedForm: The stored entry, including its ETag
+    """
+    form = CachedForm(test, body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+    form_cache.put((str(test.ctest_id), base_url), form, expires_at=_cache_expiry(test))
+    return form
+
+
+def invalidate_ctest(ctest_id: str | uuid.UUID) -> None:
+    """
+    Drop a test from the row cache after it was changed or deleted.
+
+    The id is normalized like in get_cached_ctest, so any spelling of the UUID
+    drops the entry. Cached forms of the old snapshot are no longer served
+    (see get_cached_form).
+    """
+    try:
+        key = str(uuid.UUID(str(ctest_id)))
+    except ValueError:
+        return
+    ctest_cache.pop(key)
@@ -1,34 +1,177 @@
-from app.services.ctest_unit_generator_service import BLANK_SYMBOL
+from app.core.cache import ByteBudgetLRUCache
+from app.core.config import PDF_CACHE_MAX_BYTES
+from app.core.metrics import stage_timer
+from app.services.ctest_unit_generator_service import BLANK_SYMBOL, Segments, create_ctest_unit, get_text_analysis, select_blank_variants
+from app.services.text_analysis_service import text_key
+from app.services.worker_pool_service import worker_pool
 
+import copy
+from fontTools import subset, ttLib
 from fpdf import FPDF, XPos, YPos
+from fpdf.fonts import SubsetMap, TTFFont
+from io import BytesIO
 import os
+import threading
+import zipfile
 
 
 
 
 
+# Bump whenever render_pdf_test changes its output, invalidates cached PDFs and ETags
+PDF_LAYOUT_VERSION = 1
+
 FONT_PATH_REGULAR = os.path.join(os.getcwd(), "frontend", "fonts", "Tinos-Regular.ttf")
 FONT_PATH_BOLD = os.path.join(os.getcwd(), "frontend", "fonts", "Tinos-Bold.ttf")
+FONT_FAMILY = "TimesNewRoman"
+FONT_FILES = {"": FONT_PATH_REGULAR, "B": FONT_PATH_BOLD}
+
+# Tables a PDF never needs: hinting/device metrics and OpenType layout (fpdf2 drops layout tables anyway)
+FONT_DROPPED_TABLES = ["VDMX", "hdmx", "LTSH", "kern", "GPOS", "GSUB", "GDEF", "DSIG", "gasp", "FFTM", "meta"]
+
+# style -> (slimmed font bytes, parsed TTFFont used as template), filled once per process
+_font_templates: dict[str, tuple[bytes, TTFFont]] = {}
+_font_lock = threading.Lock()
 
 
+def _slim_font(path: str) -> bytes:
+    """Return the font at path with all glyphs but without hinting and unused tables."""
+    font = ttLib.TTFont(path, recalcTimestamp=False)
+    options = subset.Options(hinting=False, glyph_names=True, notdef_outline=True, recommended_glyphs=True)
+    options.drop_tables += FONT_DROPPED_TABLES
+    options.layout_features = []
+    options.name_IDs = ["*"]
+    options.name_languages = ["*"]
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=font.getBestCmap().keys())
+    subsetter.subset(font)
+    output = BytesIO()
+    font.save(output)
+    return output.getvalue()
 
-async def format_blanks(original_text: str) -> str:
+
+def load_fonts() -> None:
     """
-    Normalize blank symbol formatting in C-Test text.
+    Read and parse the Tinos font files once per process.
+
+    Notes:
+        - Called lazily by the first rendered document, or eagerly at startup
+        - Keeps slimmed font bytes (about 45% of the original files) and the
+          parsed metrics (widths, cmap, glyph ids) in memory
+    """
+    if _font_templates:
+        return
+    with _font_lock:
+        if _font_templates:
+            return
+        loader = FPDF()
+        for style, path in FONT_FILES.items():
+            font_bytes = _slim_font(path)
+            fontkey = f"{FONT_FAMILY.lower()}{style}"
+            loader.fonts[fontkey] = TTFFont(loader, BytesIO(font_bytes), fontkey, style)
+            _font_templates[style] = (font_bytes, loader.fonts[fontkey])
+
+
+def _add_preloaded_fonts(pdf: FPDF) -> None:
+    """
+    Register the preloaded fonts on a new document without re-parsing the TTF files.
+
+    Parsed metrics are shared with the templates; every document gets its own
+    lazily loaded fontTools object and glyph subset, because fpdf2 subsets the
+    font object in place when writing the document.
+    """
+    load_fonts()
+    for style, (font_bytes, template) in _font_templates.items():
+        font = copy.copy(template)
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = ttLib.TTFont(BytesIO(font_bytes), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.missing_glyphs = []
+        font.subset = SubsetMap(font)
+        pdf.fonts[f"{FONT_FAMILY.lower()}{style}"] = font
+
+
+def format_segments(segments: Segments) -> str:
+    """
+    Build the printable C-Test text from its segments.
 
     Args:
-        original_text (str): The C-Test text containing blank symbols.
+        segments (Segments): Text runs and [blank_index, length] blanks
 
     Returns:
-        str: Text with consistent spacing after each blank symbol.
+        str: Text with one spaced blank symbol per missing character.
 
     Example:
-        >>> format_blanks("This is a_[test]")
-        'This is a_ [test]'
+        >>> format_segments(["This is a", [0, 2], " test"])
+        'This is a_ _  test'
+    """
+    return "".join(
+        segment if isinstance(segment, str) else f"{BLANK_SYMBOL} " * segment[1]
+        for segment in segments
+    )
+
+# Rendered PDFs keyed by pdf_cache_key, bounded by PDF_CACHE_MAX_BYTES
+pdf_cache = ByteBudgetLRUCache(PDF_CACHE_MAX_BYTES, len)
+
+
+def pdf_cache_key(original_text: str, difficulty: str) -> str:
+    """
+    Identify the PDF generated for a text and difficulty.
+
+    Args:
+        original_text (str): Normalized input text
+        difficulty (str): Difficulty level
+
+    Returns:
+        str: "<text hash>-<difficulty>-v<layout version>", also used as ETag
+    """
+    return f"{text_key(original_text)}-{difficulty}-v{PDF_LAYOUT_VERSION}"
+
+
+async def get_pdf_test(original_text: str, difficulty: str) -> bytes:
+    """
+    Read-through access to the PDF cache.
+
+    Generation is deterministic, so a cached document is exactly what a new
+    rendering of the same text, difficulty and layout version would contain.
+
+    Args:
+        original_text (str): Normalized input text
+        difficulty (str): Difficulty level
+
+    Returns:
+        bytes: Complete PDF document (test and answer key)
+
+    Raises:
+        ValueError, IOError: Propagated from generation and rendering
+        WorkerPoolBusyError: If the worker pool queue is full
+    """
+    key = pdf_cache_key(original_text, difficulty)
+    document = pdf_cache.get(key)
+    if document is None:
+        _, _, segments = await create_ctest_unit(original_text, difficulty)
+        document = await create_pdf_test(segments, original_text)
+        pdf_cache.put(key, document)
+    return document
+
+
+async def create_pdf_test(segments: Segments, original_text: str) -> bytes:
+    """
+    Render the C-Test PDF in the shared worker pool without blocking the event loop.
+
+    Args:
+        segments (Segments): Test as text runs and blanks, see select_blanks
+        original_text (str): Unmodified source text for answer key
+
+    Returns:
+        bytes: Complete PDF document
+
+    Raises:
+        ValueError, IOError: Propagated from render_pdf_test
+        WorkerPoolBusyError: If the worker pool queue is full
     """
-    return original_text.replace(BLANK_SYMBOL, f"{BLANK_SYMBOL} ")
+    return await worker_pool.run(render_pdf_test, segments, original_text)
 
-async def create_pdf_test(ctest_text: str, original_text: str, path: str) -> None:
+def render_pdf_test(segments: Segments, original_text: str) -> bytes:
     """
     Generate a two-page PDF document containing test and answer key.
 
@@ -41,39 +184,163 @@ async def create_pdf_test(ctest_text: str, original_text: str, path: str) -> Non
     - Uses bold header with regular body text
 
     Args:
-        ctest_text (str): Processed text with blank symbols
+        segments (Segments): Test as text runs and blanks, see select_blanks
         original_text (str): Unmodified source text for answer key
-        path (str): Absolute filesystem path for PDF output
+
+    Returns:
+        bytes: PDF document rendered in memory
 
     Raises:
         ValueError: If either text parameter is empty/whitespace
-        IOError: If PDF file cannot be created at specified path
+        IOError: If the PDF cannot be rendered
 
     Notes:
         - Requires Tinos font files in frontend/fonts/ directory
+        - Font files are parsed once per process (see load_fonts)
         - Sets consistent 12pt font size throughout
     """
-    if not ctest_text.strip() or not original_text.strip():
+    formatted_text = format_segments(segments)
+    if not formatted_text.strip() or not original_text.strip():
         raise ValueError("Input text is not allowed to be empty.")
 
-    formatted_text = await format_blanks(ctest_text)
-
     try:
-        pdf = FPDF()
-        pdf.add_page()
+        with stage_timer("create_pdf_test", "font_setup"):
+            pdf = FPDF()
+            pdf.add_page()
+            _add_preloaded_fonts(pdf)
+
+        with stage_timer("create_pdf_test", "layout"):
+            pdf.set_font("TimesNewRoman", size=12)
+            pdf.write(text=formatted_text)
+
+            pdf.add_page()
+            pdf.set_font("TimesNewRoman", style="B", size=12)
+            pdf.cell(text="Lösungen", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+            pdf.set_font("TimesNewRoman", size=12)
+            pdf.write(text=original_text)
+
+        with stage_timer("create_pdf_test", "output"):
+            return bytes(pdf.output())
+    except Exception as e:
+        raise IOError(f"Failed to create PDF: {e}")
+
+def variant_cache_key(original_text: str, difficulty: str, variant_count: int, seed: int, document_format: str) -> str:
+    """Identify a set of seeded variants, see pdf_cache_key."""
+    return f"{pdf_cache_key(original_text, difficulty)}-{variant_count}x{seed}.{document_format}"
+
+async def get_variant_documents(original_text: str, difficulty: str, variant_count: int, seed: int, document_format: str) -> bytes:
+    """
+    Build a set of differently blanked C-Tests of one text as PDF or ZIP.
+
+    Args:
+        original_text (str): Normalized input text
+        difficulty (str): Difficulty level
+        variant_count (int): Number of blank layouts
+        seed (int): Seed of the set; equal seeds give equal documents
+        document_format (str): "pdf" for one merged document,
+            "zip" for an archive with one PDF per variant
+
+    Returns:
+        bytes: PDF document or ZIP archive
+
+    Raises:
+        ValueError, IOError: Propagated from generation and rendering
+        WorkerPoolBusyError: If the worker pool queue cannot take the rendering jobs
 
-        pdf.add_font("TimesNewRoman", fname=FONT_PATH_REGULAR)
-        pdf.add_font("TimesNewRoman", style="B", fname=FONT_PATH_BOLD)
-        pdf.set_font("TimesNewRoman", size=12)
-        pdf.write(text=formatted_text)
+    Workflow:
+        1. The text is parsed once (or taken from the analysis cache)
+        2. All layouts are derived from that analysis (see select_blank_variants)
+        3. "zip": every variant is rendered as its own job, in parallel across the
+           worker pool; "pdf": all variants are rendered into one document by one job
+           (fpdf2 cannot append the pages of separately rendered PDFs, and merging
+           them afterwards would need a PDF library and embed the fonts once per variant)
+        4. The result is cached like single PDFs
+    """
+    if document_format not in ("pdf", "zip"):
+        raise ValueError("Invalid format. Must be 'pdf' or 'zip'.")
+
+    key = variant_cache_key(original_text, difficulty, variant_count, seed, document_format)
+    document = pdf_cache.get(key)
+    if document is not None:
+        return document
+
+    analysis = await get_text_analysis(original_text)
+    variants = [
+        (number, segments)
+        for number, (_, _, segments) in enumerate(select_blank_variants(original_text, analysis, difficulty, variant_count, seed), start=1)
+    ]
+    if document_format == "pdf":
+        document = await worker_pool.run(render_variant_pdf, variants, original_text)
+    else:
+        documents = await worker_pool.run_many(render_variant_pdf, [([variant], original_text) for variant in variants])
+        archive = BytesIO()
+        # PDF streams are already compressed
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zip_file:
+            for (number, _), variant_document in zip(variants, documents):
+                zip_file.writestr(f"variante_{number:02d}.pdf", variant_document)
+        document = archive.getvalue()
+
+    pdf_cache.put(key, document)
+    return document
+
+def _solution_runs(segments: Segments, original_text: str):
+    """
+    Split the original text into runs that are (True) or are not (False) blanked.
+
+    Blanks replace characters one by one, so segment lengths are offsets into original_text.
+    """
+    position = 0
+    for segment in segments:
+        length = len(segment) if isinstance(segment, str) else segment[1]
+        if length:
+            yield original_text[position:position + length], not isinstance(segment, str)
+        position += length
+
+def render_variant_pdf(variants: list[tuple[int, Segments]], original_text: str) -> bytes:
+    """
+    Generate one PDF with a test and a matching answer key for every variant.
+
+    For each variant:
+    - Bold header "Variante <number>" followed by the formatted C-Test
+    - New page with header "Lösungen – Variante <number>" and the original
+      text, where the blanked parts are printed in bold
+
+    Args:
+        variants (list[tuple[int, Segments]]): (variant number, segments) pairs
+        original_text (str): Unmodified source text all variants were derived from
+
+    Returns:
+        bytes: PDF document rendered in memory
+
+    Raises:
+        ValueError: If no variants are given or a text is empty/whitespace
+        IOError: If the PDF cannot be rendered
+    """
+    if not variants or not original_text.strip():
+        raise ValueError("Input text is not allowed to be empty.")
+
+    try:
+        with stage_timer("create_pdf_variants", "font_setup"):
+            pdf = FPDF()
+            _add_preloaded_fonts(pdf)
 
-        pdf.add_page()
-        pdf.set_font("TimesNewRoman", style="B", size=12)
-        pdf.cell(text="Lösungen", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        with stage_timer("create_pdf_variants", "layout"):
+            for number, segments in variants:
+                pdf.add_page()
+                pdf.set_font("TimesNewRoman", style="B", size=12)
+                pdf.cell(text=f"Variante {number}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+                pdf.set_font("TimesNewRoman", size=12)
+                pdf.write(text=format_segments(segments))
 
-        pdf.set_font("TimesNewRoman", size=12)
-        pdf.write(text=original_text)
+                pdf.add_page()
+                pdf.set_font("TimesNewRoman", style="B", size=12)
+                pdf.cell(text=f"Lösungen – Variante {number}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+                for run, blanked in _solution_runs(segments, original_text):
+                    pdf.set_font("TimesNewRoman", style="B" if blanked else "", size=12)
+                    pdf.write(text=run)
 
-        pdf.output(path)
+        with stage_timer("create_pdf_variants", "output"):
+            return bytes(pdf.output())
     except Exception as e:
         raise IOError(f"Failed to create PDF: {e}")
\ No newline at end of file
@@ -0,0 +1,174 @@
+from app.core.config import RESULTS_BUCKET_WIDTH
+from app.db.database import AsyncSessionLocal
+from app.models.submission import Submission
+
+import asyncio
+import base64
+from datetime import datetime
+import uuid
+from sqlalchemy import Integer, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+"""
+Submission listings and score statistics for the teacher results pages.
+
+Everything is computed in SQL from the indexed (ctest_id, submitted_at,
+submission_id) columns and the percentage column; the JSON blobs of a
+submission are only read for its detail page.
+
+Submissions stored before the percentage column existed are filled in by
+backfill_percentages; until then their percentage is read from score_data:
+    python -m app.cli backfill-percentages
+"""
+
+
+# Percentage of a submission, taken from score_data while the column is not backfilled
+_percentage = func.coalesce(Submission.percentage, Submission.score_data["percentage"].as_float())
+
+
+# Copy score_data["percentage"] into the column for up to :batch_size submissions that lack it
+_BACKFILL_PERCENTAGES = text("""
+    UPDATE submissions SET percentage = CAST(score_data->>'percentage' AS DOUBLE PRECISION)
+    WHERE submission_id IN (
+        SELECT submission_id FROM submissions
+        WHERE percentage IS NULL AND score_data->>'percentage' IS NOT NULL
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+def encode_cursor(submitted_at: datetime, submission_id: uuid.UUID) -> str:
+    """Opaque keyset cursor pointing after the given submission."""
+    return base64.urlsafe_b64encode(f"{submitted_at.isoformat()}|{submission_id}".encode()).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    try:
+        submitted_at, submission_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode().split("|")
+        return datetime.fromisoformat(submitted_at), uuid.UUID(submission_id)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {e}")
+
+
+async def get_submission_page(db: AsyncSession, ctest_id: uuid.UUID, limit: int, after: str | None = None) -> tuple[list[dict], str | None]:
+    """
+    One page of a test's submissions, newest first, using keyset pagination.
+
+    Args:
+        db (AsyncSession): Active database session
+        ctest_id (UUID): Test identifier
+        limit (int): Page size
+        after (str | None): Cursor returned for the previous page
+
+    Returns:
+        tuple: (rows, next_cursor)
+            - rows: [{"submission_id", "submitted_at", "percentage",
+                      "correct_count", "total_count"}, ...]
+            - next_cursor: Cursor of the following page, None on the last page
+
+    Raises:
+        ValueError: For an invalid cursor
+
+    Notes:
+        - Cost per page does not depend on how many pages precede it
+    """
+    statement = (
+        select(
+            Submission.submission_id,
+            Submission.submitted_at,
+            _percentage.label("percentage"),
+            Submission.score_data["correct_count"].as_integer().label("correct_count"),
+            Submission.score_data["total_count"].as_integer().label("total_count"),
+        )
+        .filter(Submission.ctest_id == ctest_id)
+        .order_by(Submission.submitted_at.desc(), Submission.submission_id.desc())
+        .limit(limit + 1)
+    )
+    if after:
+        submitted_at, submission_id = decode_cursor(after)
+        statement = statement.filter(
+            tuple_(Submission.submitted_at, Submission.submission_id) < tuple_(submitted_at, submission_id)
+        )
+
+    rows = [dict(row) for row in (await db.execute(statement)).mappings()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["submitted_at"], rows[-1]["submission_id"])
+    return rows, next_cursor
+
+
+async def get_score_summary(db: AsyncSession, ctest_id: uuid.UUID) -> dict:
+    """
+    Summary statistics over all submissions of a test.
+
+    Returns:
+        dict: {
+            "count": int,             # scored submissions, the ones all figures are computed over
+            "mean": float | None,     # mean percentage
+            "median": float | None,   # median percentage (percentile_cont)
+            "min": float | None,
+            "max": float | None,
+            "distribution": [{"lower": int, "upper": int, "count": int}, ...]
+                # one bucket of RESULTS_BUCKET_WIDTH percent each, 100% in the last one
+        }
+    """
+    summary = (await db.execute(
+        select(
+            func.count(_percentage),
+            func.avg(_percentage),
+            func.percentile_cont(0.5).within_group(_percentage),
+            func.min(_percentage),
+            func.max(_percentage),
+        ).filter(Submission.ctest_id == ctest_id)
+    )).one()
+
+    bucket_count = max(1, 100 // RESULTS_BUCKET_WIDTH)
+    bucket = func.least(func.width_bucket(_percentage, 0, 100, bucket_count), bucket_count).cast(Integer)
+    counts = dict((await db.execute(
+        select(bucket, func.count()).filter(Submission.ctest_id == ctest_id, _percentage.isnot(None)).group_by(bucket)
+    )).all())
+
+    width = 100 / bucket_count
+    return {
+        "count": summary[0],
+        "mean": summary[1],
+        "median": summary[2],
+        "min": summary[3],
+        "max": summary[4],
+        "distribution": [
+            {"lower": round(index * width), "upper": round((index + 1) * width), "count": counts.get(index + 1, 0)}
+            for index in range(bucket_count)
+        ],
+    }
+
+
+async def backfill_percentages(batch_size: int, pause: float = 0.0) -> int:
+    """
+    Fill the percentage column of older submissions, batch_size submissions per transaction.
+
+    Args:
+        batch_size (int): Submissions updated per transaction
+        pause (float): Seconds to sleep between batches
+
+    Returns:
+        int: Number of submissions updated
+    """
+    updated = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            rows = (await db.execute(_BACKFILL_PERCENTAGES, {"batch_size": batch_size})).rowcount
+            await db.commit()
+            updated += rows
+            if rows < batch_size:
+                break
+            await asyncio.sleep(pause)
+    return updated
@@ -1,5 +1,10 @@
-import spacy
+from app.core.metrics import stage_timer
+from app.services.text_analysis_service import TextAnalysis, analysis_cache, analyze_text, analyze_texts, check_text_length, reanalyze_text, text_key
+from app.services.worker_pool_service import worker_pool
+
+import numpy
 import random
+from spacy.parts_of_speech import IDS as POS_IDS
 
 BLANK_COEFF = {
     "easy": 0.1,
@@ -13,14 +18,108 @@ TEST_EXPIRATION_DAYS = 7
 BLANK_SYMBOL = "_"
 
 
-async def create_ctest_unit(original_text: str, difficulty: str) -> tuple[str, dict[int, dict[str, str]]]:
+# Compact rendering of a test: text runs (str) alternating with blanks ([blank_index, length])
+Segments = list[str | list[int]]
+
+
+async def create_ctest_unit(original_text: str, difficulty: str) -> tuple[str, dict[int, dict[str, str]], Segments]:
     """
-    Generates a C-Test by strategically blanking words in the input text.
+    Generates a C-Test without blocking the event loop.
 
     Args:
         original_text (str): The source text to transform into a test
         difficulty (str): Difficulty level ('easy', 'medium', or 'hard')
 
+    Returns:
+        tuple: Test text, answer key and segments, see select_blanks
+
+    Raises:
+        ValueError: Propagated from select_blanks
+        WorkerPoolBusyError: If the worker pool queue is full
+    """
+    if difficulty not in BLANK_COEFF:
+        raise ValueError("Invalid difficulty. Must be 'easy', 'medium', or 'hard'.")
+
+    analysis = await get_text_analysis(original_text)
+    return select_blanks(original_text, analysis, difficulty)
+
+async def get_text_analysis(original_text: str, previous_key: str | None = None) -> TextAnalysis:
+    """
+    Returns the analysis of a text, parsing it in the worker pool only on a cache miss.
+
+    Args:
+        original_text (str): Normalized input text
+        previous_key (str | None): Cache key of an earlier version of the text;
+            if that analysis is still cached, only changed sentences are re-parsed
+
+    Raises:
+        ValueError: If the text is longer than MAX_INPUT_CHARS (checked before anything else)
+        WorkerPoolBusyError: If the text must be parsed and the worker pool queue is full
+    """
+    check_text_length(original_text)
+    key = text_key(original_text)
+    analysis = analysis_cache.get(key)
+    if analysis is None:
+        previous = analysis_cache.get(previous_key) if previous_key else None
+        if previous is not None:
+            analysis = await worker_pool.run(reanalyze_text, original_text, previous)
+        else:
+            analysis = await worker_pool.run(analyze_text, original_text)
+        analysis_cache.put(key, analysis)
+    return analysis
+
+async def get_text_analyses(texts: list[str]) -> list[TextAnalysis]:
+    """
+    Returns analyses for many texts, parsing all cache misses in a single worker pool job.
+
+    Args:
+        texts (list[str]): Normalized input texts
+
+    Returns:
+        list[TextAnalysis]: One analysis per text, in input order
+
+    Raises:
+        ValueError: If a text is longer than MAX_INPUT_CHARS (checked before anything else)
+        WorkerPoolBusyError: If texts must be parsed and the worker pool queue is full
+
+    Notes:
+        - Cache misses are parsed together with one batched nlp.pipe call
+        - Identical texts are parsed once
+    """
+    for text in texts:
+        check_text_length(text)
+    analyses: dict[str, TextAnalysis] = {}
+    missing: dict[str, str] = {}
+    keys = [text_key(text) for text in texts]
+    for key, text in zip(keys, texts):
+        if key in analyses or key in missing:
+            continue
+        analysis = analysis_cache.get(key)
+        if analysis is None:
+            missing[key] = text
+        else:
+            analyses[key] = analysis
+
+    if missing:
+        parsed = await worker_pool.run(analyze_texts, list(missing.values()))
+        for key, analysis in zip(missing, parsed):
+            analysis_cache.put(key, analysis)
+            analyses[key] = analysis
+    return [analyses[key] for key in keys]
+
+@stage_timer("create_ctest_unit", "blank_selection")
+def select_blanks(original_text: str, analysis: TextAnalysis, difficulty: str, target_pos: set[str] = TARGET_POS, rng: numpy.random.Generator | None = None) -> tuple[str, dict[int, dict[str, str]], Segments]:
+    """
+    Generates a C-Test by blanking eligible words of an analysed text.
+
+    Args:
+        original_text (str): The text the analysis was computed from
+        analysis (TextAnalysis): Token annotations of original_text
+        difficulty (str): Difficulty level ('easy', 'medium', or 'hard')
+        target_pos (set[str]): Coarse POS tags of words that may be blanked
+        rng (numpy.random.Generator | None): If given, each sentence blanks a random
+            subset of its eligible words (same quota) instead of the first ones
+
     Returns:
         tuple: Contains:
             - str: Modified text with blanked words
@@ -31,61 +130,129 @@ async def create_ctest_unit(original_text: str, difficulty: str) -> tuple[str, d
                         "length": str   # Length of blank in characters
                     }
                 }
+            - list: Segments, the test as alternating text runs and blanks:
+                ["Der Hu", [0, 2], " läuft ", [1, 3], ...]
+                Consecutive blanks are separated by (possibly empty) text runs
 
     Raises:
-        ValueError: If:
-            - Invalid difficulty level provided
-            - Input text is too short (<3 sentences)
-            
+        ValueError: For an invalid difficulty or POS tag, or a text with too few sentences (<3)
+
     Algorithm:
-        1. Uses spaCy for German language processing
-        2. Targets nouns, verbs, adjectives and adverbs
-        3. Blanks are created from word midpoints
-        4. Blank frequency scales with difficulty:
+        1. Targets nouns, verbs, adjectives and adverbs (target_pos)
+        2. Blanks are created from word midpoints
+        3. Blank frequency scales with difficulty, per sentence:
             - Easy: ~10% of eligible words
             - Medium: ~40%
             - Hard: ~70%
+
+    Notes:
+        - Eligibility and per-sentence quotas are computed on whole arrays;
+          only the chosen words are visited in Python
     """
     if difficulty not in BLANK_COEFF:
         raise ValueError("Invalid difficulty. Must be 'easy', 'medium', or 'hard'.")
+    if analysis.sentence_count < MINIMAL_TEXT_LENGTH:
+        raise ValueError("Der eingegebene Text ist zu kurz für einen C-Test.")
 
-    nlp = spacy.load("de_core_news_sm")
-    doc = nlp(original_text)
-    sentences = list(doc.sents)
+    unknown_pos = set(target_pos) - POS_IDS.keys()
+    if not target_pos or unknown_pos:
+        raise ValueError(f"Invalid part-of-speech tags: {sorted(unknown_pos) or 'none given'}")
 
-    if len(sentences) < MINIMAL_TEXT_LENGTH:
-        raise ValueError("Der eingegebene Text ist zu kurz für einen C-Test.")
+    target_ids = numpy.array([POS_IDS[pos] for pos in target_pos], dtype=numpy.uint8)
+    eligible = numpy.flatnonzero(
+        numpy.isin(analysis.pos, target_ids) & analysis.alpha & (analysis.lengths >= MINIMAL_WORD_LENGTH)
+    )
+    eligible_sentences = analysis.sentence_ids[eligible]
+    eligible_per_sentence = numpy.bincount(eligible_sentences, minlength=analysis.sentence_count)
+    max_blanks = numpy.maximum(1, (eligible_per_sentence * BLANK_COEFF[difficulty]).astype(numpy.int64))
+    rank_in_sentence = numpy.arange(len(eligible)) - numpy.searchsorted(eligible_sentences, eligible_sentences)
+    if rng is not None:
+        # Rank words by a random key within their sentence; the order stays sorted by sentence
+        shuffled = numpy.lexsort((rng.random(len(eligible)), eligible_sentences))
+        random_rank = numpy.empty_like(rank_in_sentence)
+        random_rank[shuffled] = rank_in_sentence
+        rank_in_sentence = random_rank
+    chosen = eligible[rank_in_sentence < max_blanks[eligible_sentences]]
+
+    ctest_parts: list[str] = []
+    segments: Segments = []
+    correct_answers: dict[int, dict[str, str]] = {}
+    cursor = 0
+    for blank_index, (start, length) in enumerate(zip(analysis.starts[chosen].tolist(), analysis.lengths[chosen].tolist())):
+        end = start + length
+        mid = (start + end) // 2
+        blank_length = end - mid
+
+        ctest_parts.append(original_text[cursor:mid])
+        ctest_parts.append(BLANK_SYMBOL * blank_length)
+        segments.append(original_text[cursor:mid])
+        segments.append([blank_index, blank_length])
+        correct_answers[blank_index] = {"answer": original_text[mid:end], "length": str(blank_length)}
+        cursor = end
+    ctest_parts.append(original_text[cursor:])
+    segments.append(original_text[cursor:])
 
-    blanks_per_sentence_coeff: float = BLANK_COEFF[difficulty]
-    ctest_chars: list[str] = list(original_text)
-    correct_answers: dict[int, dict[str, str]]  = {}
-    blank_index: int = 0
+    ctest_output: str = "".join(ctest_parts)
+    return ctest_output, correct_answers, segments
 
-    for sentence in sentences:
-        eligible_words = [w for w in sentence if w.pos_ in TARGET_POS and w.is_alpha and len(w.text) >= MINIMAL_WORD_LENGTH]
-        max_blanks = max(1, int(len(eligible_words) * blanks_per_sentence_coeff))
-        blanks_created = 0
+def segments_from_ctest_text(ctest_text: str, correct_answers: dict) -> Segments:
+    """
+    Derive segments for tests stored before segments were persisted.
 
-        for word in eligible_words:
-            if blanks_created >= max_blanks:
-                break
+    Every run of BLANK_SYMBOL is split into blanks of the stored answer lengths,
+    like the form scripts did; BLANK_SYMBOL in the original text is therefore
+    misread, exactly as before.
 
-            start = word.idx
-            end = start + len(word)
-            mid = (start + end) // 2
+    Args:
+        ctest_text (str): Test text with blanks
+        correct_answers (dict): Stored answer key (keys may be int or str)
 
-            blank_length = end - mid
-            blank_text = "".join(ctest_chars[mid:end])
+    Returns:
+        Segments: See select_blanks
+    """
+    lengths = [len(answer["answer"]) for _, answer in sorted(correct_answers.items(), key=lambda item: int(item[0]))]
+    segments: Segments = []
+    cursor = 0
+    blank_index = 0
+    position = ctest_text.find(BLANK_SYMBOL)
+    while position != -1 and blank_index < len(lengths):
+        segments.append(ctest_text[cursor:position])
+        segments.append([blank_index, lengths[blank_index]])
+        cursor = position + max(1, lengths[blank_index])
+        blank_index += 1
+        position = ctest_text.find(BLANK_SYMBOL, cursor)
+    segments.append(ctest_text[cursor:])
+    return segments
 
-            
-            ctest_chars[mid:end] = [BLANK_SYMBOL] * blank_length
+def variant_rng(seed: int, variant: int) -> numpy.random.Generator:
+    """Independent, reproducible random stream for one variant of a seeded test set."""
+    return numpy.random.default_rng([seed, variant])
 
-            correct_answers[blank_index] = {"answer": blank_text, "length": str(blank_length)}
-            blank_index += 1
-            blanks_created += 1
+def select_blank_variants(original_text: str, analysis: TextAnalysis, difficulty: str, variant_count: int, seed: int) -> list[tuple[str, dict[int, dict[str, str]], Segments]]:
+    """
+    Derive several blank layouts of one text from a single analysis.
 
-    ctest_output: str = "".join(ctest_chars)
-    return ctest_output, correct_answers
+    Args:
+        original_text (str): The text the analysis was computed from
+        analysis (TextAnalysis): Token annotations of original_text
+        difficulty (str): Difficulty level ('easy', 'medium', or 'hard')
+        variant_count (int): Number of layouts
+        seed (int): Seed of the whole set; equal seeds give equal variants
+
+    Returns:
+        list: One (ctest_text, correct_answers, segments) tuple per variant
+
+    Raises:
+        ValueError: Propagated from select_blanks
+
+    Notes:
+        - Every variant blanks the same number of words per sentence
+        - Short sentences have few candidate words, so variants may coincide there
+    """
+    return [
+        select_blanks(original_text, analysis, difficulty, rng=variant_rng(seed, variant))
+        for variant in range(variant_count)
+    ]
 
 async def generate_code():
     """
@@ -1,3 +1,75 @@
+from app.services.item_statistics_service import rebuild_item_statistics
+
+import json
+import uuid
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+"""Scoring of submissions against a test's answer key, and re-scoring after the key changed."""
+
+
+# Re-score every submission of a test in one statement: is_correct of the blanks in :accepted
+# ({position: [normalized accepted answers]}) is recomputed, then correct_count and percentage.
+# Only submissions whose results change are written.
+_RESCORE_SUBMISSIONS = text("""
+    WITH rescored AS (
+        SELECT
+            submissions.submission_id,
+            jsonb_object_agg(
+                results.key,
+                CASE WHEN jsonb_exists(CAST(:accepted AS jsonb), results.key)
+                    THEN jsonb_set(
+                        CAST(results.value AS jsonb), '{is_correct}',
+                        to_jsonb(jsonb_exists(CAST(:accepted AS jsonb) -> results.key, coalesce(results.value->>'student_answer', '')))
+                    )
+                    ELSE CAST(results.value AS jsonb)
+                END
+            ) AS details
+        FROM submissions
+        CROSS JOIN LATERAL json_each(submissions.score_data->'detailed_results') AS results
+        WHERE submissions.ctest_id = :ctest_id
+        GROUP BY submissions.submission_id
+    ),
+    counted AS (
+        SELECT
+            submission_id,
+            details,
+            (SELECT count(*) FROM jsonb_each(details) AS entry WHERE CAST(entry.value->>'is_correct' AS boolean)) AS correct_count
+        FROM rescored
+    ),
+    scored AS (
+        SELECT
+            counted.*,
+            CASE WHEN CAST(submissions.score_data->>'total_count' AS integer) > 0
+                THEN CAST(counted.correct_count AS double precision) * 100 / CAST(submissions.score_data->>'total_count' AS integer)
+                ELSE 0
+            END AS percentage
+        FROM counted JOIN submissions USING (submission_id)
+        WHERE CAST(submissions.score_data->'detailed_results' AS jsonb) IS DISTINCT FROM counted.details
+    )
+    UPDATE submissions SET
+        score_data = CAST(
+            CAST(submissions.score_data AS jsonb)
+            || jsonb_build_object('detailed_results', scored.details, 'correct_count', scored.correct_count, 'percentage', scored.percentage)
+            AS json
+        ),
+        percentage = scored.percentage
+    FROM scored
+    WHERE submissions.submission_id = scored.submission_id
+""")
+
+
+def normalize_answer(answer: str) -> str:
+    """Form in which answers are compared: lower case, surrounding whitespace removed."""
+    return answer.lower().strip()
+
+
+def accepted_answers(answer_entry: dict) -> set[str]:
+    """Normalized answers accepted for one blank: the expected answer and its alternatives."""
+    return {normalize_answer(answer) for answer in [answer_entry.get("answer", ""), *answer_entry.get("alternatives", [])]}
+
+
 async def calculate_score(correct_answers: dict, student_answers: dict):
     """
     Calculate scoring metrics by comparing student answers with correct solutions.
@@ -6,7 +78,8 @@ async def calculate_score(correct_answers: dict, student_answers: dict):
         correct_answers (dict): {
             position: {
                 "answer": str, 
-                "length": str
+                "length": str,
+                "alternatives": list[str]  # optional, further accepted answers
             }
         }
         student_answers (dict): {position: student_input}
@@ -34,10 +107,10 @@ async def calculate_score(correct_answers: dict, student_answers: dict):
         else:
             raise ValueError(f"Answer on position {position} not found")
 
-        normalized_student_answer = student_input.lower().strip()
-        normalized_expected_answer = expected_answer.lower().strip()
+        normalized_student_answer = normalize_answer(student_input)
+        normalized_expected_answer = normalize_answer(expected_answer)
 
-        is_correct = normalized_student_answer == normalized_expected_answer
+        is_correct = normalized_student_answer in accepted_answers(correct_answer_map)
         if is_correct:
             correct_count += 1
 
@@ -59,3 +132,62 @@ async def calculate_score(correct_answers: dict, student_answers: dict):
     }
 
 
+
+
+def add_alternatives(correct_answers: dict, alternatives: dict[int, list[str]]) -> tuple[dict, list[str]]:
+    """
+    Add accepted alternative answers to an answer key.
+
+    Args:
+        correct_answers (dict): Answer key, see CTest.correct_answers (not modified)
+        alternatives (dict[int, list[str]]): New accepted answers per blank position
+
+    Returns:
+        tuple: (amended_answers, changed_positions)
+            - amended_answers: Copy of the key with the alternatives merged in
+            - changed_positions: Positions (as keys of the answer key) that accept new answers
+
+    Raises:
+        ValueError: If a position does not exist in the answer key
+    """
+    amended = dict(correct_answers)
+    changed = []
+    for position, answers in alternatives.items():
+        key = str(position)
+        if key not in amended:
+            raise ValueError(f"Answer on position {position} not found")
+        entry = dict(amended[key])
+        known = accepted_answers(entry)
+        added = [answer.strip() for answer in answers if answer.strip() and normalize_answer(answer) not in known]
+        if not added:
+            continue
+        entry["alternatives"] = [*entry.get("alternatives", []), *dict.fromkeys(added)]
+        amended[key] = entry
+        changed.append(key)
+    return amended, changed
+
+
+async def rescore_submissions(db: AsyncSession, ctest_id: uuid.UUID, correct_answers: dict, positions: list[str]) -> int:
+    """
+    Re-score all submissions of a test for the given blank positions.
+
+    Args:
+        db (AsyncSession): Session holding the lock on the test; nothing is committed here
+        ctest_id (UUID): Test identifier
+        correct_answers (dict): Current answer key of the test
+        positions (list[str]): Positions whose accepted answers changed
+
+    Returns:
+        int: Number of submissions whose score changed
+
+    Notes:
+        - Runs as a single UPDATE in the database, submissions are never loaded
+          into Python; answers stored in score_data are already normalized
+        - The item statistics of the test are rebuilt afterwards
+    """
+    if not positions:
+        return 0
+    accepted = {position: sorted(accepted_answers(correct_answers[position])) for position in positions}
+    changed = (await db.execute(_RESCORE_SUBMISSIONS, {"ctest_id": ctest_id, "accepted": json.dumps(accepted)})).rowcount
+    await rebuild_item_statistics(db, [ctest_id])
+    return changed
@@ -0,0 +1,204 @@
+from app.core.config import ITEM_STATS_TOP_WRONG_ANSWERS
+from app.db.database import AsyncSessionLocal
+from app.models.ctest import CTest
+from app.models.item_statistics import BlankStatistic, BlankWrongAnswer
+
+import asyncio
+import uuid
+from sqlalchemy import select, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+"""
+Per-blank item statistics: how often each blank was answered correctly,
+how often a hint was used for it and its most common wrong answers.
+
+The aggregates live in blank_statistics / blank_wrong_answers and are updated
+with every submission, so reading them costs O(number of blanks) no matter
+how many submissions a test has. backfill_item_statistics rebuilds them from
+the stored submissions:
+    python -m app.cli backfill-items
+"""
+
+
+# Rebuild of a batch of tests from their submissions, locked against concurrent submissions
+_REBUILD_BLANK_STATISTICS = text("""
+    INSERT INTO blank_statistics (ctest_id, position, attempts, correct, hinted)
+    SELECT
+        submissions.ctest_id,
+        CAST(results.key AS integer),
+        count(*),
+        count(*) FILTER (WHERE CAST(results.value->>'is_correct' AS boolean)),
+        count(*) FILTER (WHERE translate(coalesce(submissions.given_hints->>results.key, ''), '_', '') <> '')
+    FROM submissions
+    CROSS JOIN LATERAL json_each(submissions.score_data->'detailed_results') AS results
+    WHERE submissions.ctest_id = ANY(:ctest_ids)
+    GROUP BY submissions.ctest_id, CAST(results.key AS integer)
+""")
+_REBUILD_WRONG_ANSWERS = text("""
+    INSERT INTO blank_wrong_answers (ctest_id, position, answer, count)
+    SELECT submissions.ctest_id, CAST(results.key AS integer), coalesce(results.value->>'student_answer', ''), count(*)
+    FROM submissions
+    CROSS JOIN LATERAL json_each(submissions.score_data->'detailed_results') AS results
+    WHERE submissions.ctest_id = ANY(:ctest_ids) AND NOT CAST(results.value->>'is_correct' AS boolean)
+    GROUP BY submissions.ctest_id, CAST(results.key AS integer), coalesce(results.value->>'student_answer', '')
+""")
+
+
+def _is_hinted(hint: str | None) -> bool:
+    # Hints are stored with "_" for every letter that was not revealed
+    return bool(hint) and hint.strip("_") != ""
+
+
+async def record_submission(db: AsyncSession, ctest_id: uuid.UUID, score_data: dict, given_hints: dict) -> None:
+    """
+    Add one scored submission to the item statistics of its test.
+
+    Args:
+        db (AsyncSession): Session of the submission; nothing is committed here
+        ctest_id (UUID): Test the submission belongs to
+        score_data (dict): Result of calculate_score
+        given_hints (dict): {position: str} as stored with the submission
+
+    Notes:
+        - Rows are upserted in position order, so concurrent submissions
+          of the same test lock them in the same order
+    """
+    results = sorted(score_data["detailed_results"].items(), key=lambda item: int(item[0]))
+    if not results:
+        return
+    hints = {str(position): hint for position, hint in given_hints.items()}
+
+    statistics = insert(BlankStatistic)
+    await db.execute(
+        statistics.on_conflict_do_update(
+            index_elements=[BlankStatistic.ctest_id, BlankStatistic.position],
+            set_={
+                "attempts": BlankStatistic.attempts + statistics.excluded.attempts,
+                "correct": BlankStatistic.correct + statistics.excluded.correct,
+                "hinted": BlankStatistic.hinted + statistics.excluded.hinted,
+            }
+        ),
+        [
+            {
+                "ctest_id": ctest_id,
+                "position": int(position),
+                "attempts": 1,
+                "correct": int(result["is_correct"]),
+                "hinted": int(_is_hinted(hints.get(str(position)))),
+            }
+            for position, result in results
+        ]
+    )
+
+    wrong_answers = [
+        {"ctest_id": ctest_id, "position": int(position), "answer": result["student_answer"], "count": 1}
+        for position, result in results if not result["is_correct"]
+    ]
+    if wrong_answers:
+        answers = insert(BlankWrongAnswer)
+        await db.execute(
+            answers.on_conflict_do_update(
+                index_elements=[BlankWrongAnswer.ctest_id, BlankWrongAnswer.position, BlankWrongAnswer.answer_hash],
+                set_={"count": BlankWrongAnswer.count + answers.excluded.count}
+            ),
+            wrong_answers
+        )
+
+
+async def get_item_statistics(db: AsyncSession, ctest_id: uuid.UUID, top_wrong_answers: int = ITEM_STATS_TOP_WRONG_ANSWERS) -> list[dict]:
+    """
+    Item statistics of every blank of a test that has been answered at least once.
+
+    Args:
+        db (AsyncSession): Active database session
+        ctest_id (UUID): Test identifier
+        top_wrong_answers (int): Most common wrong answers listed per blank
+
+    Returns:
+        list[dict]: In position order: [{
+            "position": int,
+            "attempts": int,
+            "correct": int,
+            "hinted": int,
+            "percent_correct": float,
+            "wrong_answers": [{"answer": str, "count": int}, ...]  # most common first
+        }, ...]
+    """
+    top = (
+        select(BlankWrongAnswer.answer, BlankWrongAnswer.count)
+        .where(BlankWrongAnswer.ctest_id == BlankStatistic.ctest_id, BlankWrongAnswer.position == BlankStatistic.position)
+        .order_by(BlankWrongAnswer.count.desc(), BlankWrongAnswer.answer)
+        .limit(top_wrong_answers)
+        .lateral("top_wrong_answers")
+    )
+    rows = await db.execute(
+        select(BlankStatistic.position, BlankStatistic.attempts, BlankStatistic.correct, BlankStatistic.hinted, top.c.answer, top.c.count)
+        .select_from(BlankStatistic)
+        .outerjoin(top, true())
+        .filter(BlankStatistic.ctest_id == ctest_id)
+        .order_by(BlankStatistic.position, top.c.count.desc(), top.c.answer)
+    )
+
+    items: dict[int, dict] = {}
+    for position, attempts, correct, hinted, answer, count in rows:
+        item = items.get(position)
+        if item is None:
+            item = items[position] = {
+                "position": position,
+                "attempts": attempts,
+                "correct": correct,
+                "hinted": hinted,
+                "percent_correct": correct / attempts * 100 if attempts else 0.0,
+                "wrong_answers": [],
+            }
+        if answer is not None:
+            item["wrong_answers"].append({"answer": answer, "count": count})
+    return list(items.values())
+
+
+async def rebuild_item_statistics(db: AsyncSession, ctest_ids: list[uuid.UUID]) -> None:
+    """
+    Recompute the item statistics of the given tests from their stored submissions.
+
+    Notes:
+        - Locks the tests' rows (FOR UPDATE), which waits for and blocks
+          submissions to them (FOR KEY SHARE) until the caller commits
+    """
+    await db.execute(text("SELECT 1 FROM c_tests WHERE ctest_id = ANY(:ctest_ids) FOR UPDATE"), {"ctest_ids": ctest_ids})
+    await db.execute(text("DELETE FROM blank_statistics WHERE ctest_id = ANY(:ctest_ids)"), {"ctest_ids": ctest_ids})
+    await db.execute(text("DELETE FROM blank_wrong_answers WHERE ctest_id = ANY(:ctest_ids)"), {"ctest_ids": ctest_ids})
+    await db.execute(_REBUILD_BLANK_STATISTICS, {"ctest_ids": ctest_ids})
+    await db.execute(_REBUILD_WRONG_ANSWERS, {"ctest_ids": ctest_ids})
+
+
+async def backfill_item_statistics(batch_size: int, pause: float = 0.0) -> int:
+    """
+    Rebuild the item statistics of all tests, batch_size tests per transaction.
+
+    Args:
+        batch_size (int): Tests rebuilt per transaction
+        pause (float): Seconds to sleep between batches
+
+    Returns:
+        int: Number of tests processed
+    """
+    processed = 0
+    last_id = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            statement = select(CTest.ctest_id).order_by(CTest.ctest_id).limit(batch_size)
+            if last_id is not None:
+                statement = statement.filter(CTest.ctest_id > last_id)
+            ctest_ids = list((await db.execute(statement)).scalars())
+            if not ctest_ids:
+                break
+            await rebuild_item_statistics(db, ctest_ids)
+            await db.commit()
+            processed += len(ctest_ids)
+            last_id = ctest_ids[-1]
+            if len(ctest_ids) < batch_size:
+                break
+            await asyncio.sleep(pause)
+    return processed
@@ -0,0 +1,235 @@
+from app.core.config import (
+    DB_PARTITION_MONTHS_AHEAD, REAPER_BATCH_PAUSE_SECONDS, REAPER_BATCH_SIZE, REAPER_MAX_BATCHES
+)
+from app.db.database import async_engine
+from app.db.partitioning import ensure_partitions, expired_partitions, is_partitioned
+
+import asyncio
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import logging
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+"""
+Deletion of expired tests, their submissions and item statistics, and of expired sessions.
+
+Expired tests are removed in bounded batches, each in its own short transaction,
+with a pause between batches. If c_tests is partitioned by expiry month
+(see app.db.partitioning), partitions that only hold expired tests are dropped
+as a whole and upcoming partitions are created.
+
+Runs periodically in the application (REAPER_INTERVAL_SECONDS) and on demand:
+    python -m app.cli reap
+"""
+
+
+logger = logging.getLogger(__name__)
+
+# Key of the session level advisory lock that keeps concurrent runs (several app workers, CLI) apart
+REAPER_LOCK_KEY = 0x63746573
+
+# One batch: lock up to :batch_size expired tests, delete their submissions, item statistics and the tests themselves
+_DELETE_EXPIRED_BATCH = text("""
+    WITH expired AS (
+        SELECT ctest_id FROM c_tests
+        WHERE expires_at < :now
+        ORDER BY expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    deleted_submissions AS (
+        DELETE FROM submissions USING expired
+        WHERE submissions.ctest_id = expired.ctest_id
+        RETURNING 1
+    ),
+    deleted_statistics AS (
+        DELETE FROM blank_statistics USING expired
+        WHERE blank_statistics.ctest_id = expired.ctest_id
+    ),
+    deleted_wrong_answers AS (
+        DELETE FROM blank_wrong_answers USING expired
+        WHERE blank_wrong_answers.ctest_id = expired.ctest_id
+    ),
+    deleted_tests AS (
+        DELETE FROM c_tests USING expired
+        WHERE c_tests.ctest_id = expired.ctest_id
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM deleted_tests), (SELECT count(*) FROM deleted_submissions)
+""")
+
+# Expired server-side sessions (SESSION_BACKEND=sql), :batch_size per transaction
+_DELETE_EXPIRED_SESSIONS = text("""
+    DELETE FROM http_sessions WHERE session_id IN (
+        SELECT session_id FROM http_sessions
+        WHERE expires_at < :now
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+
+@dataclass
+class ReapReport:
+    """
+    Outcome of one cleanup run.
+
+    Attributes:
+        started_at (datetime): Start of the run; tests that expired before it were deleted
+        tests_deleted (int): Deleted c_tests rows (including dropped partitions)
+        submissions_deleted (int): Deleted submissions rows
+        sessions_deleted (int): Deleted expired http_sessions rows
+        batches (int): Row deletion batches executed
+        partitions_dropped (list[str]): Dropped monthly partitions
+        partitions_created (list[str]): Created upcoming partitions
+        duration_seconds (float): Wall-clock time of the run
+        skipped (bool): True if another run held the lock, nothing was done
+    """
+    started_at: datetime
+    tests_deleted: int = 0
+    submissions_deleted: int = 0
+    sessions_deleted: int = 0
+    batches: int = 0
+    partitions_dropped: list[str] = field(default_factory=list)
+    partitions_created: list[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    skipped: bool = False
+
+    def as_dict(self) -> dict:
+        report = asdict(self)
+        report["started_at"] = self.started_at.isoformat()
+        return report
+
+    def summary(self) -> str:
+        if self.skipped:
+            return "Expired test cleanup skipped, another run is in progress"
+        return (
+            f"Expired test cleanup: {self.tests_deleted} tests and {self.submissions_deleted} submissions "
+            f"deleted in {self.batches} batches, {len(self.partitions_dropped)} partitions dropped, "
+            f"{self.sessions_deleted} expired sessions deleted "
+            f"({self.duration_seconds:.1f}s)"
+        )
+
+
+# Report of the most recent run in this process
+last_report: ReapReport | None = None
+
+
+async def _drop_expired_partition(connection: AsyncConnection, name: str, batch_size: int, pause: float, report: ReapReport) -> None:
+    # Submissions are not partitioned, remove those of the partition's tests in batches first
+    while True:
+        async with connection.begin():
+            deleted = (await connection.execute(text(
+                f"DELETE FROM submissions WHERE submission_id IN ("
+                f"SELECT submissions.submission_id FROM submissions JOIN {name} USING (ctest_id) "
+                f"LIMIT :batch_size)"
+            ), {"batch_size": batch_size})).rowcount
+        report.submissions_deleted += deleted
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(pause)
+
+    async with connection.begin():
+        for table in ("blank_statistics", "blank_wrong_answers"):
+            await connection.execute(text(f"DELETE FROM {table} USING {name} WHERE {table}.ctest_id = {name}.ctest_id"))
+        report.tests_deleted += (await connection.execute(text(f"SELECT count(*) FROM {name}"))).scalar()
+        await connection.execute(text(f"DROP TABLE {name}"))
+    report.partitions_dropped.append(name)
+
+
+async def reap_expired_tests(
+    batch_size: int = REAPER_BATCH_SIZE,
+    pause: float = REAPER_BATCH_PAUSE_SECONDS,
+    max_batches: int = REAPER_MAX_BATCHES,
+    now: datetime | None = None
+) -> ReapReport:
+    """
+    Delete tests that expired before now, together with their submissions.
+
+    Args:
+        batch_size (int): Tests deleted per transaction
+        pause (float): Seconds to sleep between batches
+        max_batches (int): Stop after this many batches of tests and as many of
+            sessions (0: until none are left)
+        now (datetime | None): Reference time, defaults to the current UTC time
+
+    Returns:
+        ReapReport: Rows reclaimed by this run (also kept in last_report)
+
+    Notes:
+        - Uses a single connection for the whole run, held across the pauses
+        - Batches lock their rows with SKIP LOCKED and never wait on requests
+        - Cached test snapshots need no invalidation: their TTL ends at expires_at
+    """
+    global last_report
+    now = now or datetime.now(timezone.utc)
+    report = ReapReport(started_at=now)
+    started = time.perf_counter()
+
+    async with async_engine.connect() as connection:
+        async with connection.begin():
+            locked = (await connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": REAPER_LOCK_KEY})).scalar()
+        if not locked:
+            report.skipped = True
+            return report
+
+        try:
+            async with connection.begin():
+                if await connection.run_sync(is_partitioned):
+                    report.partitions_created = await connection.run_sync(ensure_partitions, now, DB_PARTITION_MONTHS_AHEAD)
+                    partitions = await connection.run_sync(expired_partitions, now)
+                else:
+                    partitions = []
+            for name in partitions:
+                await _drop_expired_partition(connection, name, batch_size, pause, report)
+
+            while not max_batches or report.batches < max_batches:
+                async with connection.begin():
+                    tests, submissions = (await connection.execute(
+                        _DELETE_EXPIRED_BATCH, {"now": now, "batch_size": batch_size}
+                    )).one()
+                report.batches += 1
+                report.tests_deleted += tests
+                report.submissions_deleted += submissions
+                if tests < batch_size:
+                    break
+                await asyncio.sleep(pause)
+
+            session_batches = 0
+            while not max_batches or session_batches < max_batches:
+                async with connection.begin():
+                    sessions = (await connection.execute(
+                        _DELETE_EXPIRED_SESSIONS, {"now": now, "batch_size": batch_size}
+                    )).rowcount
+                session_batches += 1
+                report.sessions_deleted += sessions
+                if sessions < batch_size:
+                    break
+                await asyncio.sleep(pause)
+        finally:
+            async with connection.begin():
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REAPER_LOCK_KEY})
+
+    report.duration_seconds = time.perf_counter() - started
+    last_report = report
+    return report
+
+
+async def run_reaper_periodically(interval: float) -> None:
+    """
+    Background task: run reap_expired_tests every interval seconds until cancelled.
+
+    Failures are logged and retried at the next interval.
+    """
+    while True:
+        try:
+            report = await reap_expired_tests()
+            logger.info("%s", report.summary())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Expired test cleanup failed")
+        await asyncio.sleep(interval)
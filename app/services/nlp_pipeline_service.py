@@ -0,0 +1,79 @@
+from app.core.config import NLP_MODEL_NAME, NLP_EXCLUDED_COMPONENTS
+
+import threading
+import time
+import spacy
+from spacy.language import Language
+
+
+"""Process-wide registry of loaded spaCy pipelines."""
+
+
+_pipelines: dict[str, Language] = {}
+_load_seconds: dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def get_nlp(model_name: str = NLP_MODEL_NAME) -> Language:
+    """
+    Return the shared spaCy pipeline, loading it on first use.
+
+    Args:
+        model_name (str): Installed spaCy model package name
+
+    Returns:
+        Language: Pipeline loaded without the components in NLP_EXCLUDED_COMPONENTS
+
+    Notes:
+        - Loading happens at most once per process and model name
+        - Thread-safe; concurrent first calls wait for a single load
+    """
+    nlp = _pipelines.get(model_name)
+    if nlp is not None:
+        return nlp
+    with _lock:
+        nlp = _pipelines.get(model_name)
+        if nlp is None:
+            started = time.perf_counter()
+            nlp = spacy.load(model_name, exclude=NLP_EXCLUDED_COMPONENTS)
+            _load_seconds[model_name] = time.perf_counter() - started
+            _pipelines[model_name] = nlp
+    return nlp
+
+
+def load_pipelines() -> None:
+    """
+    Eagerly load the default pipeline.
+
+    Called once during application startup so the first request
+    does not pay the model loading cost.
+    """
+    get_nlp(NLP_MODEL_NAME)
+
+
+def pipeline_info(model_name: str = NLP_MODEL_NAME) -> dict:
+    """
+    Describe the loaded pipeline for diagnostics.
+
+    Args:
+        model_name (str): Installed spaCy model package name
+
+    Returns:
+        dict: {
+            "model": str,
+            "loaded": bool,
+            "enabled_components": list[str],
+            "disabled_components": list[str],
+            "excluded_components": list[str],
+            "load_seconds": float | None
+        }
+    """
+    nlp = _pipelines.get(model_name)
+    return {
+        "model": model_name,
+        "loaded": nlp is not None,
+        "enabled_components": list(nlp.pipe_names) if nlp is not None else [],
+        "disabled_components": list(nlp.disabled) if nlp is not None else [],
+        "excluded_components": list(NLP_EXCLUDED_COMPONENTS),
+        "load_seconds": _load_seconds.get(model_name),
+    }
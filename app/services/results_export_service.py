@@ -0,0 +1,152 @@
+from app.core.config import EXPORT_YIELD_PER
+from app.db.database import AsyncSessionLocal
+from app.models.submission import Submission
+
+import csv
+from datetime import datetime
+import io
+import json
+from typing import AsyncIterator
+import uuid
+from sqlalchemy import select, text
+
+
+"""
+Streaming exports of submissions as CSV or JSON Lines.
+
+Rows are read through a server-side cursor in chunks of EXPORT_YIELD_PER and
+written out chunk by chunk, so memory use does not grow with the export size.
+In CSV, every blank gets its own answer and correctness columns, and text
+cells that a spreadsheet would evaluate as a formula are prefixed with "'".
+"""
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+_MAX_BLANK_COUNT = text("""
+    SELECT max((SELECT count(*) FROM json_object_keys(c_tests.correct_answers)))
+    FROM c_tests
+    WHERE ctest_id IN (SELECT ctest_id FROM submissions WHERE submitted_at >= :start AND submitted_at < :end)
+""")
+
+_BASE_COLUMNS = ["submission_id", "ctest_id", "submitted_at", "correct_count", "total_count", "percentage"]
+
+# Leading characters that make spreadsheet applications treat a cell as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def blank_columns(blank_count: int) -> list[str]:
+    """CSV header of the per-blank columns, numbered from 1 like on the results page."""
+    return [column for number in range(1, blank_count + 1) for column in (f"blank_{number}_answer", f"blank_{number}_correct")]
+
+
+def _csv_cell(value):
+    # Student answers are free text; "=HYPERLINK(...)" must stay text when the export is opened
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_row(row, blank_count: int) -> list:
+    score_data = row.score_data or {}
+    details = score_data.get("detailed_results", {})
+    blanks = []
+    for position in range(blank_count):
+        result = details.get(str(position))
+        blanks += [result["student_answer"], int(result["is_correct"])] if result else ["", ""]
+    return [_csv_cell(value) for value in (
+        row.submission_id, row.ctest_id, row.submitted_at.isoformat(),
+        score_data.get("correct_count"), score_data.get("total_count"), row.percentage,
+        *blanks
+    )]
+
+
+def _json_row(row) -> str:
+    score_data = row.score_data or {}
+    return json.dumps({
+        "submission_id": str(row.submission_id),
+        "ctest_id": str(row.ctest_id),
+        "submitted_at": row.submitted_at.isoformat(),
+        "correct_count": score_data.get("correct_count"),
+        "total_count": score_data.get("total_count"),
+        "percentage": row.percentage,
+        "detailed_results": score_data.get("detailed_results", {}),
+    }, ensure_ascii=False) + "\n"
+
+
+async def _stream_rows(statement, export_format: str, blank_count: int) -> AsyncIterator[bytes]:
+    # Own session: the request's session is closed before the response body is sent
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=EXPORT_YIELD_PER))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(_BASE_COLUMNS + blank_columns(blank_count))
+        async for rows in result.partitions():
+            for row in rows:
+                if export_format == "csv":
+                    writer.writerow(_csv_row(row, blank_count))
+                else:
+                    buffer.write(_json_row(row))
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+
+def _submission_columns():
+    return select(
+        Submission.submission_id, Submission.ctest_id, Submission.submitted_at, Submission.percentage, Submission.score_data
+    )
+
+
+def export_test_results(ctest_id: uuid.UUID, blank_count: int, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Stream all submissions of one test, oldest first.
+
+    Args:
+        ctest_id (UUID): Test identifier
+        blank_count (int): Number of blanks of the test (len(correct_answers))
+        export_format (str): "csv" or "jsonl"
+
+    Returns:
+        AsyncIterator[bytes]: Encoded chunks of the export, for a StreamingResponse
+    """
+    statement = (
+        _submission_columns()
+        .filter(Submission.ctest_id == ctest_id)
+        .order_by(Submission.submitted_at, Submission.submission_id)
+    )
+    return _stream_rows(statement, export_format, blank_count)
+
+
+async def max_blank_count(start: datetime, end: datetime) -> int:
+    """Largest number of blanks among the tests that have submissions in [start, end)."""
+    async with AsyncSessionLocal() as db:
+        blank_count = (await db.execute(_MAX_BLANK_COUNT, {"start": start, "end": end})).scalar()
+    return blank_count or 0
+
+
+def export_results_between(start: datetime, end: datetime, blank_count: int, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Stream the submissions of all tests submitted in [start, end), oldest first.
+
+    Args:
+        start (datetime): Inclusive lower bound of submitted_at
+        end (datetime): Exclusive upper bound of submitted_at
+        blank_count (int): Per-blank CSV columns to emit, see max_blank_count
+        export_format (str): "csv" or "jsonl"
+
+    Returns:
+        AsyncIterator[bytes]: Encoded chunks of the export, for a StreamingResponse
+    """
+    statement = (
+        _submission_columns()
+        .filter(Submission.submitted_at >= start, Submission.submitted_at < end)
+        .order_by(Submission.submitted_at, Submission.submission_id)
+    )
+    return _stream_rows(statement, export_format, blank_count)
@@ -0,0 +1,416 @@
+from app.core.cache import ByteBudgetLRUCache
+from app.core.config import ANALYSIS_CACHE_MAX_BYTES, MAX_INPUT_CHARS, NLP_CHUNK_CHARS, NLP_PIPE_BATCH_SIZE, NLP_PIPE_N_PROCESS
+from app.core.metrics import stage_timer
+from app.services.nlp_pipeline_service import get_nlp
+
+import base64
+from dataclasses import dataclass, replace
+import hashlib
+import numpy
+import re
+from spacy.attrs import IDX, IS_ALPHA, LENGTH, POS, SENT_START
+from spacy.tokens import Doc
+
+
+"""
+Compact linguistic analyses of input texts and their content-addressed cache.
+
+Only the per-token data C-Test generation reads is kept:
+token offsets, coarse POS, is_alpha and the sentence each token belongs to,
+plus a short digest per sentence so edited texts can be re-analysed incrementally.
+Texts longer than NLP_CHUNK_CHARS are parsed chunk by chunk and the chunk
+analyses are joined with global offsets, so no Doc of the whole text is built.
+"""
+
+
+# Version tag of the serialized analysis format stored with each CTest
+ANALYSIS_FORMAT_VERSION = 1
+# Size of the per-sentence digests used to detect unchanged sentences
+_SENTENCE_DIGEST_BYTES = 8
+# Fixed per-entry overhead added to the array sizes when budgeting the cache
+_ENTRY_OVERHEAD_BYTES = 256
+# Whitespace a chunk may end before, tried in order: paragraph break, line break, after a
+# sentence end, anywhere. The whitespace opens the next chunk like it opens the next sentence
+# in a full parse, so a chunk never ends with a whitespace-only sentence.
+_CHUNK_BOUNDARIES = [
+    re.compile(r"\n[ \t]*\n\s*"),
+    re.compile(r"\n\s*"),
+    re.compile(r"(?<=[.!?…\"'»«“”)\]])\s+"),
+    re.compile(r"\s+"),
+]
+
+
+@dataclass(frozen=True, slots=True)
+class TextAnalysis:
+    """
+    Per-token annotations of one text, stored as parallel numpy arrays.
+
+    Attributes:
+        starts (ndarray[int32]): Character offset of each token
+        lengths (ndarray[int32]): Character length of each token
+        pos (ndarray[uint8]): spaCy symbol id of the coarse POS tag (spacy.symbols)
+        alpha (ndarray[bool]): Whether the token consists of letters only
+        sentence_ids (ndarray[int32]): Zero-based sentence index of each token
+        sentence_count (int): Number of sentences in the text
+        text_length (int): Length of the analysed text in characters
+        sentence_digests (bytes): Digest of every sentence segment (see sentence_bounds),
+            empty when restored from a format that did not store them
+    """
+    starts: numpy.ndarray
+    lengths: numpy.ndarray
+    pos: numpy.ndarray
+    alpha: numpy.ndarray
+    sentence_ids: numpy.ndarray
+    sentence_count: int
+    text_length: int = 0
+    sentence_digests: bytes = b""
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.starts.nbytes + self.lengths.nbytes + self.pos.nbytes + self.alpha.nbytes
+            + self.sentence_ids.nbytes + len(self.sentence_digests) + _ENTRY_OVERHEAD_BYTES
+        )
+
+    def sentence_bounds(self) -> numpy.ndarray:
+        """
+        Character offsets at which the sentence segments start, plus the text end.
+
+        A segment runs from its first token up to the first token of the next
+        sentence (so it includes trailing whitespace); the first segment starts at 0.
+        Concatenating all segments gives back the whole text.
+        """
+        first_tokens = numpy.flatnonzero(numpy.diff(self.sentence_ids, prepend=-1))
+        bounds = numpy.append(self.starts[first_tokens], self.text_length).astype(numpy.int64)
+        if len(bounds) > 1:
+            bounds[0] = 0
+        return bounds
+
+
+def text_key(text: str) -> str:
+    """
+    Content address of a (normalized) text.
+
+    Args:
+        text (str): Text as accepted by TextInput (already normalized)
+
+    Returns:
+        str: 32 character hex digest
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _empty_analysis(text_length: int) -> TextAnalysis:
+    empty = numpy.zeros(0, dtype=numpy.int32)
+    return TextAnalysis(empty, empty, numpy.zeros(0, dtype=numpy.uint8), numpy.zeros(0, dtype=bool), empty, 0, text_length)
+
+
+def _digest_segments(text: str, bounds) -> bytes:
+    return b"".join(
+        hashlib.blake2b(text[start:end].encode("utf-8"), digest_size=_SENTENCE_DIGEST_BYTES).digest()
+        for start, end in zip(bounds[:-1], bounds[1:])
+    )
+
+
+def check_text_length(text: str) -> None:
+    """
+    Reject texts too long to be turned into a C-Test.
+
+    Raises:
+        ValueError: If text is longer than MAX_INPUT_CHARS characters
+    """
+    if len(text) > MAX_INPUT_CHARS:
+        raise ValueError(f"Der eingegebene Text ist zu lang (höchstens {MAX_INPUT_CHARS} Zeichen).")
+
+
+def text_chunks(text: str, max_chars: int):
+    """
+    Split a text into consecutive chunks of at most max_chars characters.
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Upper bound of a chunk's length
+
+    Yields:
+        tuple[int, str]: (offset of the chunk in text, chunk); the chunks concatenate to text
+
+    Notes:
+        - A chunk ends at the last paragraph break within max_chars, or failing that
+          (in the second half of the window) at a line break or sentence end,
+          then at any whitespace; a text without whitespace is cut at max_chars
+    """
+    start = 0
+    while len(text) - start > max_chars:
+        limit = start + max_chars
+        end = limit
+        for index, boundary in enumerate(_CHUNK_BOUNDARIES):
+            last_match = None
+            for last_match in boundary.finditer(text, start, limit):
+                pass
+            earliest = start + 1 if index == len(_CHUNK_BOUNDARIES) - 1 else start + max_chars // 2
+            if last_match is not None and last_match.start() >= earliest:
+                end = last_match.start()
+                break
+        yield start, text[start:end]
+        start = end
+    if start < len(text):
+        yield start, text[start:]
+
+
+def _arrays_from_doc(doc: Doc) -> TextAnalysis:
+    """Token arrays of doc, without sentence digests."""
+    if len(doc) == 0:
+        return _empty_analysis(len(doc.text))
+
+    columns = doc.to_array([IDX, LENGTH, POS, IS_ALPHA, SENT_START]).astype(numpy.int64)
+    sentence_starts = columns[:, 4] == 1
+    sentence_starts[0] = True
+    sentence_ids = numpy.cumsum(sentence_starts, dtype=numpy.int32) - 1
+    return TextAnalysis(
+        starts=columns[:, 0].astype(numpy.int32),
+        lengths=columns[:, 1].astype(numpy.int32),
+        pos=columns[:, 2].astype(numpy.uint8),
+        alpha=columns[:, 3].astype(bool),
+        sentence_ids=sentence_ids,
+        sentence_count=int(sentence_ids[-1]) + 1,
+        text_length=len(doc.text),
+    )
+
+
+def _with_digests(analysis: TextAnalysis, text: str) -> TextAnalysis:
+    if analysis.sentence_count == 0:
+        return analysis
+    return replace(analysis, sentence_digests=_digest_segments(text, analysis.sentence_bounds().tolist()))
+
+
+def analysis_from_doc(doc: Doc) -> TextAnalysis:
+    """
+    Extract the compact analysis from a parsed spaCy document.
+
+    Args:
+        doc (Doc): Document produced by a pipeline that sets POS and sentence boundaries
+
+    Returns:
+        TextAnalysis: Annotations of every token in doc
+    """
+    return _with_digests(_arrays_from_doc(doc), doc.text)
+
+
+def _analyze_chunked(nlp, text: str) -> TextAnalysis:
+    """
+    Parse a long text chunk by chunk (see text_chunks) and join the chunk analyses.
+
+    Each Doc is reduced to its token arrays before the next chunk is parsed, so memory
+    is bounded by one chunk's Doc plus the compact arrays of the whole text.
+    Token offsets are shifted by the chunk offset and sentence ids by the sentences
+    of all previous chunks; sentence digests are computed on the joined result.
+    """
+    parts = []
+    sentence_offset = 0
+    chunks = ((chunk, start) for start, chunk in text_chunks(text, NLP_CHUNK_CHARS))
+    for doc, start in nlp.pipe(chunks, as_tuples=True, batch_size=1):
+        part = _arrays_from_doc(doc)
+        parts.append((start, sentence_offset, part))
+        sentence_offset += part.sentence_count
+    if sentence_offset == 0:
+        return _empty_analysis(len(text))
+
+    analysis = TextAnalysis(
+        starts=numpy.concatenate([part.starts.astype(numpy.int64) + start for start, _, part in parts]).astype(numpy.int32),
+        lengths=numpy.concatenate([part.lengths for _, _, part in parts]),
+        pos=numpy.concatenate([part.pos for _, _, part in parts]),
+        alpha=numpy.concatenate([part.alpha for _, _, part in parts]),
+        sentence_ids=numpy.concatenate([part.sentence_ids + offset for _, offset, part in parts]).astype(numpy.int32),
+        sentence_count=sentence_offset,
+        text_length=len(text),
+    )
+    return _with_digests(analysis, text)
+
+
+def analysis_to_json(analysis: TextAnalysis) -> dict:
+    """
+    Serialize an analysis for storage in a JSON column.
+
+    Returns:
+        dict: {
+            "version": int,
+            "sentence_count": int,
+            "starts" | "lengths" | "sentence_ids": str,  # base64 of little-endian int32
+            "pos": str,                                  # base64 of uint8
+            "alpha": str,                                # base64 of uint8 (0/1)
+            "text_length": int,
+            "sentence_digests": str                      # base64
+        }
+    """
+    def encode(values: numpy.ndarray, dtype: str) -> str:
+        return base64.b64encode(values.astype(dtype).tobytes()).decode("ascii")
+
+    return {
+        "version": ANALYSIS_FORMAT_VERSION,
+        "sentence_count": analysis.sentence_count,
+        "starts": encode(analysis.starts, "<i4"),
+        "lengths": encode(analysis.lengths, "<i4"),
+        "pos": encode(analysis.pos, "u1"),
+        "alpha": encode(analysis.alpha, "u1"),
+        "sentence_ids": encode(analysis.sentence_ids, "<i4"),
+        "text_length": analysis.text_length,
+        "sentence_digests": base64.b64encode(analysis.sentence_digests).decode("ascii"),
+    }
+
+
+def analysis_from_json(data: dict) -> TextAnalysis:
+    """
+    Restore an analysis serialized with analysis_to_json.
+
+    Raises:
+        ValueError: If the stored format version is not supported
+    """
+    if data.get("version") != ANALYSIS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported analysis format version: {data.get('version')}")
+
+    def decode(field: str, dtype: str) -> numpy.ndarray:
+        return numpy.frombuffer(base64.b64decode(data[field]), dtype=dtype)
+
+    return TextAnalysis(
+        starts=decode("starts", "<i4").astype(numpy.int32),
+        lengths=decode("lengths", "<i4").astype(numpy.int32),
+        pos=decode("pos", "u1").astype(numpy.uint8),
+        alpha=decode("alpha", "u1").astype(bool),
+        sentence_ids=decode("sentence_ids", "<i4").astype(numpy.int32),
+        sentence_count=int(data["sentence_count"]),
+        text_length=int(data.get("text_length", 0)),
+        sentence_digests=base64.b64decode(data.get("sentence_digests", "")),
+    )
+
+
+def analyze_text(text: str) -> TextAnalysis:
+    """
+    Parse one text with the shared pipeline and return its compact analysis.
+
+    Raises:
+        ValueError: If text is longer than MAX_INPUT_CHARS
+
+    Notes:
+        - Texts longer than NLP_CHUNK_CHARS are parsed in chunks (see _analyze_chunked)
+    """
+    check_text_length(text)
+    with stage_timer("create_ctest_unit", "model"):
+        nlp = get_nlp()
+    with stage_timer("create_ctest_unit", "parse"):
+        if len(text) > NLP_CHUNK_CHARS:
+            return _analyze_chunked(nlp, text)
+        return analysis_from_doc(nlp(text))
+
+
+def analyze_texts(texts: list[str]) -> list[TextAnalysis]:
+    """
+    Parse many texts with a single batched nlp.pipe call.
+
+    Raises:
+        ValueError: If a text is longer than MAX_INPUT_CHARS
+
+    Notes:
+        - Batch size and process count come from NLP_PIPE_BATCH_SIZE / NLP_PIPE_N_PROCESS
+        - Texts longer than NLP_CHUNK_CHARS are parsed one at a time in chunks
+    """
+    for text in texts:
+        check_text_length(text)
+    with stage_timer("create_ctest_unit", "model"):
+        nlp = get_nlp()
+    with stage_timer("create_ctest_unit", "parse"):
+        short_texts = [text for text in texts if len(text) <= NLP_CHUNK_CHARS]
+        docs = iter(nlp.pipe(short_texts, batch_size=NLP_PIPE_BATCH_SIZE, n_process=NLP_PIPE_N_PROCESS))
+        return [
+            analysis_from_doc(next(docs)) if len(text) <= NLP_CHUNK_CHARS else _analyze_chunked(nlp, text)
+            for text in texts
+        ]
+
+
+def reanalyze_text(text: str, previous: TextAnalysis) -> TextAnalysis:
+    """
+    Analyse an edited text, re-parsing only the sentences that changed.
+
+    Args:
+        text (str): New (normalized) text
+        previous (TextAnalysis): Analysis of the text before the edit
+
+    Returns:
+        TextAnalysis: Analysis of text
+
+    Algorithm:
+        1. Keep the longest run of leading sentence segments whose digests still
+           match the new text at the same offsets (never the final segment)
+        2. Keep the longest run of trailing segments that match at offsets shifted
+           by the change in text length
+        3. Parse only the characters between both runs
+        4. Splice prefix, re-parsed and (offset shifted) suffix annotations together
+
+    Notes:
+        - Falls back to a full parse if previous has no sentence digests
+        - Sentence boundaries inside the edited region come from parsing it on its
+          own, which can differ marginally from a full parse of the new text
+    """
+    digest_count = len(previous.sentence_digests) // _SENTENCE_DIGEST_BYTES
+    if previous.sentence_count == 0 or digest_count != previous.sentence_count:
+        return analyze_text(text)
+
+    bounds = previous.sentence_bounds().tolist()
+    digests = [
+        previous.sentence_digests[i * _SENTENCE_DIGEST_BYTES:(i + 1) * _SENTENCE_DIGEST_BYTES]
+        for i in range(digest_count)
+    ]
+    shift = len(text) - previous.text_length
+
+    def matches(index: int, offset: int) -> bool:
+        start, end = bounds[index] + offset, bounds[index + 1] + offset
+        if start < 0 or end > len(text):
+            return False
+        return _digest_segments(text, [start, end]) == digests[index]
+
+    if shift == 0 and all(matches(index, 0) for index in range(digest_count)):
+        return previous
+
+    # The last segment ends at the text end rather than at a sentence start,
+    # so it can only be reused as part of the suffix
+    prefix = 0
+    while prefix < digest_count - 1 and matches(prefix, 0):
+        prefix += 1
+
+    suffix = digest_count
+    while suffix > prefix and bounds[suffix - 1] + shift >= bounds[prefix] and matches(suffix - 1, shift):
+        suffix -= 1
+    if prefix == 0 and suffix == digest_count:
+        return analyze_text(text)
+
+    region_start, region_end = bounds[prefix], bounds[suffix] + shift
+    region = analyze_text(text[region_start:region_end]) if region_end > region_start else _empty_analysis(0)
+
+    kept_prefix = previous.sentence_ids < prefix
+    kept_suffix = previous.sentence_ids >= suffix
+    suffix_sentence_shift = prefix + region.sentence_count - suffix
+    return TextAnalysis(
+        starts=numpy.concatenate([
+            previous.starts[kept_prefix], region.starts + region_start, previous.starts[kept_suffix] + shift
+        ]).astype(numpy.int32),
+        lengths=numpy.concatenate([
+            previous.lengths[kept_prefix], region.lengths, previous.lengths[kept_suffix]
+        ]).astype(numpy.int32),
+        pos=numpy.concatenate([previous.pos[kept_prefix], region.pos, previous.pos[kept_suffix]]).astype(numpy.uint8),
+        alpha=numpy.concatenate([previous.alpha[kept_prefix], region.alpha, previous.alpha[kept_suffix]]).astype(bool),
+        sentence_ids=numpy.concatenate([
+            previous.sentence_ids[kept_prefix],
+            region.sentence_ids + prefix,
+            previous.sentence_ids[kept_suffix] + suffix_sentence_shift
+        ]).astype(numpy.int32),
+        sentence_count=previous.sentence_count + suffix_sentence_shift,
+        text_length=len(text),
+        sentence_digests=(
+            previous.sentence_digests[:prefix * _SENTENCE_DIGEST_BYTES]
+            + region.sentence_digests
+            + previous.sentence_digests[suffix * _SENTENCE_DIGEST_BYTES:]
+        ),
+    )
+
+
+# Analyses keyed by text_key(text), bounded by ANALYSIS_CACHE_MAX_BYTES
+analysis_cache = ByteBudgetLRUCache(ANALYSIS_CACHE_MAX_BYTES, lambda analysis: analysis.nbytes)
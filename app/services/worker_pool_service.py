@@ -0,0 +1,202 @@
+from app.core.config import WORKER_POOL_MODE, WORKER_POOL_SIZE, WORKER_QUEUE_LIMIT, WORKER_RETRY_AFTER_SECONDS
+from app.core.metrics import Histogram, collect_stages, record_stages
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+"""Bounded worker pool for CPU-bound work that must not run on the event loop."""
+
+
+POOL_MODES = {"thread", "process", "inline"}
+
+
+class WorkerPoolBusyError(Exception):
+    """
+    Raised when the worker pool queue is full.
+
+    Attributes:
+        retry_after (int): Seconds the client should wait before retrying
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Der Server ist ausgelastet. Bitte versuchen Sie es später erneut.")
+        self.retry_after = retry_after
+
+
+def _init_process_worker() -> None:
+    """Warm up the NLP pipeline and the PDF fonts once in every worker process."""
+    from app.services.ctest_pdf_generator_service import load_fonts
+    from app.services.nlp_pipeline_service import load_pipelines
+    load_pipelines()
+    load_fonts()
+
+
+def _timed_call(fn, args: tuple):
+    """Run fn in the worker and report the wall-clock time it started at and the stages it timed."""
+    started_at = time.time()
+    result, stages = collect_stages(fn, args)
+    return started_at, result, stages
+
+
+class WorkerPool:
+    """
+    Executes synchronous jobs in a thread or process pool with backpressure.
+
+    Args:
+        mode (str): "thread", "process" or "inline"
+        max_workers (int): Number of worker threads/processes
+        queue_limit (int): Jobs allowed to wait once all workers are busy
+        retry_after (int): Retry-After hint reported when the queue is full
+
+    Notes:
+        - Jobs and their arguments must be picklable in process mode
+        - "inline" runs jobs directly on the event loop (no isolation, no limits)
+    """
+
+    def __init__(self, mode: str, max_workers: int, queue_limit: int, retry_after: int):
+        if mode not in POOL_MODES:
+            raise ValueError(f"Invalid worker pool mode '{mode}'. Must be one of {sorted(POOL_MODES)}.")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = max(0, queue_limit)
+        self.retry_after = retry_after
+        self.wait_time = Histogram()
+        self.run_time = Histogram()
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._completed = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process_worker)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ctest-worker")
+        return self._executor
+
+    def _acquire_slots(self, count: int = 1) -> None:
+        with self._lock:
+            if self._in_flight + count > self.max_workers + self.queue_limit:
+                self._rejected += 1
+                raise WorkerPoolBusyError(self.retry_after)
+            self._in_flight += count
+
+    def _release_slots(self, count: int = 1) -> None:
+        with self._lock:
+            self._in_flight -= count
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool and await its result.
+
+        Raises:
+            WorkerPoolBusyError: If all workers are busy and the queue is full
+            Exception: Any exception raised by fn is propagated unchanged
+        """
+        if self.mode == "inline":
+            return fn(*args)
+
+        self._acquire_slots()
+        return await self._run_acquired(fn, args)
+
+    async def run_many(self, fn, args_list: list[tuple]) -> list:
+        """
+        Run fn once per argument tuple, in parallel across the workers.
+
+        The request reserves at most max_workers slots up front and passes each
+        slot on to its next job when a job finishes, so it is either accepted or
+        rejected before any job starts, and any number of jobs fits an idle pool.
+
+        Returns:
+            list: Results in the order of args_list
+
+        Raises:
+            WorkerPoolBusyError: If the queue cannot take the first max_workers jobs
+            Exception: The first exception raised by any job; no further jobs are started
+        """
+        if self.mode == "inline":
+            return [fn(*args) for args in args_list]
+
+        window = min(len(args_list), self.max_workers)
+        self._acquire_slots(window)
+        results = [None] * len(args_list)
+        jobs = iter(enumerate(args_list))
+
+        async def lane():
+            for index, args in jobs:
+                results[index] = await self._execute(fn, args)
+
+        try:
+            async with asyncio.TaskGroup() as lanes:
+                for _ in range(window):
+                    lanes.create_task(lane())
+        except ExceptionGroup as group:
+            raise group.exceptions[0]
+        finally:
+            self._release_slots(window)
+        return results
+
+    async def _run_acquired(self, fn, args: tuple):
+        try:
+            return await self._execute(fn, args)
+        finally:
+            self._release_slots()
+
+    async def _execute(self, fn, args: tuple):
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result, stages = await loop.run_in_executor(self._get_executor(), _timed_call, fn, args)
+            finished_at = time.time()
+            self.wait_time.observe(max(0.0, started_at - submitted_at))
+            self.run_time.observe(max(0.0, finished_at - started_at))
+            record_stages(stages)
+            return result
+        finally:
+            with self._lock:
+                self._completed += 1
+
+    def stats(self) -> dict:
+        """
+        Report current load and timing of the pool.
+
+        Returns:
+            dict: {
+                "mode": str,
+                "max_workers": int,
+                "queue_limit": int,
+                "in_flight": int,    # running + queued jobs
+                "queue_depth": int,  # jobs waiting for a free worker
+                "completed": int,
+                "rejected": int,
+                "wait_seconds": dict,  # histogram snapshot
+                "run_seconds": dict    # histogram snapshot
+            }
+        """
+        with self._lock:
+            in_flight, completed, rejected = self._in_flight, self._completed, self._rejected
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": in_flight,
+            "queue_depth": max(0, in_flight - self.max_workers),
+            "completed": completed,
+            "rejected": rejected,
+            "wait_seconds": self.wait_time.snapshot(),
+            "run_seconds": self.run_time.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared pool for C-Test generation and PDF rendering
+worker_pool = WorkerPool(WORKER_POOL_MODE, WORKER_POOL_SIZE, WORKER_QUEUE_LIMIT, WORKER_RETRY_AFTER_SECONDS)
@@ -0,0 +1,76 @@
+import random
+
+
+"""
+Deterministic German benchmark texts from one paragraph up to about 50 pages.
+
+Texts are assembled from a fixed pool of sentences with a seeded RNG, so every
+run (and every machine) benchmarks exactly the same input.
+"""
+
+
+SENTENCES = [
+    "Der Hund läuft jeden Morgen schnell über die große Wiese hinter dem Haus.",
+    "Am Nachmittag trafen sich die Schülerinnen in der kleinen Bibliothek am Marktplatz.",
+    "Die Lehrerin erklärte geduldig, warum sich die Jahreszeiten auf der Erde verändern.",
+    "Nach dem langen Winter blühten endlich wieder die ersten Tulpen im Garten.",
+    "Mein Großvater erzählte gern Geschichten aus seiner Kindheit auf dem Bauernhof.",
+    "Im Sommer fahren viele Familien mit dem Zug an die Nordsee oder in die Berge.",
+    "Der Bäcker öffnet seinen Laden schon um fünf Uhr, damit frische Brötchen bereitliegen.",
+    "Obwohl es stark regnete, spielten die Kinder fröhlich draußen im Hof.",
+    "Die Stadtverwaltung plant, den alten Bahnhof in ein modernes Kulturzentrum umzubauen.",
+    "Wissenschaftler untersuchen seit Jahren, wie Bienen ihren Weg zurück zum Stock finden.",
+    "Während des Konzerts war es im Saal so still, dass man jeden Atemzug hörte.",
+    "Anna schrieb ihrer Freundin einen langen Brief über die Reise nach Italien.",
+    "Die Feuerwehr konnte den Brand in der Lagerhalle nach wenigen Stunden löschen.",
+    "Zum Frühstück gibt es bei uns meistens Müsli, Obst und einen heißen Tee.",
+    "Viele Menschen lesen die Zeitung inzwischen lieber auf dem Tablet als auf Papier.",
+    "Der Fluss trat nach den heftigen Regenfällen über die Ufer und überschwemmte die Felder.",
+    "In der Werkstatt reparierte der Meister geschickt das alte Fahrrad seines Nachbarn.",
+    "Die Mannschaft trainierte hart, um im nächsten Spiel endlich wieder zu gewinnen.",
+    "Abends sitzen wir oft zusammen auf dem Balkon und beobachten den Sonnenuntergang.",
+    "Das Museum zeigt eine Ausstellung über das Leben der Menschen im Mittelalter.",
+    "Wegen der Baustelle mussten die Autofahrer einen weiten Umweg durch das Dorf nehmen.",
+    "Die Studierenden diskutierten lebhaft über die Folgen des Klimawandels für die Landwirtschaft.",
+    "Im Herbst sammeln wir im Wald Pilze, Kastanien und bunte Blätter.",
+    "Der Arzt riet ihm, mehr Wasser zu trinken und regelmäßig spazieren zu gehen.",
+    "Auf dem Wochenmarkt verkaufen die Bauern Gemüse, Käse und frische Eier aus der Region.",
+    "Sie übte jeden Tag eine Stunde Klavier, bis sie das schwierige Stück beherrschte.",
+    "Die Brücke über den Rhein wurde nach zwei Jahren Bauzeit feierlich eröffnet.",
+    "Als der Wecker klingelte, drehte er sich noch einmal um und schlief weiter.",
+    "Unsere Nachbarn haben einen kleinen Teich angelegt, in dem jetzt Frösche leben.",
+    "Trotz aller Schwierigkeiten gab das Team nicht auf und fand schließlich eine Lösung.",
+]
+
+# Label -> approximate length in characters (one printed page is about 3000 characters)
+TEXT_SIZES = {
+    "paragraph": 600,
+    "page": 3_000,
+    "chapter": 30_000,
+    "book": 150_000,
+}
+
+
+def german_text(target_chars: int, seed: int = 0) -> str:
+    """
+    Build a German text of about target_chars characters.
+
+    Args:
+        target_chars (int): Length to reach; the text ends after the sentence crossing it
+        seed (int): Seed of the sentence order
+
+    Returns:
+        str: Paragraphs of four to eight sentences separated by blank lines
+    """
+    rng = random.Random(seed)
+    paragraphs, length = [], 0
+    while length < target_chars:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(4, 8)))
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def corpus(sizes: list[str] | None = None) -> dict[str, str]:
+    """Benchmark texts by size label, see TEXT_SIZES."""
+    return {label: german_text(TEXT_SIZES[label], seed=index) for index, label in enumerate(TEXT_SIZES) if sizes is None or label in sizes}
@@ -0,0 +1,69 @@
+from app.db.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.ctest import CTest
+
+import argparse
+import asyncio
+import time
+import uuid
+from sqlalchemy import select, text
+
+
+"""
+Requests/second of the access-code lookup at fixed concurrency, sync vs. async sessions.
+
+The "sync" mode reproduces the previous handlers: a synchronous Session query
+awaited nowhere, so it runs on (and blocks) the event loop. The "async" mode
+uses the AsyncSession dependency the routers use now.
+
+Usage:
+    python -m benchmarks.db_sessions --requests 2000 --concurrency 50 --latency-ms 5
+
+Requires the database configured by DATABASE_URL / ASYNC_DATABASE_URL.
+"""
+
+
+async def sync_lookup(ctest_id: uuid.UUID, latency: float) -> None:
+    with SessionLocal() as db:
+        if latency:
+            db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": latency})
+        db.query(CTest.student_code).filter(CTest.ctest_id == ctest_id).first()
+
+
+async def async_lookup(ctest_id: uuid.UUID, latency: float) -> None:
+    async with AsyncSessionLocal() as db:
+        if latency:
+            await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": latency})
+        (await db.execute(select(CTest.student_code).filter(CTest.ctest_id == ctest_id))).first()
+
+
+async def run(lookup, requests: int, concurrency: int, latency: float) -> float:
+    """Issue requests lookups from concurrency workers and return requests/second."""
+    remaining = iter(range(requests))
+
+    async def client():
+        for _ in remaining:
+            await lookup(uuid.uuid4(), latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args) -> None:
+    lookups = {"sync": sync_lookup, "async": async_lookup}
+    for mode in args.modes:
+        # warm up the connection pools
+        await run(lookups[mode], args.concurrency, args.concurrency, 0)
+        rate = await run(lookups[mode], args.requests, args.concurrency, args.latency_ms / 1000)
+        print(f"{mode:>5}: {rate:10.1f} req/s  (requests={args.requests}, concurrency={args.concurrency}, latency={args.latency_ms}ms)")
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Access-code lookup throughput with sync vs. async sessions")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="extra server-side delay per request (pg_sleep)")
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    asyncio.run(main(parser.parse_args()))
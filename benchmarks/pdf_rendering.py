@@ -0,0 +1,80 @@
+from app.services.ctest_pdf_generator_service import FONT_PATH_BOLD, FONT_PATH_REGULAR, format_segments, load_fonts, render_pdf_test
+
+import argparse
+import re
+import time
+from fpdf import FPDF, XPos, YPos
+
+
+"""
+PDFs/second of the C-Test PDF renderer for short and long texts.
+
+The "per-request" mode reproduces the previous renderer, which called add_font
+on the TTF files for every document. The "preloaded" mode uses render_pdf_test
+with the fonts parsed once per process (load_fonts).
+
+Usage:
+    python -m benchmarks.pdf_rendering --iterations 50
+"""
+
+
+SENTENCE = "Der Hund läuft jeden Morgen schnell über die große Wiese hinter dem Haus. "
+CTEST_SENTENCE = "Der Hund lä___ jed__ Mor___ sch____ über d__ gro___ Wie__ hin___ dem Haus. "
+# Label -> number of sentences in the rendered text
+TEXT_SIZES = {"short": 5, "long": 200}
+
+
+def to_segments(ctest_text: str) -> list:
+    """Segments of a test text whose blanks are runs of underscores."""
+    segments, blank_index = [], 0
+    for position, part in enumerate(re.split(r"(_+)", ctest_text)):
+        if position % 2:
+            segments.append([blank_index, len(part)])
+            blank_index += 1
+        else:
+            segments.append(part)
+    return segments
+
+
+def render_per_request(segments: list, original_text: str) -> bytes:
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font("TimesNewRoman", fname=FONT_PATH_REGULAR)
+    pdf.add_font("TimesNewRoman", style="B", fname=FONT_PATH_BOLD)
+    pdf.set_font("TimesNewRoman", size=12)
+    pdf.write(text=format_segments(segments))
+    pdf.add_page()
+    pdf.set_font("TimesNewRoman", style="B", size=12)
+    pdf.cell(text="Lösungen", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_font("TimesNewRoman", size=12)
+    pdf.write(text=original_text)
+    return bytes(pdf.output())
+
+
+def run(render, sentences: int, iterations: int) -> tuple[float, int]:
+    """Render the same document iterations times and return PDFs/second and the PDF size."""
+    segments, original_text = to_segments(CTEST_SENTENCE * sentences), SENTENCE * sentences
+    document = render(segments, original_text)  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        render(segments, original_text)
+    return iterations / (time.perf_counter() - started), len(document)
+
+
+def main(args) -> None:
+    started = time.perf_counter()
+    load_fonts()
+    print(f"load_fonts: {(time.perf_counter() - started) * 1000:.1f} ms (once per process)")
+
+    renderers = {"per-request": render_per_request, "preloaded": render_pdf_test}
+    for label, sentences in TEXT_SIZES.items():
+        for mode in args.modes:
+            rate, size = run(renderers[mode], sentences, args.iterations)
+            print(f"{label:>5} ({sentences:>3} sentences) {mode:>11}: {rate:8.1f} PDFs/s  ({size} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="C-Test PDF rendering throughput")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", choices=["per-request", "preloaded"], default=["per-request", "preloaded"])
+    main(parser.parse_args())
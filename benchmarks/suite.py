@@ -0,0 +1,213 @@
+from app.core.config import NLP_MODEL_NAME
+from app.services.ctest_pdf_generator_service import load_fonts, render_pdf_test
+from app.services.ctest_unit_generator_service import BLANK_COEFF, select_blanks
+from app.services.ctest_unit_submission_service import calculate_score
+from app.services.nlp_pipeline_service import load_pipelines
+from app.services.text_analysis_service import analyze_text
+from benchmarks.corpus import TEXT_SIZES, corpus
+
+import argparse
+from datetime import datetime, timezone
+import fnmatch
+import json
+import numpy
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+
+"""
+Microbenchmarks of C-Test generation, scoring and PDF rendering.
+
+Cases:
+    generate/<size>/<difficulty>  parse + blank selection, as create_ctest_unit on a cache miss
+    score/<blanks>                calculate_score for answer sets of 10 to 1000 blanks
+    render/<size>                 render_pdf_test of a medium test
+
+Every case reports throughput, latency percentiles and the tracemalloc peak of
+one extra run. Results can be saved as a baseline and compared against one;
+the exit status is 1 if a case got slower (median) or needs more memory than
+the baseline by more than --threshold.
+
+Usage:
+    python -m benchmarks.suite --save results.json
+    python -m benchmarks.suite --compare results.json --threshold 0.15
+    python -m benchmarks.suite --cases "score/*" "generate/page/*"
+
+Runs without a database; needs the spaCy model configured by NLP_MODEL_NAME.
+"""
+
+
+SCORE_BLANK_COUNTS = (10, 100, 1000)
+
+
+def run_sync(coroutine):
+    """Drive a coroutine that never suspends (calculate_score) without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended; it cannot be benchmarked synchronously")
+
+
+def answer_set(blanks: int, seed: int = 0) -> tuple[dict, dict]:
+    """
+    Answer key and student answers with a realistic mix of mistakes.
+
+    Returns:
+        tuple: (correct_answers, student_answers); about 70% of the answers are
+            correct (some with different case or spacing), 20% wrong, 10% empty
+    """
+    rng = random.Random(seed)
+    words = [word.strip(".,") for word in " ".join(corpus(["paragraph"]).values()).split() if len(word) > 3]
+    correct_answers, student_answers = {}, {}
+    for position in range(blanks):
+        word = rng.choice(words)
+        answer = word[len(word) // 2:]
+        correct_answers[str(position)] = {"answer": answer, "length": str(len(answer))}
+        roll = rng.random()
+        if roll < 0.6:
+            student_answers[str(position)] = answer
+        elif roll < 0.7:
+            student_answers[str(position)] = f" {answer.upper()} "
+        elif roll < 0.9:
+            student_answers[str(position)] = answer[::-1] + "x"
+        else:
+            student_answers[str(position)] = ""
+    return correct_answers, student_answers
+
+
+def build_cases(sizes: list[str]) -> dict:
+    """Case name -> zero-argument callable."""
+    texts = corpus(sizes)
+    cases = {}
+    for size, text in texts.items():
+        for difficulty in BLANK_COEFF:
+            cases[f"generate/{size}/{difficulty}"] = lambda text=text, difficulty=difficulty: select_blanks(text, analyze_text(text), difficulty)
+    for blanks in SCORE_BLANK_COUNTS:
+        correct_answers, student_answers = answer_set(blanks)
+        cases[f"score/{blanks}"] = lambda correct_answers=correct_answers, student_answers=student_answers: run_sync(
+            calculate_score(correct_answers, student_answers)
+        )
+    for size, text in texts.items():
+        _, _, segments = select_blanks(text, analyze_text(text), "medium")
+        cases[f"render/{size}"] = lambda segments=segments, text=text: render_pdf_test(segments, text)
+    return cases
+
+
+def measure(fn, min_time: float, min_iterations: int, max_iterations: int) -> dict:
+    """
+    Time fn repeatedly after one warm-up call, then measure its allocation peak.
+
+    Returns:
+        dict: {
+            "iterations": int,
+            "ops_per_second": float,
+            "mean_ms" | "p50_ms" | "p90_ms" | "p99_ms" | "max_ms": float,
+            "peak_memory_kib": float   # tracemalloc peak of one call
+        }
+    """
+    fn()
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < max_iterations and (len(durations) < min_iterations or time.perf_counter() - started < min_time):
+        call_started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - call_started)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    milliseconds = numpy.array(durations) * 1000
+    p50, p90, p99 = numpy.percentile(milliseconds, [50, 90, 99])
+    return {
+        "iterations": len(durations),
+        "ops_per_second": len(durations) / sum(durations),
+        "mean_ms": float(milliseconds.mean()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(milliseconds.max()),
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare the median latency and peak memory of every case present in both runs.
+
+    Returns:
+        list[str]: One message per regression beyond threshold (relative, 0.1 = 10%)
+    """
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "peak_memory_kib"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+                change = current[metric] / previous[metric] - 1
+                regressions.append(f"{case}: {metric} {previous[metric]:.2f} -> {current[metric]:.2f} (+{change:.0%})")
+    return regressions
+
+
+def main(args) -> int:
+    load_pipelines()
+    load_fonts()
+    cases = build_cases(args.sizes)
+    selected = {name: fn for name, fn in cases.items() if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)}
+
+    results = {}
+    print(f"{'case':<28} {'iter':>5} {'ops/s':>10} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'peak KiB':>10}")
+    for name, fn in selected.items():
+        result = measure(fn, args.min_time, args.min_iterations, args.max_iterations)
+        results[name] = result
+        print(
+            f"{name:<28} {result['iterations']:>5} {result['ops_per_second']:>10.1f} {result['p50_ms']:>10.2f} "
+            f"{result['p90_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['peak_memory_kib']:>10.0f}"
+        )
+
+    if args.save:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "nlp_model": NLP_MODEL_NAME,
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="C-Test generation, scoring and PDF rendering microbenchmarks")
+    parser.add_argument("--cases", nargs="+", default=["*"], help="glob patterns of the cases to run, e.g. 'score/*'")
+    parser.add_argument("--sizes", nargs="+", choices=list(TEXT_SIZES), default=list(TEXT_SIZES))
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to keep repeating each case")
+    parser.add_argument("--min-iterations", type=int, default=3)
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--save", help="write the results as JSON (e.g. a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown, 0.10 = 10%%")
+    sys.exit(main(parser.parse_args()))
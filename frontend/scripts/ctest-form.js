@@ -28,47 +28,38 @@ const ConsoleLog = Object.freeze({
 });
 
 
-function renderCTestForm(text, correctAnswers) {
+// Segments alternate text runs (strings) and blanks ([blankIndex, length])
+function renderCTestForm(segments) {
     const container = document.getElementById("ctestContainer");
     container.innerHTML = "";
     const fragment = document.createDocumentFragment();
-    let blankIndex = 0;
-    let i = 0;
-    while (i < text.length) {
-        let word = "";
-        while (i < text.length && text[i] !== " ") {
-            word += text[i];
-            i++;
+    let wordSpan = null;
+    for (const segment of segments) {
+        if (typeof segment !== "string") {
+            wordSpan ??= appendWordSpan(fragment);
+            wordSpan.append(createLetterInputField(segment[0], segment[1]));
+            continue;
         }
-        const wordSpan = document.createElement("span");
-        wordSpan.className = "word";
-        let j = 0;
-        while (j < word.length) {
-            if (word[j] === "_") {
-                const answerObj = correctAnswers[blankIndex];
-                const blankLength = answerObj.answer.length;
-                wordSpan.append(createLetterInputField(blankIndex, blankLength));
-                j += blankLength;
-                blankIndex++;
-            } else {
-                wordSpan.append(document.createTextNode(word[j]));
-                j++;
+        segment.split(" ").forEach((part, k) => {
+            if (k > 0) {
+                fragment.append(" ");
+                wordSpan = null;
             }
-        }
-        fragment.append(wordSpan);
-        if (i < text.length && text[i] === " ") {
-            fragment.append(" ");
-            i++;
-        }
+            if (part) {
+                wordSpan ??= appendWordSpan(fragment);
+                wordSpan.append(part);
+            }
+        });
     }
     container.append(fragment);
 }
-function renderBlankSegment(blankIndex, blankLength, parent) {
-    parent.append(createLetterInputField(blankIndex, blankLength));
-}
 
-function renderTextSegment(char, container) {
-    container.append(document.createTextNode(char));
+// Keeps a word and its blanks on one line, see .word
+function appendWordSpan(parent) {
+    const wordSpan = document.createElement("span");
+    wordSpan.className = "word";
+    parent.append(wordSpan);
+    return wordSpan;
 }
 
 function createLetterInputField(blankIndex, blankLength) {
@@ -246,10 +237,10 @@ function getHint(correctAnswers, givenHints) {
 function initializeCTestForm() {
     const correctAnswers = _correctAnswers;
     const ctestId = _ctestId;
-    const ctestText = _ctestText;
+    const segments = _segments;
     let givenHints = {};
 
-    renderCTestForm(ctestText, correctAnswers);
+    renderCTestForm(segments);
 
     const form = document.getElementById("ctestForm");
     if (form) {
@@ -15,6 +15,11 @@ const HintMsg = Object.freeze({
     FILENAME: `CTest_${new Date().toISOString().slice(0, 10)}.pdf`,
 });
 
+// Key of the last server-side analysis, lets the server re-parse only edited sentences
+let lastAnalysisKey = null;
+// Last downloaded PDF and its ETag, reused when the server answers 304 Not Modified
+let lastPdf = { etag: null, blob: null };
+
 async function generateCTestTextArea() {
     const submitBtn = document.getElementById("generateBtn");
     if (!submitBtn) {
@@ -28,7 +33,11 @@ async function generateCTestTextArea() {
         const response = await fetch("/api/create", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ original_text: sanitizeInput(input), difficulty })
+            body: JSON.stringify({
+                original_text: sanitizeInput(input),
+                difficulty,
+                previous_analysis_key: lastAnalysisKey
+            })
         });
 
         if (!response.ok) {
@@ -37,6 +46,7 @@ async function generateCTestTextArea() {
         }
 
         const data = await response.json();
+        lastAnalysisKey = data.analysis_key || null;
         setTestAccessData(data);
 
     } catch (error) {
@@ -125,18 +135,25 @@ async function downloadPDF() {
     try {
         const { input, difficulty } = validateInputs();
 
+        const headers = { "Content-Type": "application/json" };
+        if (lastPdf.etag) {
+            headers["If-None-Match"] = lastPdf.etag;
+        }
         const response = await fetch("/api/create_pdf", {
             method: "POST",
-            headers: { "Content-Type": "application/json" },
+            headers,
             body: JSON.stringify({ original_text: sanitizeInput(input), difficulty })
         });
 
-        if (!response.ok) {
+        if (!response.ok && response.status !== 304) {
             const errorText = await response.text();
             throw new Error(errorText || ErrorMsg.PDF_GENERATION_FAILED);
         }
 
-        const blob = await response.blob();
+        if (response.status !== 304) {
+            lastPdf = { etag: response.headers.get("ETag"), blob: await response.blob() };
+        }
+        const blob = lastPdf.blob;
         const url = window.URL.createObjectURL(blob);
 
         const a = document.createElement("a");
@@ -15,8 +15,9 @@ const HintMsg = Object.freeze({
 const MIN_INPUT_WIDTH_EM = 2;
 const WIDTH_SCALE_FACTOR = 0.8;
 
-function renderCTestResults(text, correctAnswers, studentAnswers, scoreData, givenHints) {
-    if (!text || !correctAnswers || !studentAnswers || !scoreData) {
+// Segments alternate text runs (strings) and blanks ([blankIndex, length])
+function renderCTestResults(segments, studentAnswers, scoreData, givenHints) {
+    if (!segments || !studentAnswers || !scoreData) {
         console.error(ConsoleLog.MISSING_REQ_PARAMS);
         return;
     }
@@ -30,48 +31,41 @@ function renderCTestResults(text, correctAnswers, studentAnswers, scoreData, giv
     container.innerHTML = "";
     const fragment = document.createDocumentFragment();
 
-    let blankIndex = 0;
-    let i = 0;
-
-    while (i < text.length) {
-        let word = "";
-        while (i < text.length && text[i] !== " ") {
-            word += text[i];
-            i++;
-        }
-
-        const wordSpan = document.createElement("span");
-        wordSpan.className = "word";
-
-        let j = 0;
-        while (j < word.length) {
-            if (word[j] === "_") {
-                const answer = correctAnswers[blankIndex]?.answer;
-                const blankLength = answer?.length;
-
-                if (!blankLength) {
-                    console.warn(ConsoleLog.NO_INP_FOR_BLANK(blankIndex));
-                    j++;
-                    continue;
+    let wordSpan = null;
+    for (const segment of segments) {
+        if (typeof segment === "string") {
+            segment.split(" ").forEach((part, k) => {
+                if (k > 0) {
+                    fragment.append(" ");
+                    wordSpan = null;
                 }
-                renderBlankSegment(blankIndex, blankLength, wordSpan, studentAnswers, scoreData, givenHints);
-                j += blankLength;
-                blankIndex++;
-            } else {
-                renderTextSegment(word[j], wordSpan);
-                j++;
-            }
+                if (part) {
+                    wordSpan ??= appendWordSpan(fragment);
+                    wordSpan.append(part);
+                }
+            });
+            continue;
         }
-        fragment.append(wordSpan);
-        if (i < text.length && text[i] === " ") {
-            fragment.append(" ");
-            i++;
+        const [blankIndex, blankLength] = segment;
+        if (!blankLength) {
+            console.warn(ConsoleLog.NO_VALID_ANSWER_FOR_BLANK(blankIndex));
+            continue;
         }
+        wordSpan ??= appendWordSpan(fragment);
+        renderBlankSegment(blankIndex, blankLength, wordSpan, studentAnswers, scoreData, givenHints);
     }
 
     container.append(fragment);
 }
 
+// Keeps a word and its blanks on one line, see .word
+function appendWordSpan(parent) {
+    const wordSpan = document.createElement("span");
+    wordSpan.className = "word";
+    parent.append(wordSpan);
+    return wordSpan;
+}
+
 
 function addGivenHint(blankIndex, givenHints, container) {
     const givenHint = givenHints[blankIndex];
@@ -106,10 +100,6 @@ function applyScoreFeedback(input, blankIndex, scoreData) {
     }
 }
 
-function renderTextSegment(char, container) {
-    container.append(document.createTextNode(char));
-}
-
 function createLetterAnswerField(blankIndex, blankLength) {
     const input = document.createElement("input");
     input.type = "text";
@@ -126,12 +116,11 @@ function createLetterAnswerField(blankIndex, blankLength) {
 }
 
 function initializeCTestResults() {
-    const correctAnswers = _correctAnswers;
-    const ctestText = _ctestText;
+    const segments = _segments;
     const studentAnswers = _studentAnswers;
     const scoreData = _scoreData;
     const givenHints = _givenHints;
-    renderCTestResults(ctestText, correctAnswers, studentAnswers, scoreData, givenHints);
+    renderCTestResults(segments, studentAnswers, scoreData, givenHints);
 }
 
 document.addEventListener("DOMContentLoaded", initializeCTestResults);
@@ -0,0 +1,47 @@
+from app.core.config import RATE_LIMIT_STUDENT_AUTH_BURST
+from app.core.rate_limit import student_auth_limiter
+from app.main import app
+import app.routers.ctest_unit_form as ctest_unit_form
+
+from types import SimpleNamespace
+import uuid
+from fastapi.testclient import TestClient
+import pytest
+
+
+"""
+Student code checks of a whole class behind one NAT (one client IP).
+
+Runs without a database: the test lookup of the authorization route is
+replaced by a fixed test per id.
+"""
+
+
+STUDENT_CODE = "123456"
+
+
+@pytest.fixture(autouse=True)
+def tests_without_database(monkeypatch):
+    async def get_cached_ctest(ctest_id):
+        return SimpleNamespace(student_code=STUDENT_CODE)
+    monkeypatch.setattr(ctest_unit_form, "get_cached_ctest", get_cached_ctest)
+    student_auth_limiter._buckets.clear()
+
+
+def authorize(ctest_id: str, code: str = STUDENT_CODE) -> int:
+    # A fresh client per student: no shared session cookie, same client IP
+    response = TestClient(app).post(f"/api/student_authorize/{ctest_id}", data={"code": code}, follow_redirects=False)
+    return response.status_code
+
+
+def test_class_of_30_behind_one_ip_can_enter_the_same_test():
+    ctest_id = str(uuid.uuid4())
+    assert [authorize(ctest_id) for _ in range(30)] == [302] * 30
+
+
+def test_guessing_is_limited_per_test_and_ip():
+    ctest_id = str(uuid.uuid4())
+    statuses = [authorize(ctest_id, "000000") for _ in range(RATE_LIMIT_STUDENT_AUTH_BURST + 1)]
+    assert statuses[-1] == 429
+    assert authorize(ctest_id.upper()) == 429
+    assert authorize(str(uuid.uuid4())) == 302
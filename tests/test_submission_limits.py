@@ -0,0 +1,36 @@
+from app.core.config import MAX_ANSWER_CHARS
+from app.main import app
+from app.schemas.submission import Submission
+
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+import pytest
+
+
+"""
+Answers longer than MAX_ANSWER_CHARS are rejected before anything is stored.
+
+Runs without a database: the submission is refused while its body is validated.
+Run from the repository root: python -m pytest tests
+"""
+
+
+def test_answer_at_limit_is_accepted():
+    submission = Submission(ctest_id="id", student_answers={0: "x" * MAX_ANSWER_CHARS}, given_hints={})
+    assert len(submission.student_answers[0]) == MAX_ANSWER_CHARS
+
+
+def test_oversized_answer_is_rejected_by_schema():
+    with pytest.raises(ValidationError):
+        Submission(ctest_id="id", student_answers={0: "x" * (MAX_ANSWER_CHARS + 1)}, given_hints={})
+
+
+def test_oversized_answer_is_rejected_by_submit():
+    client = TestClient(app)
+    response = client.post("/api/submit-ctest", json={
+        "ctest_id": "00000000-0000-0000-0000-000000000000",
+        "student_answers": {"0": "und", "1": "x" * (MAX_ANSWER_CHARS + 1)},
+        "given_hints": {},
+    })
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "student_answers", "1"]